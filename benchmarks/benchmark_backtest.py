@@ -0,0 +1,35 @@
+"""
+Times the vectorized MACD/RSI/MFI backtest on an S&P 500 sized panel with 20 years of daily bars.
+
+Run from the repository root:
+    python -m benchmarks.benchmark_backtest
+"""
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from tools.backtest_helper import backtest_macd_rsi_mfi
+
+N_SYMBOLS = 500
+N_BARS = 252 * 20  # 20 years of daily bars
+
+
+def make_panels():
+    rng = np.random.default_rng(42)
+    index = pd.bdate_range('2003-01-01', periods=N_BARS)
+    columns = [f"S{i:03d}" for i in range(N_SYMBOLS)]
+    close = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0, 0.02, (N_BARS, N_SYMBOLS)), axis=0)),
+                         index=index, columns=columns)
+    spread = pd.DataFrame(np.abs(rng.normal(0, 0.01, (N_BARS, N_SYMBOLS))), index=index, columns=columns)
+    volume = pd.DataFrame(rng.integers(100_000, 1_000_000, (N_BARS, N_SYMBOLS)).astype(float),
+                          index=index, columns=columns)
+    return {'high': close * (1 + spread), 'low': close * (1 - spread), 'close': close, 'volume': volume}
+
+
+if __name__ == '__main__':
+    panels = make_panels()
+    for allow_short in (False, True):
+        seconds = min(timeit.repeat(lambda: backtest_macd_rsi_mfi(panels, allow_short=allow_short),
+                                    number=1, repeat=3))
+        print(f"allow_short={allow_short}: {N_SYMBOLS} symbols x {N_BARS} bars | {seconds:.2f}s")
@@ -0,0 +1,36 @@
+"""
+Times rendering a 50-chart portfolio appendix of Ichimoku charts, serially and across processes.
+
+Run from the repository root:
+    python -m benchmarks.benchmark_chart_rendering
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+from tools.chart_helper import render_charts
+from tools.pattern_helper import calculate_ichimoku
+
+N_CHARTS = 50
+N_BARS = 252
+
+
+def make_jobs():
+    rng = np.random.default_rng(42)
+    index = pd.bdate_range('2023-01-02', periods=N_BARS)
+    jobs = {}
+    for i in range(N_CHARTS):
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, N_BARS)))
+        bars = pd.DataFrame({'open': close, 'high': close * 1.01, 'low': close * 0.99, 'close': close,
+                             'volume': rng.integers(100_000, 1_000_000, N_BARS).astype(float)}, index=index)
+        jobs[f"S{i:02d}"] = ('ichimoku', calculate_ichimoku(bars))
+    return jobs
+
+
+if __name__ == '__main__':
+    jobs = make_jobs()
+    for max_workers in (1, None):
+        start = time.perf_counter()
+        render_charts(jobs, max_workers=max_workers)
+        print(f"max_workers={max_workers}: {N_CHARTS} charts | {time.perf_counter() - start:.2f}s")
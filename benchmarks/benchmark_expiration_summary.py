@@ -0,0 +1,34 @@
+"""
+Times the option expiration summary on a synthetic book of 5,000 option legs.
+
+Run from the repository root:
+    python -m benchmarks.benchmark_expiration_summary
+"""
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from tools.ameritrade_helper import EXPIRATION_SUMMARY_GROUPS, get_expiration_date_summary
+
+N_LEGS = 5_000
+N_UNDERLYINGS = 250
+
+
+def make_book():
+    rng = np.random.default_rng(42)
+    underlyings = np.array([f"U{i:03d}" for i in range(N_UNDERLYINGS)])[rng.integers(0, N_UNDERLYINGS, N_LEGS)]
+    expirations = (pd.Timestamp('2024-01-05') + pd.to_timedelta(7 * rng.integers(0, 52, N_LEGS), unit='D'))
+    put_call = np.where(rng.random(N_LEGS) < 0.6, 'CALL', 'PUT')
+    strikes = rng.integers(10, 500, N_LEGS)
+    symbols = [f"{underlying}_{expiration:%m%d%y}{option[0]}{strike}"
+               for underlying, expiration, option, strike in zip(underlyings, expirations, put_call, strikes)]
+    return pd.DataFrame({'instrument_symbol': symbols, 'marketValue': rng.normal(0, 1_000, N_LEGS),
+                         'instrument_putCall': put_call})
+
+
+if __name__ == '__main__':
+    book = make_book()
+    for by in EXPIRATION_SUMMARY_GROUPS:
+        seconds = min(timeit.repeat(lambda: get_expiration_date_summary(book, by=by), number=10, repeat=3)) / 10
+        print(f"by={by}: {N_LEGS} legs | {seconds * 1000:.1f}ms")
@@ -0,0 +1,90 @@
+"""
+Compares the row-by-row MACD crossover and RSI signal scans with the vectorized panel helpers.
+
+Run from the repository root:
+    python -m benchmarks.benchmark_signal_scan
+"""
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from tools.indicator_helper import calculate_macd, calculate_rsi, find_last_crossovers, find_rsi_signals
+
+N_SYMBOLS = 100
+N_BARS = 252 * 20  # 20 years of daily bars
+
+
+def find_last_crossover_loop(df):
+    # previous implementation of tools.alpha_vantage_helper.find_last_crossover
+    last_crossover_date = None
+    for idx in range(len(df) - 1):
+        current_row = df.iloc[idx]
+        previous_row = df.iloc[idx + 1]
+        if current_row['MACD_Hist'] * previous_row['MACD_Hist'] <= 0:
+            last_crossover_date = current_row.name
+            break
+    return last_crossover_date
+
+
+def find_rsi_signal_loop(rsi_data, oversold_threshold=30, overbought_threshold=70):
+    # previous iterrows scan of src/daily_report/app.py
+    reversed_rsi_data = rsi_data.loc[::-1]
+    current_rsi = reversed_rsi_data.iloc[0]['RSI']
+    most_recent_signal = None
+    threshold_index = reversed_rsi_data.iloc[0].name
+    if oversold_threshold <= current_rsi <= overbought_threshold:
+        for index, row in reversed_rsi_data.iterrows():
+            if row['RSI'] > overbought_threshold:
+                most_recent_signal = 'overbought'
+                threshold_index = index
+                break
+            elif row['RSI'] < oversold_threshold:
+                most_recent_signal = 'oversold'
+                threshold_index = index
+                break
+    elif current_rsi < oversold_threshold:
+        most_recent_signal = 'oversold'
+    else:
+        most_recent_signal = 'overbought'
+    return most_recent_signal, threshold_index
+
+
+def make_panels(trend):
+    rng = np.random.default_rng(42)
+    steps = rng.normal(trend, 1, (N_BARS, N_SYMBOLS))
+    close = pd.DataFrame(1000 + np.cumsum(steps, axis=0), index=pd.bdate_range('2003-01-01', periods=N_BARS),
+                         columns=[f"S{i:03d}" for i in range(N_SYMBOLS)])
+    _, _, macd_hist = calculate_macd(close)
+    return macd_hist, calculate_rsi(close)
+
+
+def run(label, macd_hist, rsi, number=3):
+    frames = {symbol: (macd_hist[[symbol]].rename(columns={symbol: 'MACD_Hist'}).loc[::-1],
+                       rsi[[symbol]].rename(columns={symbol: 'RSI'}))
+              for symbol in macd_hist.columns}
+
+    def loop():
+        for macd_frame, rsi_frame in frames.values():
+            find_last_crossover_loop(macd_frame)
+            find_rsi_signal_loop(rsi_frame)
+
+    def vectorized():
+        find_last_crossovers(macd_hist)
+        find_rsi_signals(rsi)
+
+    loop_secs = min(timeit.repeat(loop, number=1, repeat=number))
+    vectorized_secs = min(timeit.repeat(vectorized, number=1, repeat=number))
+    print(f"{label}: {macd_hist.shape[1]} symbols x {macd_hist.shape[0]} bars | loop {loop_secs:.3f}s | "
+          f"vectorized {vectorized_secs:.4f}s | speedup {loop_secs / vectorized_secs:.0f}x")
+
+
+if __name__ == '__main__':
+    # typical histories: crossovers and RSI breaches are found within a few bars of the end
+    run('typical', *make_panels(trend=0.0))
+    # worst case: the last crossover and RSI breach sit at the start of the history
+    macd_hist, rsi = make_panels(trend=0.0)
+    macd_hist.iloc[1:] = macd_hist.iloc[1:].abs() + 1
+    rsi.iloc[1:] = 50.0
+    rsi.iloc[0] = 80.0
+    run('worst case', macd_hist.iloc[:, :10], rsi.iloc[:, :10], number=1)
@@ -1,3 +1,5 @@
+import os
+
 import dash
 from dash import dcc, html, dash_table
 import dash.dash_table.FormatTemplate as FormatTemplate
@@ -6,7 +8,8 @@ from dash.exceptions import PreventUpdate
 import dash_bootstrap_components as dbc
 from dotenv import load_dotenv
 from tools.ameritrade_helper import (get_specified_account_with_aws, analyze_tda, get_quotes_with_aws,
-                                     get_expiration_date_summary)
+                                     get_expiration_date_summary, get_positions_frame)
+from tools.portfolio_history_helper import get_liquidation_value_history, get_position_pnl_history
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objs as go
@@ -22,6 +25,12 @@ chrome_driver_path = '../chromedriver'
 token_path = '../res/token.json'
 
 display_style = {'width': '36rem', 'color': '#aea7f1'}
+# option table groupings: dropdown value -> (get_expiration_date_summary grouping, column name)
+TABLE_GROUPS = {
+    'EXPIRATION': ('expiration_date', 'Expiration'),
+    'EXPIRATION_WEEK': ('expiration_week', 'Expiration Week'),
+    'UNDERLYING': ('underlying', 'Underlying'),
+}
 
 app = dash.Dash(
     __name__,
@@ -96,14 +105,18 @@ def generate_control_card():
             dcc.Dropdown(
                 id='dropdown',
                 options=[{'label': 'Major Indices', 'value': 'MAJOR_INDICES'},
-                         {'label': 'Bar Plot', 'value': 'BAR'}],
+                         {'label': 'Bar Plot', 'value': 'BAR'},
+                         {'label': 'Liquidation Value History', 'value': 'LIQUIDATION_HISTORY'},
+                         {'label': 'Position P&L History', 'value': 'PNL_HISTORY'}],
                 value='MAJOR_INDICES'  # Default value
             ),
             html.Br(),
             dcc.Dropdown(
                 id='table-dropdown',
                 options=[{'label': 'All Data', 'value': 'ALL_DATA'},
-                         {'label': 'Contract Expiration', 'value': 'EXPIRATION'}],
+                         {'label': 'Contract Expiration', 'value': 'EXPIRATION'},
+                         {'label': 'Expiration Week', 'value': 'EXPIRATION_WEEK'},
+                         {'label': 'Underlying', 'value': 'UNDERLYING'}],
                 value='EXPIRATION'  # Default value
             ),
             html.Br(),
@@ -164,16 +177,17 @@ def retrieve_account_data(refresh_btn__click):
     prevent_initial_call=True,
 )
 def process_account_data(selected_value, account_data):
-    df = pd.json_normalize(account_data['OPTION']['positions'], sep='_')
+    df = get_positions_frame(account_data['OPTION']['positions'])
 
     if selected_value == 'ALL_DATA':
         data = df.to_dict('records')
         # TODO: rearrange columns
         columns = [{"name": i, "id": i} for i in df.columns]
-    elif selected_value == 'EXPIRATION':
-        result = get_expiration_date_summary(df)
+    elif selected_value in TABLE_GROUPS:
+        by, name = TABLE_GROUPS[selected_value]
+        result = get_expiration_date_summary(df, by=by)
         data = result.to_dict('records')
-        columns = [{"name": 'Expiration', "id": 'expiration_date', "type": "datetime"},
+        columns = [{"name": name, "id": by, "type": "text" if by == 'underlying' else "datetime"},
                    {"name": 'Total Market Value', "id": 'marketValue_sum', 'format': FormatTemplate.money(2),
                     'type': 'numeric'},
                    {"name": 'Contract Type Count', "id": 'instrument_putCall_count', 'type': 'numeric'},
@@ -219,6 +233,14 @@ def update_graph(selected_value, account_data):
                 row=1, col=i + 14
             )
 
+    elif selected_value == 'LIQUIDATION_HISTORY':
+        history = get_liquidation_value_history(os.environ['TDA_ACCOUNT_ID'])
+        fig = px.line(x=history.index, y=history.values, labels={'x': 'Date', 'y': 'Liquidation Value'})
+    elif selected_value == 'PNL_HISTORY':
+        symbols = [position['instrument']['symbol'] for details in account_data.values()
+                   for position in details['positions']]
+        pnl = get_position_pnl_history(symbols, account_id=os.environ['TDA_ACCOUNT_ID'])
+        fig = px.line(pnl, labels={'date': 'Date', 'value': 'Day P&L', 'symbol': 'Position'})
     else:
         fig = px.line(df1, x='x', y='y')
     return fig
@@ -1,25 +1,18 @@
 # Standard Python Libraries
 import json
 import os
-import time
-from io import StringIO
+from io import BytesIO
 
 # External Libraries and Frameworks
 import numpy as np
 import pandas as pd
-import seaborn as sns
-import matplotlib.pyplot as plt
-
-# Email Libraries
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
 
 # AWS and Boto3 Libraries
 import boto3
 from botocore.client import Config
 
 # Alpha Vantage and Financial Libraries
-from alpha_vantage.techindicators import TechIndicators
+from alpha_vantage.timeseries import TimeSeries
 
 # ReportLab Libraries
 from reportlab.lib import colors
@@ -40,9 +33,16 @@ from reportlab.platypus import (
 
 # Custom Modules/Tools
 from tools.alpha_vantage_helper import find_last_crossover
-from tools.ameritrade_helper import analyze_tda, get_specified_account_with_aws, get_expiration_date_summary
-from tools.finviz_helper import get_screener
-from tools.os_helper import delete_files
+from tools.ameritrade_helper import (analyze_tda, get_specified_account_with_aws, get_expiration_date_summary,
+                                     get_positions_frame)
+from tools.aws_helper import get_client, get_parameter
+from tools.bar_store_helper import get_daily_adjusted_cached
+from tools.chart_helper import render_chart, render_charts
+from tools.email_helper import DEFAULT_SENDS_PER_SECOND, send_emails
+from tools.finviz_helper import DEFAULT_EXPORT_TTL_SECS, get_screener_cached
+from tools.indicator_helper import calculate_indicators, find_rsi_signals
+from tools.pattern_helper import calculate_ichimoku
+from tools.rate_limit_helper import RateLimitedClient, TokenBucket, fetch_concurrently
 
 
 def lambda_handler(event, context):
@@ -58,89 +58,100 @@ def lambda_handler(event, context):
 
     # Extract the results or handle the data as needed
         gpt_daily_synopsis = outputs.get('DailySynopsisFunction', {}).get('results', {})
-    # files to be removed from /tmp at end of execution
-    tmp_files = []
-    # Create PDF
+    # Create PDF, rendered in memory
     date_now = pd.Timestamp.now(tz='US/Eastern')
     pdf_key = f"report_{date_now.strftime('%Y%m%d')}.pdf"
-    pdf_path = f"/tmp/{pdf_key}"
-    tmp_files.append(pdf_path)
+    pdf_buffer = BytesIO()
 
     # get api keys
     alphavantage_api_key = os.environ['ALPHAVANTAGE_API_KEY']
     finviz_api_key = os.environ['FINVIZ_API_KEY']
 
     account_analysis = outputs.get('PortfolioAlertFunction', {}).get('results', {})
-    option_position_df = pd.json_normalize(account_analysis['OPTION']['positions'], sep='_')
+    option_position_df = get_positions_frame(account_analysis['OPTION']['positions'])
     expiration_date_summary = get_expiration_date_summary(option_position_df)
     option_table_dict = {}
 
-    for idx, contract in enumerate(account_analysis['OPTION']['positions']):
+    # thresholds can be tuned from the ranked output of src/studies/threshold_sweep
+    rsi_oversold_threshold = float(os.environ.get('RSI_OVERSOLD_THRESHOLD', 30))
+    rsi_overbought_threshold = float(os.environ.get('RSI_OVERBOUGHT_THRESHOLD', 70))
+    crossover_days_threshold = int(os.environ.get('CROSSOVER_DAYS_THRESHOLD', 7))
+    # the chart appendix is capped so its rendering stays a bounded share of the Lambda timeout
+    appendix_underlyings = select_appendix_underlyings(
+        option_position_df, int(os.environ.get('CHART_APPENDIX_MAX_UNDERLYINGS', 20)))
+
+    # fetch the daily bars of every underlying concurrently, within the Alpha Vantage quota
+    bar_store_bucket = os.environ.get('BAR_STORE_BUCKET')
+    bar_store_s3 = get_client('s3') if bar_store_bucket else None
+    alpha_vantage_bucket = TokenBucket(int(os.environ.get('ALPHAVANTAGE_CALLS_PER_MINUTE', 75)))
+    ts = RateLimitedClient(TimeSeries(key=alphavantage_api_key, output_format='pandas'), alpha_vantage_bucket)
+    underlying_symbols = sorted({contract['instrument']['underlyingSymbol']
+                                 for contract in account_analysis['OPTION']['positions']})
+    underlying_bars = fetch_concurrently(
+        lambda symbol: get_daily_adjusted_cached(ts, symbol, bucket_name=bar_store_bucket, s3_client=bar_store_s3),
+        [symbol for symbol in underlying_symbols if symbol[0] != '$'])
+
+    # compute the indicators once per underlying from the cached daily bars
+    underlying_signals = {}
+    # Ichimoku and RSI charts of the appendix underlyings, rendered together
+    chart_jobs = {}
+    for underlying_symbol in underlying_symbols:
+        if underlying_symbol[0] == '$':
+            underlying_signals[underlying_symbol] = {
+                'macd_hist': np.NaN,
+                'last_crossover_date': np.NaN,
+                'current_rsi': np.NaN,
+                'most_recent_signal': np.NaN,
+                'threshold_index_str': np.NaN
+            }
+            continue
+
+        indicator_data = calculate_indicators(underlying_bars[underlying_symbol])
+
+        # find_last_crossover expects the most recent bar first
+        macd_data = indicator_data[['MACD', 'MACD_Signal', 'MACD_Hist']].loc[::-1]
+        last_crossover_date = find_last_crossover(macd_data)
+
+        rsi_signal = find_rsi_signals(indicator_data['RSI'].rename(underlying_symbol),
+                                      oversold_threshold=rsi_oversold_threshold,
+                                      overbought_threshold=rsi_overbought_threshold).iloc[0]
+
+        underlying_signals[underlying_symbol] = {
+            'macd_hist': macd_data.iloc[0]['MACD_Hist'],
+            'last_crossover_date': last_crossover_date,
+            'current_rsi': rsi_signal['rsi'],
+            'most_recent_signal': rsi_signal['signal'],
+            'threshold_index_str': rsi_signal['signal_date'].strftime('%m-%d-%Y')
+        }
+        if underlying_symbol in appendix_underlyings:
+            chart_jobs[(underlying_symbol, 'ichimoku')] = (
+                'ichimoku', calculate_ichimoku(underlying_bars[underlying_symbol].copy()))
+            chart_jobs[(underlying_symbol, 'rsi')] = ('rsi', indicator_data['RSI'])
+
+    # extra render processes only pay off with a full vCPU per process, i.e. from about 1.8 GB of Lambda memory
+    charts = render_charts(chart_jobs, max_workers=int(os.environ.get('CHART_RENDER_WORKERS', 1)))
+    omitted_underlyings = [symbol for symbol in underlying_symbols
+                           if symbol[0] != '$' and symbol not in appendix_underlyings]
+
+    for contract in account_analysis['OPTION']['positions']:
         instrument = contract['instrument']
         put_call = instrument['putCall']
         underlying_symbol = instrument['underlyingSymbol']
-
-        if underlying_symbol[0] == '$':
-            macd_hist = np.NaN
-            last_crossover_date = np.NaN
-            current_rsi = np.NaN
-            most_recent_signal = np.NaN
-            threshold_index_str = np.NaN
-        else:
-            ti = TechIndicators(key=alphavantage_api_key, output_format='pandas')
-
-            macd_data, meta_macd_data = ti.get_macd(
-                symbol=underlying_symbol, interval='daily', fastperiod=12, slowperiod=26, signalperiod=9,
-                series_type='close'
-            )
-            # Usage:
-            last_crossover_date = find_last_crossover(macd_data)
-
-            rsi_oversold_threshold = 30
-            rsi_overbought_threshold = 70
-            crossover_days_threshold = 7
-
-            rsi_data, meta_rsi_data = ti.get_rsi(
-                symbol=underlying_symbol, interval='daily', time_period=14, series_type='close'
-            )
-
-            reversed_rsi_data = rsi_data.loc[::-1]
-            current_rsi = reversed_rsi_data.iloc[0]['RSI']
-            most_recent_signal = None
-            threshold_index = reversed_rsi_data.iloc[0].name
-            if rsi_oversold_threshold <= current_rsi <= rsi_overbought_threshold:
-                for index, row in reversed_rsi_data.iterrows():
-                    if row['RSI'] > rsi_overbought_threshold:
-                        most_recent_signal = 'overbought'
-                        threshold_index = index
-                        break
-                    elif row['RSI'] < rsi_oversold_threshold:
-                        most_recent_signal = 'oversold'
-                        threshold_index = index
-                        break
-            elif current_rsi < rsi_oversold_threshold:
-                most_recent_signal = 'oversold'
-            else:
-                most_recent_signal = 'overbought'
-            macd_hist = macd_data.iloc[0]['MACD_Hist']
-            threshold_index_str = threshold_index.strftime('%m-%d-%Y')
+        signals = underlying_signals[underlying_symbol]
 
         option_table_dict[instrument['symbol']] = {
             "Symbol": underlying_symbol,
             "Type": put_call,
             "Market": contract['marketValue'],
-            "MACD Hist": macd_hist,
-            "Crossover": last_crossover_date,
-            "RSI": current_rsi,
-            "RSI Signal": most_recent_signal,
-            "RSI Date": threshold_index_str
+            "MACD Hist": signals['macd_hist'],
+            "Crossover": signals['last_crossover_date'],
+            "RSI": signals['current_rsi'],
+            "RSI Signal": signals['most_recent_signal'],
+            "RSI Date": signals['threshold_index_str']
         }
-        # if idx > 2:
-        #     break
-        # time.sleep(0.25)
 
     # Create a BaseDocTemplate
-    doc = BaseDocTemplate(pdf_path, pagesize=letter)
+    doc = BaseDocTemplate(pdf_buffer, pagesize=letter)
 
     # Define a page template with a footer
     frame = Frame(doc.leftMargin, doc.bottomMargin, doc.width, doc.height)
@@ -176,12 +187,15 @@ def lambda_handler(event, context):
     p_list = parse_markdown_to_paragraphs(gpt_daily_synopsis, styles)
 
     option_table_df = pd.DataFrame.from_dict(option_table_dict, orient='index')
-    screener = get_screener(finviz_api_key,
-                            layout='Overview',
-                            symbols=list(option_table_df['Symbol'].unique()),
-                            sleep_secs=0)
-    csvStringIO = StringIO(screener.text)
-    screener_df = pd.read_csv(csvStringIO, sep=",", header=0, index_col='No.')
+    # sliced from the cached full-universe export, shared with other runs through the bar store bucket; index
+    # underlyings such as '$SPX.X' are not covered by Finviz
+    screener_df = get_screener_cached(finviz_api_key,
+                                      layout='Overview',
+                                      symbols=[symbol for symbol in option_table_df['Symbol'].unique()
+                                               if symbol[0] != '$'],
+                                      ttl_secs=int(os.environ.get('FINVIZ_CACHE_TTL_SECS', DEFAULT_EXPORT_TTL_SECS)),
+                                      bucket_name=bar_store_bucket,
+                                      s3_client=bar_store_s3)
 
     # Apply a basic table style
     style_commands = [('BACKGROUND', (0, 0), (-1, 0), colors.grey),
@@ -226,27 +240,13 @@ def lambda_handler(event, context):
                                             right_on='Ticker', how='left')
 
     # Create the boxplot
-    plt.figure(figsize=(10, 6))
-    sns.boxplot(x='Sector', y='Market', data=option_table_df, hue='Type')
-
-    # Set the title and labels
-    plt.title('Option Market Value by Sector')
-    plt.xlabel('Sector')
-    plt.xticks(rotation=45)  # This will rotate the labels by 45 degrees.
-    plt.ylabel('Market Value')
-
-    # Show the plot
-    plt.tight_layout()
-    box_plot_sectors = '/tmp/box_plot.png'
-    plt.savefig(box_plot_sectors)
-    tmp_files.append(box_plot_sectors)
-    box_plot = Image(box_plot_sectors, width=50 * 10, height=50 * 6)
-
+    box_plot = Image(BytesIO(render_chart('sector_boxplot', option_table_df)), width=50 * 10, height=50 * 6)
 
     # Build the document
     doc.build([title, sub_title, author, warning] + p_list +
                # logo,
-               [PageBreak(), table_expiration, PageBreak(), table, PageBreak(), box_plot])
+               [PageBreak(), table_expiration, PageBreak(), table, PageBreak(), box_plot] +
+               build_chart_appendix(charts, styles, doc.width, omitted=omitted_underlyings))
 
     # Upload the PDF to S3
     bucket_name = os.environ['BUCKET_NAME']
@@ -254,7 +254,8 @@ def lambda_handler(event, context):
                       aws_access_key_id=os.environ['IAM_ACCESS_KEY_ID'],
                       aws_secret_access_key=os.environ['IAM_SECRET_ACCESS_KEY'],
                       config=Config(signature_version='s3v4'))
-    s3.upload_file(pdf_path, bucket_name, pdf_key)
+    pdf_buffer.seek(0)
+    s3.upload_fileobj(pdf_buffer, bucket_name, pdf_key, ExtraArgs={'ContentType': 'application/pdf'})
 
     # Generate a presigned URL for the PDF
     hours = 24
@@ -264,48 +265,25 @@ def lambda_handler(event, context):
         ExpiresIn=60 * 60 * hours  # URL will be valid for hours specified
     )
 
-    ssm = boto3.client('ssm')
-    parameter = ssm.get_parameter(Name='FROM_EMAIL', WithDecryption=True)
-    from_email = parameter['Parameter']['Value']
-    parameter = ssm.get_parameter(Name='TO_EMAILS', WithDecryption=True)
-
-    to_emails = parameter['Parameter']['Value'].split(',')
-    for to_email in to_emails:
-        # Create MIME message
-        msg = MIMEMultipart()
-        msg['From'] = from_email
-        msg['To'] = to_email
-        msg['Subject'] = 'Daily Trading Report'
-
-        # Add text body (optional)
-        # Create an email message with the download link
-        email_body = f"""
-        Dear Recipient,
+    # Create an email message with the download link
+    email_body = f"""
+    Dear Recipient,
 
-        Please download the PDF file using the following link:
+    Please download the PDF file using the following link:
 
-        {url}
+    {url}
 
-        This link will expire in {hours} hours.
+    This link will expire in {hours} hours.
 
-        Best regards,
-        Sean Bearden, Ph.D.
-        """
+    Best regards,
+    Sean Bearden, Ph.D.
+    """
+    statuses = send_emails(get_parameter('FROM_EMAIL'), get_parameter('TO_EMAILS').split(','),
+                           'Daily Trading Report', email_body,
+                           sends_per_second=float(os.environ.get('SES_SENDS_PER_SECOND', DEFAULT_SENDS_PER_SECOND)))
 
-        text = MIMEText(email_body, 'plain')
-        msg.attach(text)
-
-        # Send email
-        client = boto3.client('ses')
-        response = client.send_raw_email(
-            RawMessage={'Data': msg.as_string()},
-            Source=msg['From'],
-            Destinations=[msg['To']]
-        )
-        time.sleep(1)
-
-    delete_files(tmp_files)
-    return {'statusCode': 200, 'body': 'Report created successfully and sent!'}
+    return {'statusCode': 200,
+            'body': json.dumps({'message': 'Report created successfully and sent!', 'recipients': statuses})}
 
 
 # Function to draw the header and footer on each page
@@ -322,6 +300,33 @@ def header_footer(canvas, doc):
         canvas.drawRightString(doc.width + doc.leftMargin, inch / 2, text)
 
 
+# Function to choose the underlyings of the chart appendix: those with the largest option market value, in
+# alphabetical order; index underlyings such as '$SPX.X' have no daily bars to chart
+def select_appendix_underlyings(option_position_df, max_underlyings):
+    if option_position_df.empty:
+        return []
+    exposure = (option_position_df['marketValue'].abs()
+                .groupby(option_position_df['instrument_underlyingSymbol']).sum())
+    exposure = exposure[~exposure.index.str.startswith('$')]
+    return sorted(exposure.sort_values(ascending=False, kind='stable').index[:max_underlyings])
+
+
+# Function to create one page of charts per underlying, followed by the underlyings left out of the appendix
+def build_chart_appendix(charts, styles, width, omitted=()):
+    flowables = []
+    symbols = list(dict.fromkeys(symbol for symbol, _ in charts))
+    for symbol in symbols:
+        flowables += [PageBreak(), Paragraph(symbol, styles['Heading2'])]
+        for chart, height in (('ichimoku', width / 2), ('rsi', width * 0.55)):
+            # proportional keeps the aspect ratio of the chart within the given box
+            flowables.append(Image(BytesIO(charts[(symbol, chart)]), width=width, height=height,
+                                   kind='proportional'))
+    if omitted:
+        flowables.append(Paragraph(f"Charts not included for {len(omitted)} underlying(s) with smaller option "
+                                   f"positions: {', '.join(omitted)}", styles['Normal']))
+    return flowables
+
+
 # Function to parse Markdown and create Paragraphs
 def parse_markdown_to_paragraphs(md_text, styles):
     # Split the markdown text into blocks separated by two newlines
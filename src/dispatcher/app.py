@@ -1,10 +1,9 @@
-import asyncio
 import json
 import os
 
 import boto3
 
-from tools.telegram_helper import send_alert
+from tools.telegram_helper import run_async, send_alert
 
 lambda_client = boto3.client('lambda')
 
@@ -30,7 +29,7 @@ def lambda_handler(event, context):
         message = body.get('message', {}).get('text', 'NONE')
         if message[0] != '/':
             alert_message = 'Message commands must begin with "/"'
-            asyncio.run(send_alert(bot_token, user_id, alert_message))
+            run_async(send_alert(bot_token, user_id, alert_message))
             return {
                 'statusCode': 200,
                 'body': alert_message
@@ -41,7 +40,7 @@ def lambda_handler(event, context):
         lambda_event = {}
         if not target_lambda:
             alert_message = f'Not a valid command. Try {", ".join(command_mappings.keys())}'
-            asyncio.run(send_alert(bot_token, user_id, alert_message))
+            run_async(send_alert(bot_token, user_id, alert_message))
             return {
                 'statusCode': 200,
                 'body': alert_message
@@ -49,7 +48,7 @@ def lambda_handler(event, context):
         elif target_lambda == command_mappings['/report']:
             if len(message_split) < 2:
                 alert_message = 'The report command must be followed by a stock symbol. For example: "/report AAPL".'
-                asyncio.run(send_alert(bot_token, user_id, alert_message))
+                run_async(send_alert(bot_token, user_id, alert_message))
                 return {
                     'statusCode': 200,
                     'body': alert_message
@@ -57,7 +56,7 @@ def lambda_handler(event, context):
             else:
                 symbol = message_split[1]
                 alert_message = f'Generating report for {symbol}.'
-                asyncio.run(send_alert(bot_token, user_id, alert_message))
+                run_async(send_alert(bot_token, user_id, alert_message))
                 lambda_event = {
                     "body": {
                         "report_type": "stock_analysis", "send_email": False, "send_telegram": True, "symbol": symbol
@@ -78,7 +77,7 @@ def lambda_handler(event, context):
     else:
         # If the token doesn't match, return an unauthorized response
         alert_message = 'Unauthorized Webhook'
-        asyncio.run(send_alert(bot_token, user_id, alert_message))
+        run_async(send_alert(bot_token, user_id, alert_message))
         return {
             'statusCode': 403,
             'body': alert_message
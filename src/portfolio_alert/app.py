@@ -1,4 +1,3 @@
-import asyncio
 import copy
 from datetime import datetime
 import json
@@ -7,8 +6,9 @@ import os
 import boto3
 
 from tools.ameritrade_helper import analyze_tda, get_specified_account_with_aws
-from tools.aws_helper import safe_put_item
-from tools.telegram_helper import send_alert
+from tools.aws_helper import batch_put_items, safe_put_item
+from tools.snapshot_helper import write_snapshot
+from tools.telegram_helper import run_async, send_alert
 
 
 # Initialize a DynamoDB client
@@ -51,9 +51,13 @@ def lambda_handler(event, context):
     current_balances['accountId'] = account['securitiesAccount']['accountId']
     current_balances['storedTimestamp'] = dataset_datetime
 
-    safe_put_item(current_balances_table, current_balances)
+    failures = []
+    balances_failure = safe_put_item(current_balances_table, current_balances)
+    if balances_failure:
+        failures.append(balances_failure)
 
-    # Process each position and store in DynamoDB
+    # Flatten each position and store them all in batched writes
+    items = []
     for position in positions:
         # Flatten the instrument data into position
         instrument_data = position.pop('instrument', {})
@@ -63,25 +67,37 @@ def lambda_handler(event, context):
         # Add accountId and storedTimestamp to each position
         position['accountId'] = account['securitiesAccount']['accountId']
         position['storedTimestamp'] = dataset_datetime
-        # position['storedTimestamp'] = datetime.utcnow().isoformat()
 
         # Ensure the symbol key exists
         if 'symbol' not in position:
             continue  # Skip positions without a symbol
+        items.append(position)
 
-        # Convert float values to Decimal
-        safe_put_item(table, position)
+    failures.extend(batch_put_items(table, items))
 
+    # Archive the snapshot as Parquet so history queries read a few files instead of scanning the tables
+    snapshot_bucket = os.environ.get('SNAPSHOT_BUCKET')
+    if snapshot_bucket:
+        account_id = account['securitiesAccount']['accountId']
+        try:
+            write_snapshot(items, 'positions', account_id, dataset_datetime, bucket_name=snapshot_bucket)
+            write_snapshot([current_balances], 'current_balances', account_id, dataset_datetime,
+                           bucket_name=snapshot_bucket)
+        except Exception as e:
+            print(f'Failed to archive the snapshot: {e}')
 
     current_liquidation_value = account['securitiesAccount']['currentBalances']['liquidationValue']
     alert_message = f'Your portfolio has a liquidation value of ${current_liquidation_value:.2f}'
-    # TECH DEBT: handle this error so long messages are broken into pieces: telegram.error.BadRequest: Text is too long
-    # Run the async function
-    asyncio.run(send_alert(bot_token, user_id, alert_message))
+    if failures:
+        alert_message += f'\n{len(failures)} snapshot item(s) could not be stored'
+    # Run the async function on the container's event loop; long messages are split into pieces
+    run_async(send_alert(bot_token, user_id, alert_message))
 
     return {
         'statusCode': 200,
-        'body': json.dumps({'results': account_analysis}),
+        'body': json.dumps({'results': account_analysis,
+                            'failed_items': [{'symbol': failure['item'].get('symbol', 'current balances'),
+                                              'error': failure['error']} for failure in failures]}),
         'function': 'PortfolioAlertFunction'
     }
 
@@ -0,0 +1,191 @@
+"""
+Double top (bottom) study.
+
+Scans a stock universe for multi-top and multi-bottom formations over a grid of `order`/`tolerance` parameters and
+records the forward returns and excursions that followed each signal. Bars are read from the local bar store, so
+populate it first (`--fetch` downloads any missing symbol through Alpha Vantage).
+
+Run from the repository root:
+    python -m src.studies.double_top.study --universe sp500 --orders 1 2 3 --tolerances 0.005 0.01
+"""
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import product
+
+import pandas as pd
+
+from tools.alpha_vantage_helper import get_daily_adjusted_processed
+from tools.bar_store_helper import DEFAULT_BAR_STORE_DIR, get_daily_adjusted_cached, load_bars
+from tools.event_study_helper import build_price_matrix, compute_event_returns, summarize_event_returns
+from tools.finviz_helper import UNIVERSE_PAGES, get_universe
+from tools.pattern_helper import identify_multi_bottoms, identify_multi_tops
+from tools.sweep_helper import rank_results
+
+UNIVERSES = list(UNIVERSE_PAGES)
+PATTERNS = {
+    'double_top': identify_multi_tops,
+    'double_bottom': identify_multi_bottoms,
+}
+# a double top anticipates a fall and a double bottom a rise
+PATTERN_DIRECTIONS = {
+    'double_top': -1,
+    'double_bottom': 1,
+}
+
+
+def get_universe_symbols(universes):
+    """
+    Retrieves the unique tickers of the requested universes from their latest stored snapshots.
+
+    Args:
+        universes (list of str): Universe names, any of 'sp500', 'nasdaq100' and 'djia'.
+
+    Returns:
+        list of str: The sorted unique tickers.
+    """
+    tickers = pd.concat([get_universe(universe)['Ticker'] for universe in universes])
+    return sorted(tickers.dropna().unique())
+
+
+def scan_symbol(symbol, orders, tolerances, lookback=120, step=5, cache_dir=DEFAULT_BAR_STORE_DIR):
+    """
+    Scans the cached history of one symbol for multi-top and multi-bottom signals.
+
+    The detectors run on a window of `lookback` bars that slides forward `step` bars at a time. A formation is
+    recorded once, on the first window whose latest touch it is, and that window's last bar is the signal date.
+
+    Args:
+        symbol (str): The ticker symbol.
+        orders (list of int): The `order` values passed to the detectors.
+        tolerances (list of float): The `tolerance` values passed to the detectors.
+        lookback (int, optional): The number of bars each detection sees. Defaults to 120.
+        step (int, optional): The number of bars between detections. Defaults to 5.
+        cache_dir (str, optional): The local directory of the bar store. Defaults to '/tmp/bars'.
+
+    Returns:
+        DataFrame: One row per signal with the formation details; 'date' is the signal date and 'direction' the
+                   anticipated move (-1 after a top, 1 after a bottom).
+    """
+    raw_bars = load_bars(symbol, cache_dir=cache_dir)
+    if raw_bars is None or len(raw_bars) < lookback:
+        return pd.DataFrame()
+    bars = get_daily_adjusted_processed(raw_bars)
+    dates = bars.index
+
+    hits = []
+    for (pattern, detector), order, tolerance in product(PATTERNS.items(), orders, tolerances):
+        seen_touches = set()
+        for end in range(lookback, len(bars) + 1, step):
+            start = end - lookback
+            touches, level = detector(bars.iloc[start:end], tolerance=tolerance, order=order)
+            if touches is None or start + touches[-1] in seen_touches:
+                continue
+            seen_touches.add(start + touches[-1])
+            hits.append({
+                'symbol': symbol,
+                'date': dates[end - 1],
+                'direction': PATTERN_DIRECTIONS[pattern],
+                'pattern': pattern,
+                'order': order,
+                'tolerance': tolerance,
+                'first_touch_date': dates[start + touches[0]],
+                'last_touch_date': dates[start + touches[-1]],
+                'touches': len(touches),
+                'level': level,
+            })
+    return pd.DataFrame(hits)
+
+
+def run_study(symbols, orders, tolerances, output_dir, lookback=120, step=5, horizons=(5, 10, 20),
+              cache_dir=DEFAULT_BAR_STORE_DIR, max_workers=None):
+    """
+    Scans every symbol in a process pool and writes the signals and their summary as CSV files.
+
+    The forward returns and excursions of all signals are evaluated together by the event study engine over a
+    matrix of the scanned symbols' closes. Returns are signed by the anticipated move, so a positive return after a
+    double top is a fall in price.
+
+    Args:
+        symbols (list of str): The ticker symbols to scan.
+        orders (list of int): The `order` values passed to the detectors.
+        tolerances (list of float): The `tolerance` values passed to the detectors.
+        output_dir (str): The directory receiving 'hits.csv' and 'summary.csv'.
+        lookback (int, optional): The number of bars each detection sees. Defaults to 120.
+        step (int, optional): The number of bars between detections. Defaults to 5.
+        horizons (tuple of int, optional): The forward return horizons in bars. Defaults to (5, 10, 20).
+        cache_dir (str, optional): The local directory of the bar store. Defaults to '/tmp/bars'.
+        max_workers (int, optional): The number of worker processes; 1 scans in this process. Defaults to None (the
+                                     number of CPUs).
+
+    Returns:
+        DataFrame: The summary of the signals per pattern and detector setting, ranked best first.
+    """
+    scan = partial(scan_symbol, orders=orders, tolerances=tolerances, lookback=lookback, step=step,
+                   cache_dir=cache_dir)
+    if max_workers == 1:
+        results = list(map(scan, symbols))
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(scan, symbols, chunksize=4))
+
+    hit_frames = [result for result in results if not result.empty]
+    os.makedirs(output_dir, exist_ok=True)
+    if not hit_frames:
+        pd.DataFrame().to_csv(os.path.join(output_dir, 'hits.csv'), index=False)
+        pd.DataFrame().to_csv(os.path.join(output_dir, 'summary.csv'), index=False)
+        return pd.DataFrame()
+
+    hits = pd.concat(hit_frames, ignore_index=True)
+    prices = build_price_matrix({symbol: get_daily_adjusted_processed(load_bars(symbol, cache_dir=cache_dir))
+                                 for symbol in hits['symbol'].unique()})
+    hits = compute_event_returns(prices, hits, horizons=horizons)
+    hits.to_csv(os.path.join(output_dir, 'hits.csv'), index=False)
+    summary = summarize_event_returns(hits, horizons=horizons, by=['pattern', 'order', 'tolerance'])
+    # rank the detector settings by the mean signed return over the longest horizon
+    summary = rank_results(summary, f"mean_return_{max(horizons)}d")
+    summary.to_csv(os.path.join(output_dir, 'summary.csv'), index=False)
+    return summary
+
+
+def fetch_missing_bars(symbols, cache_dir=DEFAULT_BAR_STORE_DIR):
+    """
+    Downloads the bars of symbols that are not in the bar store yet.
+
+    Args:
+        symbols (list of str): The ticker symbols.
+        cache_dir (str, optional): The local directory of the bar store. Defaults to '/tmp/bars'.
+
+    Returns:
+        None
+    """
+    from alpha_vantage.timeseries import TimeSeries
+
+    ts = TimeSeries(key=os.environ['ALPHAVANTAGE_API_KEY'], output_format='pandas')
+    for symbol in symbols:
+        if load_bars(symbol, cache_dir=cache_dir) is None:
+            get_daily_adjusted_cached(ts, symbol, cache_dir=cache_dir)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Scan a stock universe for double tops and double bottoms.')
+    parser.add_argument('--universe', nargs='+', default=['sp500'], choices=UNIVERSES)
+    parser.add_argument('--symbols', nargs='+', help='Scan these symbols instead of a universe.')
+    parser.add_argument('--orders', nargs='+', type=int, default=[1, 2, 3])
+    parser.add_argument('--tolerances', nargs='+', type=float, default=[0.005, 0.01, 0.02])
+    parser.add_argument('--lookback', type=int, default=120)
+    parser.add_argument('--step', type=int, default=5)
+    parser.add_argument('--horizons', nargs='+', type=int, default=[5, 10, 20])
+    parser.add_argument('--cache-dir', default=DEFAULT_BAR_STORE_DIR)
+    parser.add_argument('--output-dir', default='results/double_top')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--fetch', action='store_true', help='Download symbols missing from the bar store.')
+    args = parser.parse_args()
+
+    study_symbols = args.symbols or get_universe_symbols(args.universe)
+    if args.fetch:
+        fetch_missing_bars(study_symbols, cache_dir=args.cache_dir)
+    print(run_study(study_symbols, args.orders, args.tolerances, args.output_dir, lookback=args.lookback,
+                    step=args.step, horizons=tuple(args.horizons), cache_dir=args.cache_dir,
+                    max_workers=args.workers))
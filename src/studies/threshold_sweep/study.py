@@ -0,0 +1,41 @@
+"""
+Indicator threshold sweep.
+
+Backtests the combined MACD, RSI and MFI strategy over a grid of thresholds and indicator periods on the cached daily
+bars of a stock universe, and writes the parameter sets ranked by portfolio performance. The top row's
+`rsi_oversold` and `rsi_overbought` map to the `RSI_OVERSOLD_THRESHOLD` and `RSI_OVERBOUGHT_THRESHOLD` settings of
+the daily report; `crossover_bars` counts trading days, so 5 bars correspond to its 7 calendar day
+`CROSSOVER_DAYS_THRESHOLD`.
+
+Run from the repository root:
+    python -m src.studies.threshold_sweep.study --universe sp500 --rsi-oversold 25 30 35 --crossover-bars 1 3 5
+"""
+import argparse
+import os
+
+from src.studies.double_top.study import UNIVERSES, get_universe_symbols
+from tools.backtest_helper import load_bar_panels
+from tools.bar_store_helper import DEFAULT_BAR_STORE_DIR
+from tools.sweep_helper import PERIOD_PARAMETERS, THRESHOLD_PARAMETERS, sweep_strategy_parameters
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Rank MACD/RSI/MFI strategy parameters over a stock universe.')
+    parser.add_argument('--universe', nargs='+', default=['sp500'], choices=UNIVERSES)
+    parser.add_argument('--symbols', nargs='+', help='Use these symbols instead of a universe.')
+    for name, default in {**THRESHOLD_PARAMETERS, **PERIOD_PARAMETERS}.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", nargs='+', type=type(default), default=[default])
+    parser.add_argument('--objective', default='sharpe')
+    parser.add_argument('--allow-short', action='store_true')
+    parser.add_argument('--cost-per-trade', type=float, default=0.0005)
+    parser.add_argument('--cache-dir', default=DEFAULT_BAR_STORE_DIR)
+    parser.add_argument('--output-dir', default='results/threshold_sweep')
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    panels = load_bar_panels(args.symbols or get_universe_symbols(args.universe), cache_dir=args.cache_dir)
+    grid = {name: getattr(args, name) for name in {**THRESHOLD_PARAMETERS, **PERIOD_PARAMETERS}}
+    ranked = sweep_strategy_parameters(panels, grid, objective=args.objective, allow_short=args.allow_short,
+                                       cost_per_trade=args.cost_per_trade, max_workers=args.workers)
+    os.makedirs(args.output_dir, exist_ok=True)
+    ranked.to_csv(os.path.join(args.output_dir, 'ranked.csv'), index=False)
+    print(ranked.head(10))
@@ -46,3 +46,8 @@ class TestFinancialFunctions:
         # Verify that the correct crossover date is found
         assert crossover_date == macd_dataframe.index[1]  # Based on the sample data
         # Add more assertions to test different scenarios
+
+    def test_find_last_crossover_without_crossover(self):
+        df = pd.DataFrame({'MACD_Hist': [0.3, 0.2, 0.1]}, index=pd.date_range(start='2020-01-01', periods=3)).loc[::-1]
+
+        assert find_last_crossover(df) is None
@@ -9,7 +9,8 @@ from requests.models import Response
 from tda import client
 
 # Local application/library specific imports
-from tools.ameritrade_helper import get_quote, tda_auth, verify_entry, get_option_chain, get_expiration_date_summary
+from tools.ameritrade_helper import (get_quote, tda_auth, verify_entry, get_option_chain, get_expiration_date_summary,
+                                     analyze_tda, get_positions_frame, get_tda_client, reset_tda_client)
 
 
 class TestExpirationDateSummary:
@@ -62,6 +63,86 @@ class TestExpirationDateSummary:
                                        'instrument_putCall_count', 'call_vol_perc'}
         assert pd.api.types.is_object_dtype(result['expiration_date'])
 
+    def test_does_not_modify_input(self, sample_data):
+        before = sample_data.copy()
+        get_expiration_date_summary(sample_data)
+        pd.testing.assert_frame_equal(sample_data, before)
+
+    @pytest.mark.parametrize('symbol', ['CVX111723C145', 'CVX_139923C145'])
+    def test_malformed_symbol_raises(self, symbol):
+        df = pd.DataFrame({
+            'instrument_symbol': ['AAPL_121523C150', symbol],
+            'marketValue': [200, 100],
+            'instrument_putCall': ['CALL', 'CALL']
+        })
+        with pytest.raises(ValueError):
+            get_expiration_date_summary(df)
+
+    def test_breakdowns(self):
+        df = pd.DataFrame({
+            'instrument_symbol': ['CVX_111723C145', 'CVX_111523P140', 'AAPL_112023C190'],
+            'marketValue': [100, 300, 200],
+            'instrument_putCall': ['CALL', 'PUT', 'CALL']
+        })
+        by_underlying = get_expiration_date_summary(df, by='underlying').set_index('underlying')
+        assert by_underlying.loc['CVX', 'marketValue_sum'] == 400
+        assert by_underlying.loc['CVX', 'call_mark_perc'] == 0.25
+        assert by_underlying.loc['AAPL', 'call_vol_perc'] == 1.0
+
+        by_week = get_expiration_date_summary(df, by='expiration_week')
+        assert by_week['expiration_week'].tolist() == [pd.Timestamp('2023-11-13').date(),
+                                                       pd.Timestamp('2023-11-20').date()]
+        assert by_week['instrument_putCall_count'].tolist() == [2, 1]
+
+        with pytest.raises(ValueError):
+            get_expiration_date_summary(df, by='strike')
+
+
+class TestAnalyzeTda:
+
+    @pytest.fixture
+    def account(self):
+        positions = [
+            {'longQuantity': 2.0, 'shortQuantity': 0.0, 'marketValue': 500.0, 'currentDayProfitLoss': 20.0,
+             'instrument': {'assetType': 'OPTION', 'putCall': 'CALL', 'symbol': 'AAPL_121523C150'}},
+            {'longQuantity': 0.0, 'shortQuantity': 1.0, 'marketValue': -150.0, 'currentDayProfitLoss': -5.0,
+             'instrument': {'assetType': 'OPTION', 'putCall': 'PUT', 'symbol': 'CVX_111723P145'}},
+            {'longQuantity': 10, 'shortQuantity': 0, 'marketValue': 1900, 'currentDayProfitLoss': 12.5,
+             'instrument': {'assetType': 'EQUITY', 'symbol': 'AAPL'}},
+            {'longQuantity': 0.0, 'shortQuantity': 5.0, 'marketValue': -700.0, 'currentDayProfitLoss': 3.0,
+             'instrument': {'assetType': 'EQUITY', 'symbol': 'XOM'}},
+            {'longQuantity': 1000.0, 'shortQuantity': 0.0, 'marketValue': 1000.0, 'currentDayProfitLoss': 0.0,
+             'instrument': {'assetType': 'CASH_EQUIVALENT', 'symbol': 'MMDA1'}},
+        ]
+        return {'securitiesAccount': {'positions': positions}}
+
+    def test_aggregates(self, account):
+        investments = analyze_tda(account)
+        assert list(investments) == ['OPTION', 'EQUITY', 'CASH_EQUIVALENT']
+        assert investments['OPTION']['long_market_value'] == 500.0
+        assert investments['OPTION']['short_market_value'] == -150.0
+        assert investments['OPTION']['current_day_short_pnl'] == -5.0
+        assert investments['OPTION']['total_market_value'] == 350.0
+        assert investments['EQUITY']['long_market_value'] == 1900.0
+        assert investments['EQUITY']['current_day_long_pnl'] == 12.5
+        assert investments['EQUITY']['short_market_value'] == -700.0
+        assert investments['CASH_EQUIVALENT']['long_market_value'] == 1000.0
+        assert [p['instrument']['symbol'] for p in investments['EQUITY']['positions']] == ['AAPL', 'XOM']
+        assert all(type(value) is float for details in investments.values() for key, value in details.items()
+                   if key != 'positions')
+
+    def test_no_positions(self):
+        investments = analyze_tda({'securitiesAccount': {'positions': []}})
+        assert investments['OPTION'] == {'positions': [], 'total_market_value': 0.0, 'long_market_value': 0.0,
+                                         'current_day_long_pnl': 0.0, 'short_market_value': 0.0,
+                                         'current_day_short_pnl': 0.0}
+
+    def test_get_positions_frame(self, account):
+        df = get_positions_frame(account['securitiesAccount']['positions'])
+        assert df['instrument_putCall'].tolist()[:2] == ['CALL', 'PUT']
+        assert df['marketValue'].dtype == 'float64'
+        assert get_positions_frame([]).empty
+
 
 class TestAmeritradeUtils(unittest.TestCase):
 
@@ -199,6 +280,37 @@ def test_tda_auth_token_file_not_found():
             tda_auth(api_key='dummy_key', token_path='dummy_path')
 
 
+@pytest.fixture
+def shared_tda_client():
+    reset_tda_client()
+    with patch('tools.ameritrade_helper.get_secret', return_value='{"access_token": "a"}') as mock_get_secret, \
+            patch('tools.ameritrade_helper.put_secret') as mock_put_secret, \
+            patch('tools.ameritrade_helper.auth.client_from_access_functions') as mock_client_factory:
+        yield mock_get_secret, mock_put_secret, mock_client_factory
+    reset_tda_client()
+
+
+def test_get_tda_client_authenticates_once(shared_tda_client):
+    mock_get_secret, _, mock_client_factory = shared_tda_client
+    assert get_tda_client(api_key='key') is get_tda_client(api_key='key')
+    mock_get_secret.assert_called_once()
+    mock_client_factory.assert_called_once()
+    api_key, token_read_func, _ = mock_client_factory.call_args[0]
+    assert api_key == 'key'
+    assert token_read_func() == {'access_token': 'a'}
+
+
+def test_get_tda_client_persists_changed_token_only(shared_tda_client):
+    _, mock_put_secret, mock_client_factory = shared_tda_client
+    get_tda_client(api_key='key')
+    _, token_read_func, token_write_func = mock_client_factory.call_args[0]
+    token_write_func({'access_token': 'a'})
+    mock_put_secret.assert_not_called()
+    token_write_func({'access_token': 'b'})
+    mock_put_secret.assert_called_once_with('AMERITRADE_TOKEN_JSON', '{"access_token": "b"}', region_name='us-east-1')
+    assert token_read_func() == {'access_token': 'b'}
+
+
 # # Test get_quote function
 # def test_get_quote(mock_tda_client):
 #     # Setup mock response
@@ -215,5 +327,6 @@ def test_tda_auth_token_file_not_found():
 #     assert result == {'symbol': 'AAPL', 'price': 100}
 #     mock_tda_client.return_value.get_quote.assert_called_with('AAPL')
 
+
 if __name__ == '__main__':
     unittest.main()
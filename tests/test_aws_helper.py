@@ -0,0 +1,107 @@
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from tools import aws_helper
+from tools.aws_helper import (get_client, get_secret, put_secret, get_parameter, invalidate_cache,
+                              convert_floats_to_decimals)
+
+
+@pytest.fixture
+def mock_boto3_client():
+    aws_helper._clients.clear()
+    invalidate_cache()
+    with patch('tools.aws_helper.boto3.client') as mock_client:
+        mock_client.side_effect = lambda service_name, region_name=None: MagicMock(service_name=service_name)
+        yield mock_client
+    aws_helper._clients.clear()
+    invalidate_cache()
+
+
+def test_get_client_is_shared(mock_boto3_client):
+    assert get_client('ssm') is get_client('ssm')
+    assert get_client('ssm') is not get_client('ssm', region_name='us-west-2')
+    assert mock_boto3_client.call_count == 2
+
+
+def test_get_parameter_is_cached(mock_boto3_client):
+    ssm = get_client('ssm')
+    ssm.get_parameter.return_value = {'Parameter': {'Value': 'a@b.com'}}
+    assert get_parameter('FROM_EMAIL') == 'a@b.com'
+    assert get_parameter('FROM_EMAIL') == 'a@b.com'
+    ssm.get_parameter.assert_called_once_with(Name='FROM_EMAIL', WithDecryption=True)
+    # a zero TTL reads through and refreshes the cached value
+    get_parameter('FROM_EMAIL', ttl_secs=0)
+    get_parameter('FROM_EMAIL')
+    assert ssm.get_parameter.call_count == 2
+
+
+def test_invalidate_cache(mock_boto3_client):
+    ssm = get_client('ssm')
+    ssm.get_parameter.return_value = {'Parameter': {'Value': 'value'}}
+    get_parameter('FROM_EMAIL')
+    get_parameter('TO_EMAILS')
+    invalidate_cache('FROM_EMAIL')
+    get_parameter('FROM_EMAIL')
+    get_parameter('TO_EMAILS')
+    assert ssm.get_parameter.call_count == 3
+
+
+def test_put_secret_updates_cached_secret(mock_boto3_client):
+    secretsmanager = get_client('secretsmanager', region_name='us-east-1')
+    secretsmanager.get_secret_value.return_value = {'SecretString': 'old'}
+    assert get_secret('TOKEN') == 'old'
+    put_secret('TOKEN', 'new')
+    secretsmanager.put_secret_value.assert_called_once_with(SecretId='TOKEN', SecretString='new')
+    assert get_secret('TOKEN') == 'new'
+    secretsmanager.get_secret_value.assert_called_once()
+
+
+def test_convert_floats_to_decimals():
+    assert convert_floats_to_decimals({'a': 1.5, 'b': [0.1, 'x'], 'c': 2}) == {
+        'a': Decimal('1.5'), 'b': [Decimal('0.1'), 'x'], 'c': 2}
+
+
+def test_to_dynamodb_item_matches_recursive_conversion():
+    item = {'symbol': 'AAPL', 'marketValue': 1234.56, 'lots': [{'price': 0.1}, 3], 'flag': True, 'none': None}
+    assert aws_helper.to_dynamodb_item(item) == convert_floats_to_decimals(item)
+
+
+def _mock_table(name='Positions'):
+    table = MagicMock()
+    table.name = name
+    return table
+
+
+def test_batch_put_items_batches_and_retries_unprocessed():
+    table = _mock_table()
+    items = [{'symbol': str(i), 'price': i + 0.5} for i in range(60)]
+    unprocessed = {'Positions': [{'PutRequest': {'Item': {'symbol': '0', 'price': Decimal('0.5')}}}]}
+    table.meta.client.batch_write_item.side_effect = [{'UnprocessedItems': unprocessed}, {}, {}, {}]
+    failures = aws_helper.batch_put_items(table, items, backoff_secs=0)
+    assert failures == []
+    calls = table.meta.client.batch_write_item.call_args_list
+    assert [len(call.kwargs['RequestItems']['Positions']) for call in calls] == [25, 1, 25, 10]
+    assert calls[0].kwargs['RequestItems']['Positions'][0]['PutRequest']['Item'] == {'symbol': '0',
+                                                                                    'price': Decimal('0.5')}
+
+
+def test_batch_put_items_reports_failures():
+    from botocore.exceptions import ClientError
+
+    table = _mock_table()
+    items = [{'symbol': 'A', 'price': 1.0}, {'symbol': 'B', 'price': float('nan')}]
+    table.meta.client.batch_write_item.side_effect = ClientError(
+        {'Error': {'Code': 'ValidationException', 'Message': 'bad'}}, 'BatchWriteItem')
+    table.put_item.side_effect = [None, ValueError('NaN is not supported')]
+    failures = aws_helper.batch_put_items(table, items, backoff_secs=0)
+    assert failures == [{'item': items[1], 'error': 'NaN is not supported'}]
+    assert table.put_item.call_count == 2
+
+    table = _mock_table()
+    table.meta.client.batch_write_item.return_value = {
+        'UnprocessedItems': {'Positions': [{'PutRequest': {'Item': {'symbol': 'A'}}}]}}
+    failures = aws_helper.batch_put_items(table, [{'symbol': 'A'}], max_attempts=3, backoff_secs=0)
+    assert failures == [{'item': {'symbol': 'A'}, 'error': 'Unprocessed after 3 attempts'}]
+    assert table.meta.client.batch_write_item.call_count == 3
@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from tools.backtest_helper import (load_bar_panels, combine_signals, signals_to_positions, backtest_positions,
+                                   compute_performance, backtest_macd_rsi_mfi)
+from tools.bar_store_helper import save_bars
+
+
+@pytest.fixture
+def panels():
+    rng = np.random.default_rng(3)
+    index = pd.bdate_range('2015-01-01', periods=750)
+    close = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0, 0.02, (750, 4)), axis=0)), index=index,
+                         columns=['A', 'B', 'C', 'D'])
+    volume = pd.DataFrame(rng.integers(1_000, 10_000, (750, 4)).astype(float), index=index, columns=close.columns)
+    return {'high': close * 1.01, 'low': close * 0.99, 'close': close, 'volume': volume}
+
+
+def hold_positions(entries, exits):
+    # bar by bar reference of the position state machine
+    held, positions = 0.0, []
+    for entry, exit_ in zip(entries, exits):
+        if exit_:
+            held = 0.0
+        elif entry:
+            held = 1.0
+        positions.append(held)
+    return positions
+
+
+def test_signals_to_positions_matches_loop():
+    rng = np.random.default_rng(0)
+    entries = pd.DataFrame(rng.random((200, 3)) < 0.1)
+    exits = pd.DataFrame(rng.random((200, 3)) < 0.1)
+    positions = signals_to_positions(entries, exits)
+    for column in entries.columns:
+        assert positions[column].tolist() == hold_positions(entries[column], exits[column])
+
+
+def test_combine_signals_rules():
+    macd_hist = np.array([[-1.0, -1.0], [1.0, 1.0], [-1.0, 0.5], [-0.5, 0.5]])
+    rsi = np.array([[50.0, 20.0], [55.0, 25.0], [45.0, 75.0], [45.0, 65.0]])
+    mfi = np.full((4, 2), 50.0)
+    signals = combine_signals(macd_hist, rsi, mfi)
+    assert signals['long_entries'][:, 0].tolist() == [False, True, False, False]
+    assert signals['long_exits'][:, 0].tolist() == [False, False, True, False]
+    assert signals['short_entries'][:, 0].tolist() == [False, False, True, False]
+    # the bullish crossover of the second symbol happens with RSI still oversold, and RSI turning down from
+    # overbought exits
+    assert not signals['long_entries'][:, 1].any()
+    assert signals['long_exits'][:, 1].tolist() == [False, False, False, True]
+    assert signals['short_exits'][:, 1].tolist() == [False, True, True, False]
+    # a crossover valid for two bars lets the RSI confirmation arrive one bar later
+    delayed = combine_signals(macd_hist, rsi, mfi, crossover_bars=2)
+    assert delayed['long_entries'][:, 1].tolist() == [False, False, True, False]
+    assert delayed['short_entries'][:, 0].tolist() == [False, False, True, True]
+
+
+def test_backtest_positions_trades_next_bar():
+    close = pd.DataFrame({'A': [100.0, 110.0, 121.0, 108.9]})
+    positions = pd.DataFrame({'A': [1.0, 1.0, 0.0, 0.0]})
+    returns = backtest_positions(close, positions, cost_per_trade=0.001)
+    np.testing.assert_allclose(returns['A'], [-0.001, 0.1, 0.1 - 0.001, 0.0])
+
+
+def test_compute_performance():
+    returns = pd.DataFrame({'A': [0.1, -0.5, 0.2, 0.0], 'B': [0.0, 0.0, 0.0, 0.0]})
+    positions = pd.DataFrame({'A': [1.0, 1.0, 1.0, 0.0], 'B': [0.0, 0.0, 0.0, 0.0]})
+    performance = compute_performance(returns, positions, periods_per_year=4)
+    assert list(performance.index) == ['A', 'B', 'portfolio']
+    assert performance.loc['A', 'total_return'] == pytest.approx(1.1 * 0.5 * 1.2 - 1)
+    assert performance.loc['A', 'max_drawdown'] == pytest.approx(-0.5)
+    assert performance.loc['A', 'turnover'] == 2
+    assert performance.loc['A', 'trades'] == 1
+    assert performance.loc['A', 'exposure'] == 0.75
+    assert performance.loc['B', 'total_return'] == 0
+    assert np.isnan(performance.loc['B', 'sharpe'])
+    assert performance.loc['portfolio', 'total_return'] == pytest.approx(1.05 * 0.75 * 1.1 - 1)
+
+
+def test_backtest_macd_rsi_mfi(panels):
+    positions, returns, performance = backtest_macd_rsi_mfi(panels, allow_short=True)
+    assert positions.shape == panels['close'].shape
+    assert set(np.unique(positions)) <= {-1.0, 0.0, 1.0}
+    assert (performance.loc[['A', 'B', 'C', 'D'], 'trades'] > 0).all()
+    # stricter thresholds can only remove long entries
+    strict_positions, _, _ = backtest_macd_rsi_mfi(panels, rsi_oversold=45, mfi_oversold=45)
+    long_positions, _, _ = backtest_macd_rsi_mfi(panels)
+    assert (strict_positions.diff() > 0).sum().sum() <= (long_positions.diff() > 0).sum().sum()
+
+
+def test_load_bar_panels(tmp_path):
+    dates = pd.DatetimeIndex(['2023-01-04', '2023-01-03'], name='date')
+    raw = pd.DataFrame({
+        '1. open': [10.0, 9.0], '2. high': [11.0, 10.0], '3. low': [9.0, 8.0], '4. close': [10.0, 9.5],
+        '5. adjusted close': [10.0, 9.5], '6. volume': [100.0, 200.0], '7. dividend amount': [0.0, 0.0],
+        '8. split coefficient': [1.0, 1.0],
+    }, index=dates)
+    save_bars(raw, 'AAA', cache_dir=str(tmp_path))
+    panels = load_bar_panels(['AAA', 'MISSING'], cache_dir=str(tmp_path))
+    assert list(panels['close'].columns) == ['AAA']
+    assert panels['close']['AAA'].tolist() == [9.5, 10.0]
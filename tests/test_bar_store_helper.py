@@ -0,0 +1,99 @@
+import pandas as pd
+import pytest
+from unittest.mock import MagicMock
+
+from tools.bar_store_helper import (get_bar_store_key, load_bars, save_bars, merge_bars, is_cache_current,
+                                    requires_full_refresh, get_daily_adjusted_cached)
+
+
+def make_raw_bars(dates, dividend=0.0, split=1.0):
+    # raw Alpha Vantage frames are ordered newest first
+    dates = pd.DatetimeIndex(dates, name='date').sort_values(ascending=False)
+    n = len(dates)
+    return pd.DataFrame({
+        '1. open': [100.0] * n,
+        '2. high': [102.0] * n,
+        '3. low': [99.0] * n,
+        '4. close': [101.0] * n,
+        '5. adjusted close': [101.0] * n,
+        '6. volume': [1000.0] * n,
+        '7. dividend amount': [dividend] * n,
+        '8. split coefficient': [split] * n,
+    }, index=dates)
+
+
+@pytest.fixture
+def cached_bars():
+    return make_raw_bars(pd.bdate_range('2023-01-02', '2023-06-30'))
+
+
+def test_get_bar_store_key():
+    assert get_bar_store_key('aapl') == 'bars/daily_adjusted/AAPL.parquet'
+
+
+def test_save_and_load_bars(tmp_path, cached_bars):
+    save_bars(cached_bars, 'AAPL', cache_dir=str(tmp_path))
+    loaded = load_bars('AAPL', cache_dir=str(tmp_path))
+    pd.testing.assert_frame_equal(loaded, cached_bars, check_freq=False)
+    assert load_bars('MSFT', cache_dir=str(tmp_path)) is None
+
+
+def test_merge_bars_prefers_latest(cached_bars):
+    latest = make_raw_bars(pd.bdate_range('2023-06-29', '2023-07-05'))
+    latest['4. close'] = 200.0
+    merged = merge_bars(cached_bars, latest)
+    assert merged.index.is_monotonic_decreasing
+    assert not merged.index.has_duplicates
+    assert merged.index[0] == pd.Timestamp('2023-07-05')
+    assert merged.loc['2023-06-30', '4. close'] == 200.0
+    assert merged.loc['2023-06-28', '4. close'] == 101.0
+
+
+def test_is_cache_current(cached_bars):
+    assert is_cache_current(cached_bars, now=pd.Timestamp('2023-07-10'))
+    assert not is_cache_current(cached_bars, now=pd.Timestamp('2024-07-10'))
+    assert not is_cache_current(None)
+
+
+def test_requires_full_refresh_on_gap(cached_bars):
+    latest = make_raw_bars(pd.bdate_range('2023-08-01', '2023-08-10'))
+    assert requires_full_refresh(cached_bars, latest)
+
+
+def test_requires_full_refresh_on_new_dividend(cached_bars):
+    latest = make_raw_bars(pd.bdate_range('2023-06-29', '2023-07-05'))
+    assert not requires_full_refresh(cached_bars, latest)
+    latest.loc['2023-07-05', '7. dividend amount'] = 0.24
+    assert requires_full_refresh(cached_bars, latest)
+    # a dividend the cache already holds does not invalidate it
+    cached_bars.loc['2023-06-30', '7. dividend amount'] = 0.24
+    latest.loc['2023-07-05', '7. dividend amount'] = 0.0
+    latest.loc['2023-06-30', '7. dividend amount'] = 0.24
+    assert not requires_full_refresh(cached_bars, latest)
+
+
+def test_get_daily_adjusted_cached_downloads_full_history_once(tmp_path, cached_bars):
+    time_series = MagicMock()
+    time_series.get_daily_adjusted.return_value = (cached_bars, {})
+
+    data = get_daily_adjusted_cached(time_series, 'AAPL', cache_dir=str(tmp_path))
+
+    time_series.get_daily_adjusted.assert_called_once_with(symbol='AAPL', outputsize='full')
+    assert data.index.is_monotonic_increasing
+    assert 'adjusted_close' not in data.columns
+    assert load_bars('AAPL', cache_dir=str(tmp_path)) is not None
+
+
+def test_get_daily_adjusted_cached_appends_compact_window(tmp_path):
+    today = pd.Timestamp.now().normalize()
+    cached = make_raw_bars(pd.bdate_range(end=today - pd.offsets.BDay(5), periods=300))
+    save_bars(cached, 'AAPL', cache_dir=str(tmp_path))
+    latest = make_raw_bars(pd.bdate_range(end=today, periods=100))
+    time_series = MagicMock()
+    time_series.get_daily_adjusted.return_value = (latest, {})
+
+    data = get_daily_adjusted_cached(time_series, 'AAPL', cache_dir=str(tmp_path))
+
+    time_series.get_daily_adjusted.assert_called_once_with(symbol='AAPL', outputsize='compact')
+    assert data.index[-1] == latest.index.max()
+    assert len(data) == len(cached.index.union(latest.index))
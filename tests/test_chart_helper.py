@@ -0,0 +1,83 @@
+import os
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import pytest
+
+import tools.chart_helper as chart_helper
+from tools.chart_helper import render_chart, render_charts
+from tools.pattern_helper import calculate_ichimoku
+
+
+PARENT_PID = os.getpid()
+
+
+def plot_broken_in_worker(data, fmt='png'):
+    # fails in worker processes only, so a chart rendered again in this process would hide the error
+    if os.getpid() != PARENT_PID:
+        raise OSError('cannot open resource')
+    return b'rendered in the parent'
+
+
+@pytest.fixture(scope='module')
+def ichimoku_df():
+    rng = np.random.default_rng(3)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, 150)))
+    df = pd.DataFrame({'open': close, 'high': close * 1.01, 'low': close * 0.99, 'close': close,
+                       'volume': rng.integers(100_000, 1_000_000, 150).astype(float)},
+                      index=pd.bdate_range('2023-01-02', periods=150))
+    return calculate_ichimoku(df)
+
+
+def test_render_chart_reuses_template(ichimoku_df):
+    png = render_chart('ichimoku', ichimoku_df)
+    figures = plt.get_fignums()
+    assert render_chart('ichimoku', ichimoku_df, bars=50).startswith(b'\x89PNG')
+    assert plt.get_fignums() == figures
+    assert png.startswith(b'\x89PNG')
+    assert b'<svg' in render_chart('rsi', pd.Series(np.linspace(20, 80, 60), index=ichimoku_df.index[:60]),
+                                   fmt='svg')
+    with pytest.raises(ValueError):
+        render_chart('ichimoku', ichimoku_df, fmt='gif')
+    with pytest.raises(ValueError):
+        render_chart('heatmap', ichimoku_df)
+
+
+def no_processes(*args, **kwargs):
+    raise OSError('Function not implemented')
+
+
+def test_render_charts_without_pool(ichimoku_df, monkeypatch):
+    jobs = {'B': ('ichimoku', ichimoku_df), 'A': ('ichimoku', ichimoku_df, {'bars': 30}),
+            'C': ('ichimoku', ichimoku_df)}
+    serial = render_charts(jobs, max_workers=1)
+    # as in AWS Lambda, the pool cannot create its semaphores, so plain processes render the charts
+    monkeypatch.setattr(chart_helper, 'ProcessPoolExecutor', no_processes)
+    charts = render_charts(jobs, max_workers=2)
+    assert list(charts) == ['B', 'A', 'C']
+    assert charts == serial
+    assert charts['A'] != charts['B']
+
+
+def test_render_charts_falls_back_to_serial(ichimoku_df, monkeypatch):
+    monkeypatch.setattr(chart_helper, 'ProcessPoolExecutor', no_processes)
+    monkeypatch.setattr(chart_helper, 'Process', no_processes)
+    charts = render_charts({'B': ('ichimoku', ichimoku_df), 'A': ('ichimoku', ichimoku_df, {'bars': 30})})
+    assert list(charts) == ['B', 'A']
+    assert all(chart.startswith(b'\x89PNG') for chart in charts.values())
+
+
+def test_render_charts_parallel(ichimoku_df):
+    charts = render_charts({'A': ('ichimoku', ichimoku_df), 'B': ('ichimoku', ichimoku_df)}, max_workers=2)
+    assert list(charts) == ['A', 'B']
+    assert charts['A'] == charts['B']
+
+
+@pytest.mark.parametrize('pool', [True, False])
+def test_render_charts_raises_chart_errors(ichimoku_df, monkeypatch, pool):
+    monkeypatch.setitem(chart_helper.CHARTS, 'broken', plot_broken_in_worker)
+    if not pool:
+        monkeypatch.setattr(chart_helper, 'ProcessPoolExecutor', no_processes)
+    with pytest.raises(OSError):
+        render_charts({'A': ('broken', ichimoku_df), 'B': ('broken', ichimoku_df)}, max_workers=2)
@@ -0,0 +1,60 @@
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import Image, PageBreak, Paragraph, SimpleDocTemplate
+
+from src.daily_report.app import build_chart_appendix, select_appendix_underlyings
+from tools.chart_helper import render_charts
+from tools.pattern_helper import calculate_ichimoku
+
+
+def make_option_positions(underlyings):
+    return pd.DataFrame({
+        'instrument_underlyingSymbol': [symbol for symbol, _ in underlyings],
+        'marketValue': [value for _, value in underlyings],
+    })
+
+
+def test_select_appendix_underlyings():
+    df = make_option_positions([('MSFT', 300), ('$SPX.X', 5000), ('AAPL', -900), ('CVX', 100), ('AAPL', 50),
+                                ('XOM', 200)])
+    # index underlyings have no bars; short positions count by their absolute value
+    assert select_appendix_underlyings(df, 10) == ['AAPL', 'CVX', 'MSFT', 'XOM']
+    assert select_appendix_underlyings(df, 2) == ['AAPL', 'MSFT']
+    assert select_appendix_underlyings(pd.DataFrame(), 10) == []
+
+
+def test_build_chart_appendix_one_page_per_underlying():
+    symbols = select_appendix_underlyings(make_option_positions([('$SPX.X', 500), ('MSFT', 300), ('AAPL', 200)]), 20)
+    index = pd.bdate_range('2023-01-02', periods=120)
+    close = pd.Series(100 * np.exp(np.linspace(0, 0.2, 120)), index=index)
+    bars = pd.DataFrame({'open': close, 'high': close * 1.01, 'low': close * 0.99, 'close': close,
+                         'volume': 1000.0})
+    jobs = {}
+    for symbol in symbols:
+        jobs[(symbol, 'ichimoku')] = ('ichimoku', calculate_ichimoku(bars.copy()))
+        jobs[(symbol, 'rsi')] = ('rsi', pd.Series(np.linspace(20, 80, 120), index=index))
+    charts = render_charts(jobs, max_workers=1)
+    styles = getSampleStyleSheet()
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter)
+
+    flowables = build_chart_appendix(charts, styles, doc.width)
+    assert sum(isinstance(flowable, PageBreak) for flowable in flowables) == 2
+    assert [flowable.text for flowable in flowables if isinstance(flowable, Paragraph)] == ['AAPL', 'MSFT']
+    assert sum(isinstance(flowable, Image) for flowable in flowables) == 4
+
+    # the report starts with a title page, and each underlying fills exactly one page after it
+    doc.build([Paragraph('Daily Trading Report', styles['Title'])] + flowables)
+    assert doc.page == 1 + len(symbols)
+
+
+def test_build_chart_appendix_names_omitted_underlyings():
+    styles = getSampleStyleSheet()
+    flowables = build_chart_appendix({}, styles, 400, omitted=['CVX', 'XOM'])
+    assert [flowable.text for flowable in flowables if isinstance(flowable, Paragraph)] == [
+        'Charts not included for 2 underlying(s) with smaller option positions: CVX, XOM']
+    assert build_chart_appendix({}, styles, 400) == []
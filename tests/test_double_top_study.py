@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.studies.double_top.study import run_study, scan_symbol
+from tools.bar_store_helper import save_bars
+
+
+def make_double_top_bars(n=100):
+    # closes rise to 110 at bars 20 and 50 with a trough of 100 at bar 35 between them, then fall away
+    close = np.interp(np.arange(n), [0, 20, 35, 50, n - 1], [95.0, 110.0, 100.0, 110.0, 90.0])
+    dates = pd.bdate_range('2023-01-02', periods=n)
+    bars = pd.DataFrame({
+        '1. open': close - 0.5,
+        '2. high': close + 1.0,
+        '3. low': close - 1.0,
+        '4. close': close,
+        '5. adjusted close': close,
+        '6. volume': 1000.0,
+        '7. dividend amount': 0.0,
+        '8. split coefficient': 1.0,
+    }, index=pd.DatetimeIndex(dates, name='date'))
+    # raw Alpha Vantage frames are ordered newest first
+    return bars.iloc[::-1]
+
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    save_bars(make_double_top_bars(), 'AAA', cache_dir=str(tmp_path))
+    return str(tmp_path)
+
+
+def test_scan_symbol_records_formation_once(cache_dir):
+    hits = scan_symbol('AAA', orders=[2], tolerances=[0.01], lookback=60, step=5, cache_dir=cache_dir)
+    dates = pd.bdate_range('2023-01-02', periods=100)
+    assert len(hits) == 1
+    hit = hits.iloc[0]
+    assert hit['pattern'] == 'double_top'
+    assert hit['direction'] == -1
+    assert hit['touches'] == 2
+    assert hit['level'] == pytest.approx(110.0)
+    assert hit['first_touch_date'] == dates[20]
+    assert hit['last_touch_date'] == dates[50]
+    # the first window ending after the second touch is the one ending on bar 59
+    assert hit['date'] == dates[59]
+
+
+def test_scan_symbol_without_enough_bars(cache_dir):
+    assert scan_symbol('AAA', orders=[2], tolerances=[0.01], lookback=200, cache_dir=cache_dir).empty
+    assert scan_symbol('MISSING', orders=[2], tolerances=[0.01], cache_dir=cache_dir).empty
+
+
+def test_run_study_writes_hits_and_summary(cache_dir, tmp_path):
+    output_dir = str(tmp_path / 'results')
+    summary = run_study(['AAA', 'MISSING'], orders=[2], tolerances=[0.01], output_dir=output_dir, lookback=60,
+                        step=5, horizons=(5, 10), cache_dir=cache_dir, max_workers=1)
+
+    hits = pd.read_csv(f"{output_dir}/hits.csv", parse_dates=['date'])
+    assert len(hits) == 1
+    assert hits.loc[0, 'symbol'] == 'AAA'
+    assert hits.loc[0, 'date'] == pd.Timestamp('2023-03-24')
+    # the price falls after the second top, which is a positive return for a double top
+    assert hits.loc[0, 'return_5d'] > 0
+    assert hits.loc[0, 'return_10d'] > hits.loc[0, 'return_5d']
+
+    written = pd.read_csv(f"{output_dir}/summary.csv")
+    assert list(written['pattern']) == ['double_top']
+    assert len(summary) == 1
+
+
+def test_run_study_without_hits(cache_dir, tmp_path):
+    output_dir = str(tmp_path / 'results')
+    summary = run_study(['MISSING'], orders=[2], tolerances=[0.01], output_dir=output_dir, cache_dir=cache_dir,
+                        max_workers=1)
+    assert summary.empty
+    assert (tmp_path / 'results' / 'hits.csv').exists()
+    assert (tmp_path / 'results' / 'summary.csv').exists()
@@ -0,0 +1,45 @@
+import email
+import time
+from unittest.mock import MagicMock
+
+from botocore.exceptions import ClientError
+
+from tools.email_helper import build_message, create_attachment, send_emails
+
+
+def test_build_message_with_attachment():
+    attachment = create_attachment(b'%PDF-1.4', 'report.pdf')
+    msg = email.message_from_string(build_message('a@b.com', 'c@d.com', 'Report', 'Hello', [attachment]).as_string())
+    assert msg['To'] == 'c@d.com'
+    parts = msg.get_payload()
+    assert parts[0].get_payload() == 'Hello'
+    assert parts[1].get_filename() == 'report.pdf'
+    assert parts[1].get_payload(decode=True) == b'%PDF-1.4'
+
+
+def test_send_emails_reports_each_recipient():
+    ses = MagicMock()
+
+    def send_raw_email(RawMessage, Source, Destinations):
+        if Destinations == ['bad@d.com']:
+            raise ClientError({'Error': {'Code': 'MessageRejected', 'Message': 'rejected'}}, 'SendRawEmail')
+        return {'MessageId': f"id-{Destinations[0]}"}
+
+    ses.send_raw_email.side_effect = send_raw_email
+    statuses = send_emails('a@b.com', ['c@d.com', ' bad@d.com', '', 'c@d.com', 'e@f.com'], 'Report', 'Hello',
+                           attachments=[create_attachment(b'pdf', 'report.pdf')], ses_client=ses,
+                           sends_per_second=1000)
+    assert [status['recipient'] for status in statuses] == ['c@d.com', 'bad@d.com', 'e@f.com']
+    assert statuses[0] == {'recipient': 'c@d.com', 'message_id': 'id-c@d.com', 'error': None}
+    assert statuses[1]['message_id'] is None and 'rejected' in statuses[1]['error']
+    assert ses.send_raw_email.call_count == 3
+
+
+def test_send_emails_respects_send_rate():
+    ses = MagicMock()
+    ses.send_raw_email.return_value = {'MessageId': 'id'}
+    start = time.monotonic()
+    send_emails('a@b.com', ['1@d.com', '2@d.com', '3@d.com'], 'Report', 'Hello', ses_client=ses,
+                sends_per_second=20)
+    # the first send is immediate and the next two are spaced 50 ms apart
+    assert time.monotonic() - start >= 0.09
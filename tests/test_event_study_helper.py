@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from tools.event_study_helper import (build_price_matrix, macd_crossover_events, compute_event_returns,
+                                      summarize_event_returns)
+
+
+@pytest.fixture
+def prices():
+    dates = pd.bdate_range('2023-01-02', periods=6)
+    bars_by_symbol = {
+        'AAA': pd.DataFrame({'close': [100.0, 110.0, 90.0, 120.0, 130.0, 125.0]}, index=dates),
+        'BBB': pd.DataFrame({'close': [50.0, 45.0, 40.0, 55.0, 60.0]}, index=dates[1:]),
+    }
+    return build_price_matrix(bars_by_symbol)
+
+
+def test_build_price_matrix(prices):
+    assert list(prices.columns) == ['AAA', 'BBB']
+    assert prices.index.is_monotonic_increasing
+    assert np.isnan(prices.loc['2023-01-02', 'BBB'])
+
+
+def test_compute_event_returns(prices):
+    events = pd.DataFrame({
+        'symbol': ['AAA', 'BBB', 'AAA', 'XXX'],
+        'date': pd.to_datetime(['2023-01-02', '2023-01-03', '2023-01-05', '2023-01-02']),
+        'direction': [1, -1, 1, 1],
+    })
+    result = compute_event_returns(prices, events, horizons=(1, 3))
+
+    assert result.loc[0, 'return_1d'] == pytest.approx(0.1)
+    assert result.loc[0, 'return_3d'] == pytest.approx(0.2)
+    assert result.loc[0, 'mfe_3d'] == pytest.approx(0.2)
+    assert result.loc[0, 'mae_3d'] == pytest.approx(-0.1)
+    # short event: a fall from 50 to 40 is favorable
+    assert result.loc[1, 'return_3d'] == pytest.approx(-0.1)
+    assert result.loc[1, 'mfe_3d'] == pytest.approx(0.2)
+    assert result.loc[1, 'mae_3d'] == pytest.approx(-0.1)
+    # horizons past the end of the data and unknown symbols are NaN
+    assert result.loc[2, 'return_1d'] == pytest.approx(130 / 120 - 1)
+    assert np.isnan(result.loc[2, 'return_3d'])
+    assert result.loc[3, ['return_1d', 'mfe_1d', 'mae_1d']].isnull().all()
+
+
+def test_macd_crossover_events():
+    macd_hist = pd.DataFrame({'AAA': [-1.0, 1.0, 2.0, -1.0], 'BBB': [1.0, 2.0, 3.0, 4.0]},
+                             index=pd.bdate_range('2023-01-02', periods=4))
+    events = macd_crossover_events(macd_hist)
+    assert list(events['symbol']) == ['AAA', 'AAA']
+    assert list(events['date']) == [pd.Timestamp('2023-01-03'), pd.Timestamp('2023-01-05')]
+    assert list(events['direction']) == [1, -1]
+
+
+def test_summarize_event_returns(prices):
+    events = pd.DataFrame({
+        'symbol': ['AAA', 'BBB', 'AAA'],
+        'date': pd.to_datetime(['2023-01-02', '2023-01-03', '2023-01-03']),
+        'direction': [1, -1, 1],
+        'group': ['a', 'a', 'b'],
+    })
+    event_returns = compute_event_returns(prices, events, horizons=(1,))
+    overall = summarize_event_returns(event_returns, horizons=(1,))
+    assert overall.loc[0, 'events'] == 3
+    assert overall.loc[0, 'hit_rate_1d'] == pytest.approx(2 / 3)
+
+    grouped = summarize_event_returns(event_returns, horizons=(1,), by=['group']).set_index('group')
+    assert grouped.loc['a', 'events'] == 2
+    assert grouped.loc['b', 'hit_rate_1d'] == 0
@@ -1,6 +1,7 @@
 import pandas as pd
 from unittest.mock import Mock, patch
 import pytest
+import tools.finviz_helper as finviz_helper
 from tools.finviz_helper import (
     get_sp500_tickers_sectors,
     get_nasdaq100_tickers_sectors,
@@ -11,7 +12,13 @@ from tools.finviz_helper import (
     verify_subgroup_name,
     get_group_layout,
     get_request,
-    get_screener_layout
+    get_screener_layout,
+    get_screener_cached,
+    get_groups_cached,
+    fetch_screener_pages,
+    load_universe,
+    compact_universe_frame,
+    get_universe
 )
 
 # Mock data to be used across multiple tests
@@ -22,7 +29,7 @@ mocked_screener_data = pd.DataFrame({
 
 @pytest.fixture
 def mock_requests_get():
-    with patch('requests.get') as mock_get:
+    with patch('tools.http_helper.get') as mock_get:
         yield mock_get
 
 @pytest.fixture
@@ -72,5 +79,143 @@ def test_get_request(mock_requests_get):
     get_request(api_token, filters)
     mock_requests_get.assert_called_once_with(f"https://elite.finviz.com/export.ashx?{filters}&auth={api_token}")
 
+SCREENER_CSV = '''"No.","Ticker","Company","Sector"
+1,"AAPL","Apple Inc","Technology"
+2,"MSFT","Microsoft Corporation","Technology"
+3,"XOM","Exxon Mobil Corp","Energy"
+'''
+
+
+@pytest.fixture
+def export_cache(tmp_path):
+    finviz_helper._export_cache.clear()
+    yield str(tmp_path)
+    finviz_helper._export_cache.clear()
+
+
+def test_get_screener_cached_slices_full_export(mock_requests_get, export_cache):
+    mock_requests_get.return_value = Mock(text=SCREENER_CSV)
+    full = get_screener_cached('token', cache_dir=export_cache)
+    subset = get_screener_cached('token', symbols=['XOM', 'AAPL'], cache_dir=export_cache)
+    assert len(full) == 3
+    assert set(subset['Ticker']) == {'AAPL', 'XOM'}
+    assert subset.index.name == 'No.'
+    # the second call is answered from memory
+    assert mock_requests_get.call_count == 1
+    assert '&t=' not in mock_requests_get.call_args[0][0]
+
+
+def test_get_screener_cached_reads_storage_cache(mock_requests_get, export_cache):
+    mock_requests_get.return_value = Mock(text=SCREENER_CSV)
+    get_screener_cached('token', cache_dir=export_cache)
+    finviz_helper._export_cache.clear()  # a new process
+    data = get_screener_cached('token', cache_dir=export_cache)
+    assert mock_requests_get.call_count == 1
+    assert list(data.columns) == ['Ticker', 'Company', 'Sector']
+
+
+def test_get_screener_cached_expires(mock_requests_get, export_cache):
+    mock_requests_get.return_value = Mock(text=SCREENER_CSV)
+    get_screener_cached('token', cache_dir=export_cache)
+    get_screener_cached('token', cache_dir=export_cache, ttl_secs=0)
+    assert mock_requests_get.call_count == 2
+
+
+def test_get_screener_cached_requests_missing_symbols(mock_requests_get, export_cache):
+    mock_requests_get.side_effect = [Mock(text=SCREENER_CSV), Mock(text='"No.","Ticker","Company","Sector"\n'
+                                                                        '1,"SPY","SPDR S&P 500","Financial"\n')]
+    subset = get_screener_cached('token', symbols=['AAPL', 'SPY'], cache_dir=export_cache)
+    assert list(subset['Ticker']) == ['AAPL', 'SPY']
+    assert mock_requests_get.call_args[0][0].startswith('https://elite.finviz.com/export.ashx?v=111&t=SPY&')
+
+
+def test_get_screener_cached_remembers_missing_symbols(mock_requests_get, export_cache):
+    mock_requests_get.side_effect = [Mock(text=SCREENER_CSV), Mock(text='"No.","Ticker","Company","Sector"\n'
+                                                                        '1,"SPY","SPDR S&P 500","Financial"\n')]
+    first = get_screener_cached('token', symbols=['AAPL', 'SPY', '$SPX.X'], cache_dir=export_cache)
+    second = get_screener_cached('token', symbols=['AAPL', 'SPY', '$SPX.X'], cache_dir=export_cache)
+    finviz_helper._export_cache.clear()  # a new process
+    third = get_screener_cached('token', symbols=['SPY', '$SPX.X'], cache_dir=export_cache)
+    # the export and the lookup of SPY and $SPX.X, which Finviz has no row for, are requested once
+    assert mock_requests_get.call_count == 2
+    assert list(first['Ticker']) == list(second['Ticker']) == ['AAPL', 'SPY']
+    assert list(third['Ticker']) == ['SPY']
+    assert third.index.name == 'No.'
+    assert list(third.columns) == ['Ticker', 'Company', 'Sector']
+
+
+def test_get_screener_cached_expires_missing_symbols(mock_requests_get, export_cache):
+    mock_requests_get.return_value = Mock(text=SCREENER_CSV)
+    get_screener_cached('token', symbols=['$SPX.X'], cache_dir=export_cache)
+    get_screener_cached('token', symbols=['$SPX.X'], cache_dir=export_cache, ttl_secs=0)
+    # the export and the lookup are both requested again once they expire
+    assert mock_requests_get.call_count == 4
+
+
+def test_get_groups_cached(mock_requests_get, export_cache):
+    mock_requests_get.return_value = Mock(text='"Name","Stocks"\n"Technology",100\n')
+    groups = get_groups_cached('token', cache_dir=export_cache)
+    get_groups_cached('token', cache_dir=export_cache)
+    assert groups['Name'].tolist() == ['Technology']
+    assert mock_requests_get.call_count == 1
+
+def make_overview_page(tickers):
+    # pyfinviz scrapes every cell as text
+    return pd.DataFrame({
+        'No': [str(i) for i in range(1, len(tickers) + 1)],
+        'Ticker': tickers,
+        'Company': [f"{ticker} Inc" for ticker in tickers],
+        'Sector': ['Technology'] * len(tickers),
+        'Industry': ['Software'] * len(tickers),
+        'Country': ['USA'] * len(tickers),
+        'MarketCap': ['2.85T'] * len(tickers),
+        'PE': ['-'] * len(tickers),
+        'Price': ['10.50'] * len(tickers),
+        'Change': ['-1.25%'] * len(tickers),
+        'Volume': ['1,234,567'] * len(tickers),
+    })
+
+
+def test_compact_universe_frame():
+    data = compact_universe_frame(make_overview_page(['AAPL', 'MSFT']).assign(MarketCap=['2.85T', '950.2M']))
+    assert 'No' not in data.columns
+    assert data['Sector'].dtype == 'category'
+    assert data['MarketCap'].tolist() == [2.85e12, 950.2e6]
+    assert data['PE'].isnull().all()
+    assert data['Change'].tolist() == [-0.0125, -0.0125]
+    assert data['Volume'].tolist() == [1234567, 1234567]
+
+
+def test_fetch_screener_pages_in_page_order():
+    pages = {1: make_overview_page(['AAPL', 'MSFT']), 2: make_overview_page(['XOM'])}
+    with patch('tools.finviz_helper.Screener') as mock_screener:
+        mock_screener.side_effect = lambda filter_options, view_option, pages: Mock(
+            data_frames={pages[0]: make_overview_page(['AAPL', 'MSFT'] if pages[0] == 1 else ['XOM'])})
+        frames = fetch_screener_pages(['DJIA'], [1, 2])
+    assert mock_screener.call_count == 2
+    assert [frame['Ticker'].tolist() for frame in frames] == [pages[1]['Ticker'].tolist(), ['XOM']]
+
+
+def test_load_universe_dedupes_pages():
+    # Finviz repeats the last page past the end of the universe
+    with patch('tools.finviz_helper.fetch_screener_pages',
+               return_value=[make_overview_page(['AAPL', 'MSFT']), make_overview_page(['XOM']),
+                             make_overview_page(['XOM'])]) as mock_fetch:
+        data = load_universe('djia')
+    assert mock_fetch.call_args[0][1] == [1, 2]
+    assert data['Ticker'].tolist() == ['AAPL', 'MSFT', 'XOM']
+
+
+def test_get_universe_reuses_snapshot(tmp_path):
+    with patch('tools.finviz_helper.load_universe', return_value=compact_universe_frame(
+            make_overview_page(['AAPL']))) as mock_load:
+        first = get_universe('djia', as_of='2024-01-05', cache_dir=str(tmp_path))
+        second = get_universe('djia', as_of='2024-01-08', cache_dir=str(tmp_path))
+        get_universe('djia', as_of='2024-01-20', cache_dir=str(tmp_path))
+    assert mock_load.call_count == 2
+    pd.testing.assert_frame_equal(first, second)
+    assert (tmp_path / 'universes' / 'djia' / '20240105.parquet').exists()
+    assert (tmp_path / 'universes' / 'djia' / '20240120.parquet').exists()
+
 # You would also want to test get_screener and get_groups, but these would require more complex mocking
 # to simulate the API responses and handle the sleep_secs argument properly.
@@ -0,0 +1,78 @@
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from unittest.mock import Mock, patch
+
+import pytest
+
+from tools import http_helper
+
+
+@pytest.fixture
+def mock_session():
+    session = Mock()
+    with patch('tools.http_helper.get_session', return_value=session):
+        yield session
+
+
+def test_get_session_is_shared():
+    assert http_helper.get_session() is http_helper.get_session()
+
+
+def test_create_session_retries_transient_statuses():
+    adapter = http_helper.create_session().get_adapter('https://elite.finviz.com')
+    retry = adapter.max_retries
+    assert retry.total == http_helper.MAX_RETRIES
+    assert set(retry.status_forcelist) == {429, 500, 502, 503, 504}
+    assert retry.backoff_factor == http_helper.BACKOFF_FACTOR
+    assert retry.respect_retry_after_header
+
+
+def test_get_uses_host_rate_limit(mock_session):
+    bucket = Mock()
+    with patch('tools.http_helper.get_host_bucket', return_value=bucket) as get_host_bucket:
+        http_helper.get('https://elite.finviz.com/export.ashx?v=111', params={'a': 1})
+    get_host_bucket.assert_called_once_with('elite.finviz.com')
+    bucket.acquire.assert_called_once_with()
+    mock_session.get.assert_called_once_with('https://elite.finviz.com/export.ashx?v=111', params={'a': 1},
+                                             timeout=http_helper.DEFAULT_TIMEOUT)
+
+
+def test_get_host_bucket():
+    assert http_helper.get_host_bucket('example.com') is None
+    bucket = http_helper.get_host_bucket('www.alphavantage.co')
+    assert bucket is http_helper.get_host_bucket('www.alphavantage.co')
+    assert bucket.interval == pytest.approx(60 / 75)
+
+
+@pytest.fixture
+def flaky_server():
+    # answers 429 to the first two requests and 200 afterwards
+    statuses = [429, 429]
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(statuses.pop(0) if statuses else 200)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/query"
+    server.shutdown()
+    server.server_close()
+
+
+def test_get_rate_limits_every_retry(flaky_server):
+    bucket = Mock()
+    session = http_helper.create_session(backoff_factor=0)
+    with patch('tools.http_helper.get_session', return_value=session), \
+            patch('tools.http_helper.get_host_bucket', return_value=bucket) as get_host_bucket:
+        response = http_helper.get(flaky_server)
+    assert response.status_code == 200
+    # one token for the first attempt and one for each of the two retries
+    assert bucket.acquire.call_count == 3
+    assert {call.args[0] for call in get_host_bucket.call_args_list} == {'127.0.0.1'}
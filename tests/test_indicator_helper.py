@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from tools.alpha_vantage_helper import find_last_crossover
+from tools.indicator_helper import (calculate_macd, calculate_rsi, calculate_mfi, calculate_indicators,
+                                    find_last_crossovers, find_rsi_signals)
+
+
+@pytest.fixture
+def bars():
+    rng = np.random.default_rng(0)
+    close = 100 + np.cumsum(rng.normal(0, 1, 300))
+    return pd.DataFrame({
+        'open': close + rng.normal(0, 0.5, 300),
+        'high': close + 1,
+        'low': close - 1,
+        'close': close,
+        'volume': rng.integers(1_000, 10_000, 300).astype(float),
+    }, index=pd.bdate_range('2022-01-03', periods=300))
+
+
+def test_calculate_macd(bars):
+    macd, signal, hist = calculate_macd(bars['close'])
+    assert macd.iloc[:25].isnull().all()
+    assert macd.iloc[25:].notnull().all()
+    np.testing.assert_allclose(hist.dropna(), (macd - signal).dropna())
+
+
+def test_calculate_rsi_bounds(bars):
+    rsi = calculate_rsi(bars['close'])
+    assert rsi.iloc[:14].isnull().all()
+    assert rsi.dropna().between(0, 100).all()
+
+
+def test_calculate_rsi_monotonic_prices():
+    close = pd.Series(np.arange(1.0, 31.0))
+    assert (calculate_rsi(close).dropna() == 100).all()
+    assert (calculate_rsi(close[::-1].reset_index(drop=True)).dropna() == 0).all()
+
+
+def test_calculate_mfi_bounds(bars):
+    mfi = calculate_mfi(bars['high'], bars['low'], bars['close'], bars['volume'])
+    assert mfi.iloc[:14].isnull().all()
+    assert mfi.dropna().between(0, 100).all()
+
+
+def test_indicators_on_wide_panel_match_single_series(bars):
+    panel = pd.DataFrame({'AAA': bars['close'], 'BBB': bars['close'] * 2 + 5})
+    rsi_panel = calculate_rsi(panel)
+    pd.testing.assert_series_equal(rsi_panel['AAA'], calculate_rsi(bars['close']), check_names=False)
+    _, _, hist_panel = calculate_macd(panel)
+    _, _, hist = calculate_macd(panel['BBB'])
+    pd.testing.assert_series_equal(hist_panel['BBB'], hist, check_names=False)
+
+
+def test_calculate_indicators_columns(bars):
+    indicators = calculate_indicators(bars)
+    assert list(indicators.columns) == ['MACD', 'MACD_Signal', 'MACD_Hist', 'RSI', 'MFI']
+    assert indicators.index.equals(bars.index)
+
+
+def scan_rsi_signal(rsi, oversold_threshold=30, overbought_threshold=70):
+    # row by row reference of the scan previously done in daily_report
+    reversed_rsi = rsi.loc[::-1]
+    current_rsi = reversed_rsi.iloc[0]
+    if oversold_threshold <= current_rsi <= overbought_threshold:
+        for index, value in reversed_rsi.items():
+            if value > overbought_threshold:
+                return 'overbought', index
+            elif value < oversold_threshold:
+                return 'oversold', index
+        return None, reversed_rsi.index[0]
+    elif current_rsi < oversold_threshold:
+        return 'oversold', reversed_rsi.index[0]
+    return 'overbought', reversed_rsi.index[0]
+
+
+@pytest.fixture
+def close_panel():
+    rng = np.random.default_rng(1)
+    return pd.DataFrame(100 + np.cumsum(rng.normal(0, 1, (500, 6)), axis=0),
+                        index=pd.bdate_range('2020-01-01', periods=500),
+                        columns=['A', 'B', 'C', 'D', 'E', 'F'])
+
+
+def test_find_last_crossovers_matches_find_last_crossover(close_panel):
+    _, _, hist = calculate_macd(close_panel)
+    hist['F'] = 1.0  # never crosses
+    crossovers = find_last_crossovers(hist)
+    for symbol in ['A', 'B', 'C', 'D', 'E']:
+        expected = find_last_crossover(hist[[symbol]].rename(columns={symbol: 'MACD_Hist'}).loc[::-1])
+        assert crossovers[symbol] == expected
+    assert pd.isnull(crossovers['F'])
+
+
+def test_find_rsi_signals_matches_scan(close_panel):
+    rsi = calculate_rsi(close_panel)
+    rsi['E'] = 50.0  # never breaches
+    rsi.iloc[-1, rsi.columns.get_loc('F')] = 10.0  # currently oversold
+    signals = find_rsi_signals(rsi)
+    for symbol in rsi.columns:
+        signal, signal_date = scan_rsi_signal(rsi[symbol])
+        assert signals.loc[symbol, 'signal'] == signal
+        assert signals.loc[symbol, 'signal_date'] == signal_date
+        assert signals.loc[symbol, 'rsi'] == rsi[symbol].iloc[-1]
+
+
+def test_find_rsi_signals_series():
+    rsi = pd.Series([50, 75, 60, 55], index=pd.bdate_range('2023-01-02', periods=4), name='AAPL')
+    signals = find_rsi_signals(rsi)
+    assert signals.loc['AAPL', 'signal'] == 'overbought'
+    assert signals.loc['AAPL', 'signal_date'] == pd.Timestamp('2023-01-03')
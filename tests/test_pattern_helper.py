@@ -1,7 +1,8 @@
 import pandas as pd
 import numpy as np
 import pytest
-from tools.pattern_helper import calculate_ichimoku, identify_multi_tops, identify_multi_bottoms
+from tools.pattern_helper import (calculate_ichimoku, calculate_ichimoku_panel, identify_cloud_breakouts,
+                                  identify_multi_tops, identify_multi_bottoms, IchimokuState, MultiExtremaState)
 
 
 # Test data for calculate_ichimoku
@@ -61,3 +62,97 @@ def test_identify_multi_bottoms_with_bottoms(tops_and_bottoms_data):
     touches, support_value = identify_multi_bottoms(tops_and_bottoms_data, tolerance=0.1, order=1)
     assert touches is not None
     assert support_value is not None
+
+
+def calculate_ichimoku_rolling(df):
+    # pandas rolling reference of the Ichimoku components
+    df = df.copy()
+    df['tenkan_sen'] = (df['high'].rolling(window=9).max() + df['low'].rolling(window=9).min()) / 2
+    df['kijun_sen'] = (df['high'].rolling(window=26).max() + df['low'].rolling(window=26).min()) / 2
+    df['senkou_span_a'] = ((df['tenkan_sen'] + df['kijun_sen']) / 2).shift(26)
+    df['senkou_span_b'] = ((df['high'].rolling(window=52).max() + df['low'].rolling(window=52).min()) / 2).shift(26)
+    df['chikou_span'] = df['close'].shift(-26)
+    return df
+
+
+@pytest.fixture
+def ohlc_panel():
+    rng = np.random.default_rng(7)
+    frames = []
+    for symbol in ['AAA', 'BBB', 'CCC']:
+        close = 100 + np.cumsum(rng.normal(0, 1, 200))
+        frames.append(pd.DataFrame({
+            'symbol': symbol,
+            'date': pd.bdate_range('2023-01-02', periods=200),
+            'high': close + rng.random(200),
+            'low': close - rng.random(200),
+            'close': close,
+        }))
+    return pd.concat(frames).set_index(['symbol', 'date'])
+
+
+def test_calculate_ichimoku_matches_rolling(ichimoku_data):
+    expected = calculate_ichimoku_rolling(ichimoku_data)
+    ichimoku_data.loc[40, 'high'] = np.nan
+    expected_missing = calculate_ichimoku_rolling(ichimoku_data)
+    pd.testing.assert_frame_equal(calculate_ichimoku(ichimoku_data.copy()), expected_missing)
+    assert not expected.equals(expected_missing)
+
+
+def test_calculate_ichimoku_panel_matches_single_symbol(ohlc_panel):
+    result = calculate_ichimoku_panel(ohlc_panel)
+    assert result.index.equals(ohlc_panel.index)
+    for symbol in ['AAA', 'BBB', 'CCC']:
+        expected = calculate_ichimoku_rolling(ohlc_panel.loc[symbol])
+        pd.testing.assert_frame_equal(result.loc[symbol], expected)
+
+
+def test_identify_cloud_breakouts(ohlc_panel):
+    ichimoku_panel = calculate_ichimoku_panel(ohlc_panel)
+    ichimoku_panel.loc[('AAA', ichimoku_panel.loc['AAA'].index[-2]), 'close'] = 0
+    ichimoku_panel.loc[('AAA', ichimoku_panel.loc['AAA'].index[-1]), 'close'] = 1_000
+    ichimoku_panel.loc[('BBB', ichimoku_panel.loc['BBB'].index[-2]), 'close'] = 1_000
+    ichimoku_panel.loc[('BBB', ichimoku_panel.loc['BBB'].index[-1]), 'close'] = 0
+    ichimoku_panel.loc[('CCC', ichimoku_panel.loc['CCC'].index[-2]), 'close'] = 1_000
+    ichimoku_panel.loc[('CCC', ichimoku_panel.loc['CCC'].index[-1]), 'close'] = 1_000
+
+    breakouts = identify_cloud_breakouts(ichimoku_panel)
+    assert breakouts.loc['AAA', 'breakout'] == 'bullish'
+    assert breakouts.loc['BBB', 'breakout'] == 'bearish'
+    assert breakouts.loc['CCC', 'breakout'] is None
+    assert (breakouts['date'] == pd.Timestamp(ohlc_panel.index.get_level_values(1).max())).all()
+
+
+# Tests for the incremental state
+def test_ichimoku_state_matches_calculate_ichimoku(ichimoku_data):
+    expected = calculate_ichimoku(ichimoku_data.copy())
+    state = IchimokuState()
+    rows = pd.DataFrame([state.update(row.high, row.low, row.close) for row in ichimoku_data.itertuples()])
+    for column in ['tenkan_sen', 'kijun_sen', 'senkou_span_a', 'senkou_span_b']:
+        np.testing.assert_allclose(rows[column], expected[column])
+    assert IchimokuState.from_frame(ichimoku_data).count == len(ichimoku_data)
+
+
+@pytest.mark.parametrize('order, tolerance', [(1, 0.005), (1, 0.1), (2, 0.02), (3, 0.05)])
+def test_multi_extrema_state_matches_batch(order, tolerance):
+    rng = np.random.default_rng(order)
+    close = np.round(100 + np.cumsum(rng.normal(0, 1, 120)), 1)
+    data = pd.DataFrame({'close': close, 'open': np.round(close + rng.normal(0, 0.5, 120), 1)})
+
+    state = MultiExtremaState(tolerance=tolerance, order=order)
+    for i, row in enumerate(data.itertuples()):
+        state.update(row.open, row.close)
+        history = data.iloc[:i + 1]
+        for expected, actual in ((identify_multi_tops(history, tolerance, order), state.multi_tops()),
+                                 (identify_multi_bottoms(history, tolerance, order), state.multi_bottoms())):
+            if expected[0] is None:
+                assert actual == (None, None)
+            else:
+                assert actual[0] == list(expected[0])
+                assert actual[1] == expected[1]
+
+
+def test_multi_extrema_state_from_frame(tops_and_bottoms_data):
+    state = MultiExtremaState.from_frame(tops_and_bottoms_data, tolerance=0.1, order=1)
+    touches, resistance_value = identify_multi_tops(tops_and_bottoms_data, tolerance=0.1, order=1)
+    assert state.multi_tops() == (list(touches), resistance_value)
@@ -0,0 +1,91 @@
+from unittest.mock import MagicMock
+
+import pandas as pd
+import pytest
+
+from tools import portfolio_history_helper
+from tools.portfolio_history_helper import (query_range, query_days, get_liquidation_value_history,
+                                            get_position_pnl_history)
+
+
+def _item(**fields):
+    return {key: {'N': str(value)} if isinstance(value, (int, float)) else {'S': value}
+            for key, value in fields.items()}
+
+
+class FakeDynamoDB:
+    def __init__(self, items):
+        self.items = items
+        self.calls = []
+
+    def query(self, TableName, ExpressionAttributeNames, ExpressionAttributeValues, **kwargs):
+        key_name = ExpressionAttributeNames['#key']
+        values = {name: value['S'] for name, value in ExpressionAttributeValues.items()}
+        self.calls.append((TableName, values[':key'], values[':start'], values[':end']))
+        return {'Items': [_item(**item) for item in self.items[TableName]
+                          if item[key_name] == values[':key'] and
+                          values[':start'] <= item['storedTimestamp'] <= values[':end']]}
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    portfolio_history_helper.clear_history_cache()
+    yield
+    portfolio_history_helper.clear_history_cache()
+
+
+def test_query_range_follows_pages():
+    client = MagicMock()
+    client.query.side_effect = [
+        {'Items': [_item(symbol='AAPL', storedTimestamp='2023-11-01T21:15:00', marketValue=1.5)],
+         'LastEvaluatedKey': {'symbol': {'S': 'AAPL'}}},
+        {'Items': [_item(symbol='AAPL', storedTimestamp='2023-11-02T21:15:00', marketValue=2)]},
+    ]
+    records = query_range('Positions', 'symbol', 'AAPL', '2023-11-01', '2023-11-02T~', dynamodb_client=client)
+    assert [record['marketValue'] for record in records] == [1.5, 2.0]
+    assert client.query.call_args_list[1].kwargs['ExclusiveStartKey'] == {'symbol': {'S': 'AAPL'}}
+
+
+def test_query_days_only_queries_days_not_cached():
+    client = FakeDynamoDB({'CurrentBalances': [
+        {'accountId': '1', 'storedTimestamp': '2023-11-01T21:15:00', 'liquidationValue': 100},
+        {'accountId': '1', 'storedTimestamp': '2023-11-03T21:15:00', 'liquidationValue': 110},
+    ]})
+    records = query_days('CurrentBalances', 'accountId', '1', '2023-11-01', '2023-11-03', today='2023-11-03',
+                         dynamodb_client=client)
+    assert len(records) == 2
+    # the first two days are complete and cached, today is queried again
+    records = query_days('CurrentBalances', 'accountId', '1', '2023-10-31', '2023-11-03', today='2023-11-03',
+                         dynamodb_client=client)
+    assert len(records) == 2
+    assert client.calls[1:] == [('CurrentBalances', '1', '2023-10-31', '2023-11-03T~')]
+    query_days('CurrentBalances', 'accountId', '1', '2023-10-31', '2023-11-02', today='2023-11-03',
+               dynamodb_client=client)
+    assert len(client.calls) == 2
+
+
+def test_get_liquidation_value_history_keeps_last_snapshot_per_day():
+    client = FakeDynamoDB({'CurrentBalances': [
+        {'accountId': '1', 'storedTimestamp': '2023-11-01T15:00:00', 'liquidationValue': 90},
+        {'accountId': '1', 'storedTimestamp': '2023-11-01T21:15:00', 'liquidationValue': 100},
+        {'accountId': '1', 'storedTimestamp': '2023-11-02T21:15:00', 'liquidationValue': 105},
+    ]})
+    history = get_liquidation_value_history('1', days=5, as_of='2023-11-03', dynamodb_client=client)
+    assert history.to_dict() == {pd.Timestamp('2023-11-01'): 100.0, pd.Timestamp('2023-11-02'): 105.0}
+    assert get_liquidation_value_history('2', days=5, as_of='2023-11-03', dynamodb_client=client).empty
+
+
+def test_get_position_pnl_history():
+    client = FakeDynamoDB({'Positions': [
+        {'symbol': 'AAPL', 'accountId': '1', 'storedTimestamp': '2023-11-01T21:15:00', 'currentDayProfitLoss': 5},
+        {'symbol': 'AAPL', 'accountId': '1', 'storedTimestamp': '2023-11-02T21:15:00', 'currentDayProfitLoss': -2},
+        {'symbol': 'SPY', 'accountId': '1', 'storedTimestamp': '2023-11-02T21:15:00', 'currentDayProfitLoss': 7},
+        {'symbol': 'SPY', 'accountId': '2', 'storedTimestamp': '2023-11-02T21:15:01', 'currentDayProfitLoss': 1},
+    ]})
+    pnl = get_position_pnl_history(['AAPL', 'SPY', 'AAPL'], days=3, as_of='2023-11-02', dynamodb_client=client)
+    assert list(pnl.columns) == ['AAPL', 'SPY']
+    assert pnl.loc['2023-11-02'].tolist() == [-2.0, 8.0]
+    assert pd.isna(pnl.loc['2023-11-01', 'SPY'])
+    pnl = get_position_pnl_history(['SPY'], days=3, account_id='1', as_of='2023-11-02', dynamodb_client=client)
+    assert pnl['SPY'].tolist() == [7.0]
+    assert len([call for call in client.calls if call[1] == 'AAPL']) == 1
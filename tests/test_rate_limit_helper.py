@@ -0,0 +1,93 @@
+import threading
+import time
+
+import pytest
+
+from tools.rate_limit_helper import TokenBucket, RateLimitedClient, fetch_concurrently
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def test_token_bucket_spaces_calls():
+    clock = FakeClock()
+    bucket = TokenBucket(60, per=60.0, clock=clock, sleep=clock.sleep)
+    waits = [bucket.acquire() for _ in range(4)]
+    assert waits == [0.0, 1.0, 1.0, 1.0]
+    assert clock.now == 3.0
+
+
+def test_token_bucket_refills_up_to_capacity():
+    clock = FakeClock()
+    bucket = TokenBucket(60, per=60.0, capacity=3, clock=clock, sleep=clock.sleep)
+    clock.now = 100.0
+    assert [bucket.acquire() for _ in range(4)] == [0.0, 0.0, 0.0, 1.0]
+
+
+def test_token_bucket_invalid_rate():
+    with pytest.raises(ValueError):
+        TokenBucket(0)
+
+
+def test_token_bucket_limits_threads():
+    bucket = TokenBucket(100, per=1.0)
+    start = time.monotonic()
+    threads = [threading.Thread(target=bucket.acquire) for _ in range(11)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # the first call is free and the other ten are spaced 10 ms apart
+    assert time.monotonic() - start >= 0.09
+
+
+def test_rate_limited_client():
+    class Client:
+        name = 'client'
+
+        def get(self, value):
+            return value * 2
+
+    acquired = []
+
+    class Bucket:
+        def acquire(self):
+            acquired.append(True)
+
+    client = RateLimitedClient(Client(), Bucket())
+    assert client.get(2) == 4
+    assert client.name == 'client'
+    assert len(acquired) == 1
+
+
+def test_fetch_concurrently_dedupes_and_keeps_order():
+    calls = []
+
+    def fetch(key):
+        calls.append(key)
+        time.sleep(0.05)
+        return key.lower()
+
+    start = time.monotonic()
+    results = fetch_concurrently(fetch, ['B', 'A', 'B', 'C'])
+    assert list(results.items()) == [('B', 'b'), ('A', 'a'), ('C', 'c')]
+    assert sorted(calls) == ['A', 'B', 'C']
+    # latencies overlap instead of adding up
+    assert time.monotonic() - start < 0.14
+    assert fetch_concurrently(fetch, []) == {}
+
+
+def test_fetch_concurrently_raises():
+    def fetch(key):
+        raise ValueError(key)
+
+    with pytest.raises(ValueError):
+        fetch_concurrently(fetch, ['A'])
@@ -0,0 +1,40 @@
+import pytest
+
+from tools.snapshot_helper import get_snapshot_key, snapshot_frame, write_snapshot, load_snapshots
+
+
+def test_get_snapshot_key():
+    assert get_snapshot_key('positions', '123', '2023-11-20T21:15:00.123456') == \
+        'snapshots/positions/date=2023-11-20/account_id=123/20231120T211500.parquet'
+
+
+def test_snapshot_frame_stores_integers_as_floats():
+    df = snapshot_frame([{'symbol': 'AAPL', 'longQuantity': 100, 'marketValue': 18950.5}])
+    assert df['longQuantity'].dtype == 'float64'
+    assert df['symbol'].tolist() == ['AAPL']
+
+
+def test_load_snapshots_filters_partitions(tmp_path):
+    cache_dir = str(tmp_path)
+    write_snapshot([{'symbol': 'AAPL', 'longQuantity': 100}], 'positions', '1', '2023-11-01T21:15:00',
+                   cache_dir=cache_dir)
+    write_snapshot([{'symbol': 'AAPL', 'longQuantity': 110}, {'symbol': 'SPY', 'longQuantity': 5,
+                                                             'putCall': 'CALL'}],
+                   'positions', '1', '2023-11-20T21:15:00', cache_dir=cache_dir)
+    write_snapshot([{'symbol': 'MSFT', 'longQuantity': 7}], 'positions', '2', '2023-11-20T21:15:00',
+                   cache_dir=cache_dir)
+
+    df = load_snapshots('positions', days=7, account_id='1', as_of='2023-11-21', cache_dir=cache_dir)
+    assert df['symbol'].tolist() == ['AAPL', 'SPY']
+    assert df['longQuantity'].tolist() == [110.0, 5.0]
+    assert set(df['date']) == {'2023-11-20'} and set(df['account_id']) == {'1'}
+
+    df = load_snapshots('positions', days=30, as_of='2023-11-21', columns=['symbol', 'putCall'], cache_dir=cache_dir)
+    assert sorted(df['symbol']) == ['AAPL', 'AAPL', 'MSFT', 'SPY']
+    assert set(df.columns) == {'symbol', 'putCall', 'date', 'account_id'}
+    assert df['putCall'].isna().sum() == 3
+
+    assert load_snapshots('positions', days=7, as_of='2023-10-01', cache_dir=cache_dir).empty
+    assert load_snapshots('balances', cache_dir=cache_dir).empty
+    with pytest.raises(ValueError):
+        load_snapshots('positions')
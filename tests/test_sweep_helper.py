@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import tools.backtest_helper as backtest_helper
+from tools.backtest_helper import backtest_macd_rsi_mfi
+from tools.sweep_helper import IndicatorCache, expand_grid, evaluate_parameters, rank_results, sweep_strategy_parameters
+
+
+@pytest.fixture
+def panels():
+    rng = np.random.default_rng(5)
+    index = pd.bdate_range('2016-01-01', periods=500)
+    close = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0, 0.02, (500, 3)), axis=0)), index=index,
+                         columns=['A', 'B', 'C'])
+    volume = pd.DataFrame(rng.integers(1_000, 10_000, (500, 3)).astype(float), index=index, columns=close.columns)
+    return {'high': close * 1.01, 'low': close * 0.99, 'close': close, 'volume': volume}
+
+
+def test_expand_grid():
+    parameter_sets = expand_grid({'rsi_oversold': [25, 30], 'rsi_period': [10, 14]})
+    assert len(parameter_sets) == 4
+    assert [(p['rsi_period'], p['rsi_oversold']) for p in parameter_sets] == [(10, 25), (10, 30), (14, 25), (14, 30)]
+    assert all(p['rsi_overbought'] == 70 and p['crossover_bars'] == 1 for p in parameter_sets)
+    with pytest.raises(ValueError):
+        expand_grid({'rsi_threshold': [30]})
+
+
+def test_indicator_cache_reuses_arrays(panels, monkeypatch):
+    calls = []
+    calculate_macd = backtest_helper.calculate_macd
+    monkeypatch.setattr(backtest_helper, 'calculate_macd', lambda *args: calls.append(args) or calculate_macd(*args))
+    cache = IndicatorCache(panels)
+    for parameters in expand_grid({'rsi_oversold': [25, 30, 35], 'rsi_period': [10, 14]}):
+        evaluate_parameters(cache, parameters)
+    assert len(calls) == 1
+
+
+def test_evaluate_parameters_matches_backtest(panels):
+    parameters = expand_grid({'rsi_oversold': [35], 'crossover_bars': [3]})[0]
+    result = evaluate_parameters(IndicatorCache(panels), parameters, allow_short=True)
+    _, _, performance = backtest_macd_rsi_mfi(panels, allow_short=True, rsi_oversold=35, crossover_bars=3)
+    assert result['rsi_oversold'] == 35
+    assert result['sharpe'] == pytest.approx(performance.loc['portfolio', 'sharpe'])
+    assert result['trades'] == performance.loc['portfolio', 'trades']
+
+
+def test_rank_results():
+    results = pd.DataFrame({'name': ['a', 'b', 'c'], 'sharpe': [0.5, np.nan, 1.0]})
+    ranked = rank_results(results, 'sharpe')
+    assert ranked['name'].tolist() == ['c', 'a', 'b']
+    assert ranked['rank'].tolist() == [1, 2, 3]
+
+
+def test_sweep_strategy_parameters_parallel_matches_serial(panels):
+    grid = {'rsi_oversold': [25, 35], 'crossover_bars': [1, 5]}
+    serial = sweep_strategy_parameters(panels, grid, max_workers=1)
+    parallel = sweep_strategy_parameters(panels, grid, max_workers=2)
+    assert len(serial) == 4
+    assert serial['sharpe'].is_monotonic_decreasing
+    pd.testing.assert_frame_equal(serial, parallel)
@@ -0,0 +1,71 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+from telegram.error import RetryAfter
+
+from tools.telegram_helper import TelegramSender, run_async, split_message
+
+
+@pytest.fixture
+def sender():
+    waits = []
+
+    async def sleep(seconds):
+        waits.append(seconds)
+
+    bot = AsyncMock()
+    bot.send_media_group.side_effect = lambda chat_id, media: [f"{chat_id}-photo"] * len(media)
+    sender = TelegramSender('token', bot=bot, sleep=sleep)
+    sender.waits = waits
+    return sender
+
+
+def test_split_message():
+    assert split_message('short') == ['short']
+    assert split_message('') == ['']
+    assert split_message('aaaa\nbbbb\ncc', max_length=9) == ['aaaa\nbbbb', 'cc']
+    assert split_message('abcdefgh', max_length=3) == ['abc', 'def', 'gh']
+
+
+def test_run_async_reuses_loop():
+    async def get_loop():
+        return asyncio.get_running_loop()
+
+    assert run_async(get_loop()) is run_async(get_loop())
+
+
+def test_send_message_splits_and_initializes_once(sender):
+    run_async(sender.send_message(1, 'a' * 5000))
+    run_async(sender.send_message(1, 'b'))
+    assert sender.bot.send_message.await_count == 3
+    sender.bot.initialize.assert_awaited_once()
+
+
+def test_per_chat_rate_limit(sender):
+    for _ in range(5):
+        run_async(sender.send_photo(1, b'png'))
+    run_async(sender.send_photo(2, b'png'))
+    # three photos burst through and the next two wait for the chat's bucket; the other chat is only spaced by the
+    # global limit
+    assert [wait for wait in sender.waits if wait > 0.5] == pytest.approx([1.0, 2.0], abs=0.1)
+
+
+def test_retry_after(sender):
+    sender.bot.send_message.side_effect = [RetryAfter(2), 'sent']
+    assert run_async(sender.send_message(1, 'hello')) == ['sent']
+    assert sender.waits[0] == 2
+    assert sender.bot.send_message.await_count == 2
+
+
+def test_flush_groups_photos(sender):
+    sender.queue_message(1, 'charts')
+    for _ in range(12):
+        sender.queue_photo(1, b'png')
+    sender.queue_photo(2, b'png')
+    sender.queue_message(1, 'done')
+    run_async(sender.flush())
+    # chat 1 gets its twelve photos as groups of ten and two, chat 2 its single photo on its own
+    assert [len(call.kwargs['media']) for call in sender.bot.send_media_group.await_args_list] == [10, 2]
+    assert sender.bot.send_photo.await_args.kwargs['chat_id'] == 2
+    assert [call.kwargs['text'] for call in sender.bot.send_message.await_args_list] == ['charts', 'done']
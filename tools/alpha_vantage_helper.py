@@ -1,3 +1,6 @@
+import numpy as np
+
+
 def get_daily_adjusted_processed(data):
     """
     Processes the given DataFrame by reversing its order and adjusting the financial data
@@ -41,24 +44,20 @@ def find_last_crossover(df):
     """
         Finds the last crossover point in a given DataFrame based on the MACD Histogram (MACD_Hist) values.
 
-        The function iterates through the DataFrame and checks for a crossover, identified when
-        the product of MACD_Hist values for consecutive rows is less than or equal to zero.
-        Once a crossover is found, the function returns the date of the last crossover.
+        A crossover is identified when the product of MACD_Hist values for consecutive rows is less than or equal to
+        zero. The products of all consecutive pairs are computed in one vectorized step and the first (most recent)
+        crossover is returned.
 
         Args:
-            df (DataFrame): The DataFrame containing financial data with a column named 'MACD_Hist'.
+            df (DataFrame): The DataFrame containing financial data with a column named 'MACD_Hist', ordered with the
+                            most recent row first.
 
         Returns:
             last_crossover_date (datetime or None): The date of the last crossover, or None if no crossover is found.
         """
-    last_crossover_date = None
-    trend = None
-    for idx in range(len(df) - 1):
-        current_row = df.iloc[idx]
-        previous_row = df.iloc[idx + 1]
-        # Check for crossover. Identify touch as crossover (MACD_Hist = 0)
-        if current_row['MACD_Hist'] * previous_row['MACD_Hist'] <= 0:
-            last_crossover_date = current_row.name
-            break  # Exit the loop once a crossover is found
-
-    return last_crossover_date
+    macd_hist = df['MACD_Hist'].to_numpy(dtype=float)
+    # Identify touch as crossover (MACD_Hist = 0)
+    crossovers = np.flatnonzero(macd_hist[:-1] * macd_hist[1:] <= 0)
+    if len(crossovers) == 0:
+        return None
+    return df.index[crossovers[0]]
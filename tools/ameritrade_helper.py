@@ -4,19 +4,31 @@ import json
 import logging
 import os
 import re
-import tempfile
+import threading
 
 # Related third-party imports
-import boto3
 import pandas as pd
 import requests
 from tda import auth, client, orders
 # from selenium import webdriver
 
 # Local application/library specific imports
-from tools.aws_helper import get_secret
+from tools.aws_helper import get_secret, put_secret
 from tools.requests_helper import json_from_response
 
+TOKEN_SECRET_NAME = "AMERITRADE_TOKEN_JSON"
+POSITION_NUMERIC_FIELDS = ('averagePrice', 'currentDayCost', 'currentDayProfitLoss', 'currentDayProfitLossPercentage',
+                           'longQuantity', 'marketValue', 'settledLongQuantity', 'settledShortQuantity',
+                           'shortQuantity')
+EXPIRATION_SUMMARY_GROUPS = ('expiration_date', 'underlying', 'expiration_week')
+POSITION_SUMMARY_FIELDS = ('total_market_value', 'long_market_value', 'current_day_long_pnl', 'short_market_value',
+                           'current_day_short_pnl')
+
+# client shared by every call in the container, created by get_tda_client
+_tda_client = None
+_tda_client_lock = threading.Lock()
+# the token as last read from or written to Secrets Manager
+_persisted_token = {'value': None}
 
 
 def tda_auth(api_key,
@@ -207,124 +219,162 @@ def place_order(account_id, symbol):
     # assert r.status_code == httpx.codes.OK, r.raise_for_status()
 
 
+def get_positions_frame(positions):
+    """
+    Normalizes account positions into a DataFrame with one row per position.
+
+    Nested instrument fields are flattened with '_' (e.g. 'instrument_putCall') and the quantity, price, value and
+    P&L fields are numeric.
+
+    Args:
+        positions (list of dict): The positions of a TD Ameritrade account.
+
+    Returns:
+        DataFrame: The normalized positions.
+    """
+    df = pd.json_normalize(positions, sep='_')
+    numeric_fields = [field for field in POSITION_NUMERIC_FIELDS if field in df.columns]
+    df[numeric_fields] = df[numeric_fields].apply(pd.to_numeric, errors='coerce')
+    return df
+
+
+def summarize_positions(df):
+    """
+    Computes the market value and current day P&L aggregates of every asset type in one grouped pass.
+
+    Options are long when they are calls and short when they are puts; every other asset type is long or short
+    according to its long and short quantities.
+
+    Args:
+        df (DataFrame): The positions as returned by `get_positions_frame`.
+
+    Returns:
+        DataFrame: The aggregates in `POSITION_SUMMARY_FIELDS`, indexed by asset type.
+    """
+    if df.empty:
+        return pd.DataFrame(columns=list(POSITION_SUMMARY_FIELDS), dtype='float64')
+
+    asset_type = df['instrument_assetType']
+    is_option = asset_type == 'OPTION'
+    put_call = _get_column(df, 'instrument_putCall')
+    is_long = (put_call == 'CALL').where(is_option, _get_column(df, 'longQuantity').fillna(0) > 0).astype(bool)
+    is_short = (put_call == 'PUT').where(is_option, _get_column(df, 'shortQuantity').fillna(0) > 0).astype(bool)
+    market_value = _get_column(df, 'marketValue').fillna(0).astype('float64')
+    pnl = _get_column(df, 'currentDayProfitLoss').fillna(0).astype('float64')
+
+    parts = pd.DataFrame({
+        'asset_type': asset_type,
+        'total_market_value': market_value,
+        'long_market_value': market_value.where(is_long, 0.0),
+        'current_day_long_pnl': pnl.where(is_long, 0.0),
+        'short_market_value': market_value.where(is_short, 0.0),
+        'current_day_short_pnl': pnl.where(is_short, 0.0),
+    })
+    return parts.groupby('asset_type', sort=False).sum()
+
+
 def analyze_tda(account):
+    """
+    Groups the positions of an account by asset type and aggregates their market value and current day P&L.
+
+    'OPTION' and 'EQUITY' are always present; other asset types, such as mutual funds or cash equivalents, get an
+    entry when the account holds them.
+
+    Args:
+        account (dict): The account as returned by `get_specified_account`, with positions.
+
+    Returns:
+        dict: For every asset type, its 'positions' and the aggregates in `POSITION_SUMMARY_FIELDS`.
+    """
+    positions = account['securitiesAccount'].get('positions', [])
+    summary = summarize_positions(get_positions_frame(positions))
+
     investments = {
         'OPTION': {'positions': []},
         'EQUITY': {'positions': []},
-        # 'CASH': {'positions': []}
     }
+    for position in positions:
+        investments.setdefault(position['instrument']['assetType'], {'positions': []})['positions'].append(position)
 
-    # sort investments
-    for investment in account['securitiesAccount']['positions']:
-        asset_type = investment['instrument']['assetType']
-        if asset_type in ['OPTION', 'EQUITY']:
-            investments[asset_type]['positions'].append(investment)
-        else:
-            raise Exception(f"Unknown asset type {asset_type}")
-
-    # analyze investments
     for asset_type, details in investments.items():
-        total_market_value = sum([investment['marketValue'] for investment in details['positions']])
-
-        if asset_type == 'OPTION':
-            long_market_value = sum(
-                [investment['marketValue'] for investment in details['positions'] if
-                 investment['instrument']['putCall'] == 'CALL'])
-            current_day_long_pnl = sum(
-                [investment['currentDayProfitLoss'] for investment in details['positions'] if
-                 investment['instrument']['putCall'] == 'CALL'])
-            short_market_value = sum(
-                [investment['marketValue'] for investment in details['positions'] if
-                 investment['instrument']['putCall'] == 'PUT'])
-            current_day_short_pnl = sum(
-                [investment['currentDayProfitLoss'] for investment in details['positions'] if
-                 investment['instrument']['putCall'] == 'PUT'])
-        elif asset_type == 'EQUITY':
-            long_market_value = sum(
-                [investment['marketValue'] for investment in details['positions'] if investment['longQuantity'] > 0])
-            current_day_long_pnl = sum(
-                [investment['currentDayProfitLoss'] for investment in details['positions'] if
-                 investment['longQuantity'] > 0])
-            short_market_value = sum(
-                [investment['marketValue'] for investment in details['positions'] if investment['shortQuantity'] > 0])
-            current_day_short_pnl = sum(
-                [investment['currentDayProfitLoss'] for investment in details['positions'] if
-                 investment['shortQuantity'] > 0])
-        # elif asset_type == "CASH":
-        #     pass
-        else:
-            raise Exception(f"Unknown asset type {asset_type}")
-
-        investments[asset_type]['total_market_value'] = total_market_value
-        investments[asset_type]['long_market_value'] = long_market_value
-        investments[asset_type]['current_day_long_pnl'] = current_day_long_pnl
-        investments[asset_type]['short_market_value'] = short_market_value
-        investments[asset_type]['current_day_short_pnl'] = current_day_short_pnl
+        for field in POSITION_SUMMARY_FIELDS:
+            # plain floats keep the analysis JSON serializable
+            details[field] = float(summary.at[asset_type, field]) if asset_type in summary.index else 0.0
     return investments
 
 
-def get_specified_account_with_aws():
-    secret_name = "AMERITRADE_TOKEN_JSON"
-    token_dict, temp_file_path = load_token(secret_name)
-
-    # get api keys
-    tda_api_key = os.environ['TDA_API_KEY']
-    tda_account_id = os.environ['TDA_ACCOUNT_ID']
-    # Now you have a temporary file holding your token.
-    # Call the function with the path to this temporary file
-    account = get_specified_account(account_id=tda_account_id,
-                                    api_key=tda_api_key,
-                                    chrome_driver_path=None,
-                                    token_path=temp_file_path)
+def _get_column(df, column):
+    return df[column] if column in df.columns else pd.Series(None, index=df.index, dtype='object')
 
-    cleanup_token(temp_file_path, secret_name, token_dict)
 
-    return account
+def get_tda_client(api_key=None, secret_name=TOKEN_SECRET_NAME, region_name="us-east-1"):
+    """
+    Retrieves the TD Ameritrade client shared by every call in this container.
 
+    The first call reads the token from Secrets Manager and builds the client with `auth.client_from_access_functions`,
+    so no token file is written. Later calls, including those of later invocations of a warm Lambda container, reuse
+    the client. The client refreshes its access token when it expires and renews the refresh token before it lapses;
+    each refreshed token is written back to Secrets Manager, and nothing is written otherwise.
 
-def get_quotes_with_aws(symbols):
-    secret_name = "AMERITRADE_TOKEN_JSON"
-    token_dict, temp_file_path = load_token(secret_name)
+    Args:
+        api_key (str, optional): The API key for TD Ameritrade. Defaults to the 'TDA_API_KEY' environment variable.
+        secret_name (str, optional): The secret holding the token JSON. Defaults to 'AMERITRADE_TOKEN_JSON'.
+        region_name (str, optional): The region of the secret. Defaults to 'us-east-1'.
 
-    # get api keys
-    tda_api_key = os.environ['TDA_API_KEY']
+    Returns:
+        Client: An authenticated TD Ameritrade client.
+    """
+    global _tda_client
+    with _tda_client_lock:
+        if _tda_client is None:
+            token = json.loads(get_secret(secret_name, region_name=region_name))
+            _persisted_token['value'] = token
+            _tda_client = auth.client_from_access_functions(
+                api_key or os.environ['TDA_API_KEY'],
+                lambda: _persisted_token['value'],
+                lambda updated_token, *args, **kwargs: save_token_if_changed(updated_token, secret_name, region_name))
+        return _tda_client
+
+
+def save_token_if_changed(token, secret_name=TOKEN_SECRET_NAME, region_name="us-east-1"):
+    """
+    Writes a token to Secrets Manager unless it equals the last token read or written.
 
-    # Now you have a temporary file holding your token.
-    # Call the function with the path to this temporary file
-    quotes = get_quotes(
-        symbols,
-        api_key=tda_api_key,
-        token_path=temp_file_path)
+    Args:
+        token (dict): The token, as passed to the token write function of `auth.client_from_access_functions`.
+        secret_name (str, optional): The secret holding the token JSON. Defaults to 'AMERITRADE_TOKEN_JSON'.
+        region_name (str, optional): The region of the secret. Defaults to 'us-east-1'.
 
-    cleanup_token(temp_file_path, secret_name, token_dict)
+    Returns:
+        bool: True if the token was written.
+    """
+    if token == _persisted_token['value']:
+        return False
+    put_secret(secret_name, json.dumps(token), region_name=region_name)
+    _persisted_token['value'] = token
+    return True
 
-    return quotes
 
+def reset_tda_client():
+    """
+    Drops the shared TD Ameritrade client, so the next call authenticates again from Secrets Manager.
 
-def load_token(secret_name, region_name="us-east-1"):
-    secret_str = get_secret(secret_name, region_name=region_name)
-    token_dict = json.loads(secret_str)
+    Returns:
+        None
+    """
+    global _tda_client
+    with _tda_client_lock:
+        _tda_client = None
+        _persisted_token['value'] = None
 
-    # Create a temporary file to hold the token
-    with tempfile.NamedTemporaryFile(delete=False) as temp:
-        temp_file_path = temp.name
-        temp.write(json.dumps(token_dict).encode())
-    return token_dict, temp_file_path
 
+def get_specified_account_with_aws():
+    tda_account_id = os.environ['TDA_ACCOUNT_ID']
+    return get_specified_account(account_id=tda_account_id, tda_auth_func=get_tda_client)
 
-def cleanup_token(temp_file_path, secret_name, token_dict):
-    # If the function updates the token, save it back to AWS Secrets Manager
-    with open(temp_file_path, 'r') as temp:
-        updated_token_dict = json.load(temp)
-        if updated_token_dict != token_dict:
-            boto3_client = boto3.client('secretsmanager')
-            boto3_client.put_secret_value(
-                SecretId=secret_name,
-                SecretString=json.dumps(updated_token_dict)
-            )
 
-    # Ensure to delete the temporary file after use
-    os.unlink(temp_file_path)
+def get_quotes_with_aws(symbols):
+    return get_quotes_with_client(get_tda_client(), symbols)
 
 
 def get_date_from_contract_details(text: str):
@@ -347,53 +397,71 @@ def get_date_from_contract_details(text: str):
         # Parse the date string into a datetime object
         extracted_date = datetime.strptime(date_str, '%m%d%y')
     else:
-        raise "No date found in the string."
+        raise ValueError("No date found in the string.")
 
     return extracted_date
 
 
-def get_expiration_date_summary(df):
+def get_expiration_date_summary(df, by='expiration_date'):
     """
     Aggregates option contract data in a DataFrame by their expiration dates.
 
-    This function adds an 'expiration_date' column to the DataFrame by extracting dates from contract descriptions.
-    It then groups the data by expiration dates and calculates the total market value, percentage of call market value,
-    total count of contracts, and percentage of call contracts.
+    The expiration date and underlying are parsed from the contract symbols (e.g. 'CVX_111723C145') with one
+    vectorized extraction, and the call masks are summed with the market values in a single groupby. The data can
+    also be grouped by underlying or by expiration week. The input DataFrame is not modified.
 
     Args:
-        df (DataFrame): A pandas DataFrame containing option contract data, including a column 'instrument_description'
-                        with contract descriptions.
+        df (DataFrame): A pandas DataFrame containing option contract data, including the columns
+                        'instrument_symbol', 'marketValue' and 'instrument_putCall'.
+        by (str, optional): The grouping, one of `EXPIRATION_SUMMARY_GROUPS`: 'expiration_date', 'underlying' or
+                            'expiration_week' (the Monday of the expiration week). Defaults to 'expiration_date'.
 
     Returns:
-        DataFrame: A summarized DataFrame grouped by expiration dates with aggregated contract data.
+        DataFrame: A summarized DataFrame with the `by` column, the total market value ('marketValue_sum'), the
+                   share of call market value ('call_mark_perc'), the number of contracts
+                   ('instrument_putCall_count') and the share of call contracts ('call_vol_perc').
+
+    Raises:
+        ValueError: If a contract symbol has no valid expiration date, so that its market value is never left out of
+                    the totals.
     """
+    if by not in EXPIRATION_SUMMARY_GROUPS:
+        raise ValueError(f"by must be one of {EXPIRATION_SUMMARY_GROUPS}, got {by!r}")
 
     # Check if the DataFrame is empty
     if df.empty:
         # Create and return an empty DataFrame with the expected structure
-        return pd.DataFrame(columns=['expiration_date', 'marketValue_sum', 'marketValue_call_percentage',
-                                     'instrument_putCall_count', 'instrument_putCall_call_percentage'])
-
-    df['instrument_symbol'] = df['instrument_symbol'].fillna('XXX_010100U000')
-    df['marketValue'] = df['marketValue'].fillna(0)
-
-    df['expiration_date'] = df['instrument_symbol'].apply(get_date_from_contract_details)
-    # Group by 'expiration_date' and aggregate
-    result = df.groupby('expiration_date').agg({
-        'marketValue': ['sum',
-                        lambda x: df.loc[x.index, 'marketValue'][
-                                      df.loc[x.index, 'instrument_putCall'] == 'CALL'].sum() / x.sum()
-                        ],
-        'instrument_putCall': ['count', lambda x: (x == 'CALL').sum() / len(x)]
-    })
-
-    # Rename the custom aggregation column for clarity
-    result.columns = ['_'.join(col).strip() for col in result.columns.values]
-    result.rename(columns={
-        'marketValue_<lambda_0>': 'call_mark_perc',
-        'instrument_putCall_<lambda_0>': 'call_vol_perc'}, inplace=True)
+        return pd.DataFrame(columns=[by, 'marketValue_sum', 'call_mark_perc', 'instrument_putCall_count',
+                                     'call_vol_perc'])
+
+    contract = df['instrument_symbol'].fillna('XXX_010100U000').str.extract(r'^([^_]*)_(\d{6})')
+    if contract[1].isna().any():
+        malformed = df.loc[contract[1].isna(), 'instrument_symbol'].tolist()
+        raise ValueError(f"No date found in the contract symbols {malformed}")
+    expiration_date = pd.to_datetime(contract[1], format='%m%d%y', errors='raise')
+    if by == 'expiration_date':
+        key = expiration_date
+    elif by == 'expiration_week':
+        key = expiration_date - pd.to_timedelta(expiration_date.dt.dayofweek, unit='D')
+    else:
+        key = contract[0]
+
+    market_value = df['marketValue'].fillna(0)
+    is_call = df['instrument_putCall'] == 'CALL'
+    result = pd.DataFrame({
+        by: key,
+        'marketValue_sum': market_value,
+        'call_market_value': market_value.where(is_call, 0),
+        'instrument_putCall_count': df['instrument_putCall'].notna(),
+        'call_count': is_call,
+        'contract_count': 1,
+    }).groupby(by).sum()
+
+    result['call_mark_perc'] = result['call_market_value'] / result['marketValue_sum']
+    result['call_vol_perc'] = result['call_count'] / result['contract_count']
+    result = result[['marketValue_sum', 'call_mark_perc', 'instrument_putCall_count', 'call_vol_perc']]
     result.reset_index(drop=False, inplace=True)
-    result['expiration_date'] = result['expiration_date'].dt.date
+    if by != 'underlying':
+        result[by] = result[by].dt.date
 
     return result
-
@@ -2,33 +2,120 @@
 # If you need more information about configurations
 # or implementing the sample code, visit the AWS docs:
 # https://aws.amazon.com/developer/language/python/
+import json
+import threading
+import time
 from decimal import Decimal
 
 import boto3
 from botocore.exceptions import ClientError
 
+# secrets and parameters are reused for this long in a warm container
+DEFAULT_CACHE_TTL_SECS = 300
+# the most items a single batch_write_item call accepts
+DYNAMODB_BATCH_SIZE = 25
 
-def get_secret(secret_name, region_name="us-east-1"):
-    # Create a Secrets Manager client
-    session = boto3.session.Session()
-    client = session.client(
-        service_name='secretsmanager',
-        region_name=region_name
-    )
+_clients = {}
+_values = {}
+_cache_lock = threading.Lock()
 
-    try:
-        get_secret_value_response = client.get_secret_value(
-            SecretId=secret_name
-        )
-    except ClientError as e:
-        # For a list of exceptions thrown, see
-        # https://docs.aws.amazon.com/secretsmanager/latest/apireference/API_GetSecretValue.html
-        raise e
 
-    # Decrypts secret using the associated KMS key.
-    secret = get_secret_value_response['SecretString']
+def get_client(service_name, region_name=None):
+    """
+    Retrieves a boto3 client shared by every call in this container.
 
-    return secret
+    boto3 clients are thread-safe but slow to create, so one client per service and region is created on first use
+    and reused by later calls and later invocations of a warm Lambda container.
+
+    Args:
+        service_name (str): The AWS service, e.g. 'ssm'.
+        region_name (str, optional): The region. Defaults to None (the region of the environment).
+
+    Returns:
+        The boto3 client.
+    """
+    key = (service_name, region_name)
+    with _cache_lock:
+        if key not in _clients:
+            _clients[key] = boto3.client(service_name, region_name=region_name)
+        return _clients[key]
+
+
+def get_secret(secret_name, region_name="us-east-1", ttl_secs=DEFAULT_CACHE_TTL_SECS):
+    """
+    Retrieves the value of a secret from Secrets Manager, cached for `ttl_secs`.
+
+    Args:
+        secret_name (str): The name of the secret.
+        region_name (str, optional): The region of the secret. Defaults to 'us-east-1'.
+        ttl_secs (float, optional): The maximum age of a cached value, 0 to always read it. Defaults to 300.
+
+    Returns:
+        str: The secret string.
+    """
+    return _get_cached(('secret', secret_name, region_name), ttl_secs, lambda: get_client(
+        'secretsmanager', region_name=region_name).get_secret_value(SecretId=secret_name)['SecretString'])
+
+
+def put_secret(secret_name, secret_string, region_name="us-east-1"):
+    """
+    Stores a new value of a secret in Secrets Manager and updates the cached value.
+
+    Args:
+        secret_name (str): The name of the secret.
+        secret_string (str): The new secret value.
+        region_name (str, optional): The region of the secret. Defaults to 'us-east-1'.
+
+    Returns:
+        None
+    """
+    get_client('secretsmanager', region_name=region_name).put_secret_value(SecretId=secret_name,
+                                                                           SecretString=secret_string)
+    with _cache_lock:
+        _values[('secret', secret_name, region_name)] = (time.monotonic(), secret_string)
+
+
+def get_parameter(name, with_decryption=True, region_name=None, ttl_secs=DEFAULT_CACHE_TTL_SECS):
+    """
+    Retrieves the value of a Systems Manager parameter, cached for `ttl_secs`.
+
+    Args:
+        name (str): The name of the parameter, e.g. 'FROM_EMAIL'.
+        with_decryption (bool, optional): Whether to decrypt a SecureString. Defaults to True.
+        region_name (str, optional): The region. Defaults to None (the region of the environment).
+        ttl_secs (float, optional): The maximum age of a cached value, 0 to always read it. Defaults to 300.
+
+    Returns:
+        str: The parameter value.
+    """
+    return _get_cached(('parameter', name, region_name), ttl_secs, lambda: get_client(
+        'ssm', region_name=region_name).get_parameter(Name=name, WithDecryption=with_decryption)['Parameter']['Value'])
+
+
+def invalidate_cache(name=None):
+    """
+    Drops cached secret and parameter values, so the next read goes to AWS.
+
+    Args:
+        name (str, optional): The secret or parameter to drop. Defaults to None (everything).
+
+    Returns:
+        None
+    """
+    with _cache_lock:
+        for key in [key for key in _values if name is None or key[1] == name]:
+            del _values[key]
+
+
+def _get_cached(key, ttl_secs, fetch):
+    now = time.monotonic()
+    with _cache_lock:
+        if key in _values and now - _values[key][0] < ttl_secs:
+            return _values[key][1]
+    value = fetch()
+    with _cache_lock:
+        _values[key] = (now, value)
+    return value
 
 
 def convert_floats_to_decimals(obj):
@@ -44,6 +131,22 @@ def convert_floats_to_decimals(obj):
     return obj
 
 
+def to_dynamodb_item(obj):
+    """
+    Converts a JSON-like dictionary into a DynamoDB item in one pass.
+
+    The object is serialized once and parsed back with every float read as a Decimal, which converts nested values
+    in C instead of walking them in Python. The result equals `convert_floats_to_decimals(obj)`.
+
+    Args:
+        obj (dict): A dictionary of JSON types.
+
+    Returns:
+        dict: The item with Decimal numbers in place of floats.
+    """
+    return json.loads(json.dumps(obj), parse_float=Decimal)
+
+
 def safe_put_item(table, item):
     """
     Store the position in DynamoDB
@@ -53,10 +156,62 @@ def safe_put_item(table, item):
         item: dictionary
 
     Returns:
-        None
+        dict or None: The failure as {'item': item, 'error': message}, or None if the item was stored.
     """
     try:
-        item = convert_floats_to_decimals(item)
-        table.put_item(Item=item)
+        table.put_item(Item=to_dynamodb_item(item))
     except Exception as e:
-        print(f"Error storing position {item.get('symbol', 'UNKNOWN')}: {e}")
\ No newline at end of file
+        return {'item': item, 'error': str(e)}
+    return None
+
+
+def batch_put_items(table, items, max_attempts=5, backoff_secs=0.1):
+    """
+    Stores items in a DynamoDB table with batched writes.
+
+    Items are converted with `to_dynamodb_item` and sent 25 per `batch_write_item` call. Unprocessed items returned
+    by DynamoDB are retried with exponential backoff. When a whole batch is rejected, for instance because one item
+    is invalid, its items are written one by one so that only the invalid items fail.
+
+    Args:
+        table: The boto3 DynamoDB Table resource.
+        items (list of dict): The items to store.
+        max_attempts (int, optional): The number of attempts for unprocessed items. Defaults to 5.
+        backoff_secs (float, optional): The wait before the first retry, doubled on every retry. Defaults to 0.1.
+
+    Returns:
+        list of dict: One {'item': item, 'error': message} entry per item that could not be stored.
+    """
+    failures = []
+    converted = []
+    for item in items:
+        try:
+            converted.append((item, to_dynamodb_item(item)))
+        except (TypeError, ValueError) as e:
+            failures.append({'item': item, 'error': str(e)})
+
+    # the resource's client accepts and returns plain Python values
+    client = table.meta.client
+    for start in range(0, len(converted), DYNAMODB_BATCH_SIZE):
+        batch = converted[start:start + DYNAMODB_BATCH_SIZE]
+        failures.extend(_write_batch(client, table, batch, max_attempts, backoff_secs))
+    return failures
+
+
+def _write_batch(client, table, batch, max_attempts, backoff_secs):
+    pending = [dynamodb_item for _, dynamodb_item in batch]
+    for attempt in range(max_attempts):
+        try:
+            response = client.batch_write_item(
+                RequestItems={table.name: [{'PutRequest': {'Item': item}} for item in pending]})
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') != 'ValidationException':
+                raise
+            return [failure for item, _ in batch for failure in [safe_put_item(table, item)] if failure]
+        pending = [request['PutRequest']['Item']
+                   for request in response.get('UnprocessedItems', {}).get(table.name, [])]
+        if not pending:
+            return []
+        if attempt < max_attempts - 1:
+            time.sleep(backoff_secs * 2 ** attempt)
+    return [{'item': item, 'error': 'Unprocessed after {} attempts'.format(max_attempts)} for item in pending]
@@ -0,0 +1,303 @@
+import numpy as np
+import pandas as pd
+
+from tools.alpha_vantage_helper import get_daily_adjusted_processed
+from tools.bar_store_helper import DEFAULT_BAR_STORE_DIR, load_bars
+from tools.indicator_helper import calculate_macd, calculate_mfi, calculate_rsi
+
+BAR_FIELDS = ['open', 'high', 'low', 'close', 'volume']
+TRADING_DAYS_PER_YEAR = 252
+
+
+def load_bar_panels(symbols, cache_dir=DEFAULT_BAR_STORE_DIR, bucket_name=None, s3_client=None):
+    """
+    Loads the cached daily bars of many symbols into one date x symbol panel per field.
+
+    Symbols missing from the bar store are skipped.
+
+    Args:
+        symbols (list of str): The ticker symbols.
+        cache_dir (str, optional): The local directory of the bar store. Defaults to '/tmp/bars'.
+        bucket_name (str, optional): The S3 bucket backing the bar store. Defaults to None (local only).
+        s3_client (optional): A boto3 S3 client. Defaults to None.
+
+    Returns:
+        dict: 'open', 'high', 'low', 'close' and 'volume' DataFrames indexed by date (oldest first) with one column per
+              symbol; NaN where a symbol has no bar.
+    """
+    bars_by_symbol = {}
+    for symbol in symbols:
+        raw_bars = load_bars(symbol, cache_dir=cache_dir, bucket_name=bucket_name, s3_client=s3_client)
+        if raw_bars is not None:
+            bars_by_symbol[symbol] = get_daily_adjusted_processed(raw_bars)
+    return {field: pd.DataFrame({symbol: bars[field] for symbol, bars in bars_by_symbol.items()}).sort_index()
+            for field in BAR_FIELDS}
+
+
+class IndicatorCache:
+    """
+    Memoizes the indicator arrays of a bar panel by period.
+
+    Each indicator is keyed only by the periods it depends on, so a sweep that varies a threshold or the RSI period
+    reuses the MACD arrays that were already computed. `panels` holds the 'high', 'low', 'close' and 'volume'
+    panels ordered oldest first, such as the output of `load_bar_panels`.
+    """
+
+    def __init__(self, panels):
+        self.panels = panels
+        self._arrays = {}
+
+    def macd_hist(self, fast_period=12, slow_period=26, signal_period=9):
+        """
+        Returns the MACD histogram of the close panel.
+
+        Args:
+            fast_period (int, optional): The MACD fast period. Defaults to 12.
+            slow_period (int, optional): The MACD slow period. Defaults to 26.
+            signal_period (int, optional): The MACD signal period. Defaults to 9.
+
+        Returns:
+            ndarray: The histogram values, dates x symbols.
+        """
+        return self._get(('macd_hist', fast_period, slow_period, signal_period),
+                         lambda: calculate_macd(self.panels['close'], fast_period, slow_period, signal_period)[2])
+
+    def rsi(self, time_period=14):
+        """
+        Returns the RSI of the close panel.
+
+        Args:
+            time_period (int, optional): The RSI period. Defaults to 14.
+
+        Returns:
+            ndarray: The RSI values, dates x symbols.
+        """
+        return self._get(('rsi', time_period), lambda: calculate_rsi(self.panels['close'], time_period))
+
+    def mfi(self, time_period=14):
+        """
+        Returns the MFI of the bar panels.
+
+        Args:
+            time_period (int, optional): The MFI period. Defaults to 14.
+
+        Returns:
+            ndarray: The MFI values, dates x symbols.
+        """
+        return self._get(('mfi', time_period),
+                         lambda: calculate_mfi(self.panels['high'], self.panels['low'], self.panels['close'],
+                                               self.panels['volume'], time_period))
+
+    def _get(self, key, compute):
+        if key not in self._arrays:
+            self._arrays[key] = compute().to_numpy(dtype=float)
+        return self._arrays[key]
+
+
+def macd_rsi_mfi_signals(panels, rsi_oversold=30, rsi_overbought=70, mfi_oversold=20, mfi_overbought=80,
+                         crossover_bars=1, fast_period=12, slow_period=26, signal_period=9, rsi_period=14,
+                         mfi_period=14, indicators=None):
+    """
+    Turns the combined MACD, RSI and MFI rules of `res/combined_strategies/macd_rsi_mfi.md` into signal panels.
+
+    Long entries follow the "Buy Call" rule (bullish MACD crossover with RSI above its oversold level and MFI above
+    its oversold level) and short entries the "Buy Put" rule. A position is closed by the opposite MACD crossover or
+    when RSI or MFI turns back from the extreme that works against it (crossing below the overbought level for longs,
+    above the oversold level for shorts). Divergences are not modelled.
+
+    Args:
+        panels (dict): 'high', 'low', 'close' and 'volume' panels ordered oldest first, such as the output of
+                       `load_bar_panels`.
+        rsi_oversold (float, optional): The RSI oversold level. Defaults to 30.
+        rsi_overbought (float, optional): The RSI overbought level. Defaults to 70.
+        mfi_oversold (float, optional): The MFI oversold level. Defaults to 20.
+        mfi_overbought (float, optional): The MFI overbought level. Defaults to 80.
+        crossover_bars (int, optional): The number of bars a MACD crossover stays valid for an entry. Defaults to 1
+                                        (the crossover bar only).
+        fast_period (int, optional): The MACD fast period. Defaults to 12.
+        slow_period (int, optional): The MACD slow period. Defaults to 26.
+        signal_period (int, optional): The MACD signal period. Defaults to 9.
+        rsi_period (int, optional): The RSI period. Defaults to 14.
+        mfi_period (int, optional): The MFI period. Defaults to 14.
+        indicators (IndicatorCache, optional): The indicator cache of `panels`, reused across calls. Defaults to None
+                                               (the indicators are computed for this call).
+
+    Returns:
+        dict: Boolean DataFrames shaped like the close panel under 'long_entries', 'long_exits', 'short_entries'
+              and 'short_exits'.
+    """
+    if indicators is None:
+        indicators = IndicatorCache(panels)
+    signals = combine_signals(indicators.macd_hist(fast_period, slow_period, signal_period),
+                              indicators.rsi(rsi_period), indicators.mfi(mfi_period),
+                              rsi_oversold=rsi_oversold, rsi_overbought=rsi_overbought, mfi_oversold=mfi_oversold,
+                              mfi_overbought=mfi_overbought, crossover_bars=crossover_bars)
+    close = panels['close']
+    return {name: pd.DataFrame(values, index=close.index, columns=close.columns) for name, values in signals.items()}
+
+
+def combine_signals(macd_hist, rsi, mfi, rsi_oversold=30, rsi_overbought=70, mfi_oversold=20, mfi_overbought=80,
+                    crossover_bars=1):
+    """
+    Applies the combined strategy rules to precomputed indicator arrays.
+
+    Args:
+        macd_hist (ndarray): MACD histogram values ordered oldest first with one column per symbol.
+        rsi (ndarray): RSI values shaped like `macd_hist`.
+        mfi (ndarray): MFI values shaped like `macd_hist`.
+        rsi_oversold (float, optional): The RSI oversold level. Defaults to 30.
+        rsi_overbought (float, optional): The RSI overbought level. Defaults to 70.
+        mfi_oversold (float, optional): The MFI oversold level. Defaults to 20.
+        mfi_overbought (float, optional): The MFI overbought level. Defaults to 80.
+        crossover_bars (int, optional): The number of bars a MACD crossover stays valid for an entry. Defaults to 1.
+
+    Returns:
+        dict: Boolean arrays under 'long_entries', 'long_exits', 'short_entries' and 'short_exits'.
+    """
+    previous_hist = _previous(macd_hist)
+    previous_rsi = _previous(rsi)
+    previous_mfi = _previous(mfi)
+
+    bullish_crossover = (previous_hist <= 0) & (macd_hist > 0)
+    bearish_crossover = (previous_hist >= 0) & (macd_hist < 0)
+    # comparisons with NaN are False, so bars without indicator history never trigger
+    turning_down = (((previous_rsi > rsi_overbought) & (rsi <= rsi_overbought))
+                    | ((previous_mfi > mfi_overbought) & (mfi <= mfi_overbought)))
+    turning_up = (((previous_rsi < rsi_oversold) & (rsi >= rsi_oversold))
+                  | ((previous_mfi < mfi_oversold) & (mfi >= mfi_oversold)))
+
+    return {
+        'long_entries': (_recent(bullish_crossover, crossover_bars) & (rsi > rsi_oversold)
+                         & (mfi > mfi_oversold)),
+        'long_exits': bearish_crossover | turning_down,
+        'short_entries': (_recent(bearish_crossover, crossover_bars) & (rsi < rsi_overbought)
+                          & (mfi < mfi_overbought)),
+        'short_exits': bullish_crossover | turning_up,
+    }
+
+
+def signals_to_positions(entries, exits):
+    """
+    Converts entry and exit signals into a position held after each bar.
+
+    A position opens on an entry and is held until the next exit. When both fire on the same bar the exit wins.
+
+    Args:
+        entries (DataFrame): Boolean entry signals ordered oldest first with one column per symbol.
+        exits (DataFrame): Boolean exit signals shaped like `entries`.
+
+    Returns:
+        DataFrame: 1.0 while a position is held and 0.0 otherwise, shaped like `entries`.
+    """
+    state = np.where(exits.to_numpy(dtype=bool), 0.0,
+                     np.where(entries.to_numpy(dtype=bool), 1.0, np.nan))
+    return pd.DataFrame(state, index=entries.index, columns=entries.columns).ffill().fillna(0.0)
+
+
+def backtest_positions(close, positions, cost_per_trade=0.0005):
+    """
+    Simulates the daily returns of holding positions in every symbol of a panel.
+
+    Positions are decided on the close of a bar and earn the return of the following bar, so a signal never trades
+    on the price that produced it. Trading costs are charged as a fraction of the traded notional whenever the
+    position changes.
+
+    Args:
+        close (DataFrame): Closing prices ordered oldest first with one column per symbol.
+        positions (DataFrame): The position held after each bar (e.g. 1 long, -1 short, 0 flat), shaped like `close`.
+        cost_per_trade (float, optional): The cost per unit of position traded. Defaults to 0.0005 (5 basis points).
+
+    Returns:
+        DataFrame: The daily strategy returns, shaped like `close`.
+    """
+    bar_returns = close.pct_change(fill_method=None).to_numpy(dtype=float)
+    held = positions.to_numpy(dtype=float)
+    previous_held = _previous(held, fill_value=0.0)
+    strategy_returns = np.nan_to_num(previous_held * bar_returns) - cost_per_trade * np.abs(held - previous_held)
+    return pd.DataFrame(strategy_returns, index=close.index, columns=close.columns)
+
+
+def compute_performance(strategy_returns, positions, periods_per_year=TRADING_DAYS_PER_YEAR):
+    """
+    Computes P&L, risk and turnover statistics per symbol and for an equal-weight portfolio of all symbols.
+
+    Args:
+        strategy_returns (DataFrame): Daily strategy returns, such as the output of `backtest_positions`.
+        positions (DataFrame): The positions that produced the returns, shaped like `strategy_returns`.
+        periods_per_year (int, optional): The number of bars in a year. Defaults to 252.
+
+    Returns:
+        DataFrame: One row per symbol plus a 'portfolio' row with 'total_return', 'annual_return',
+                   'annual_volatility', 'sharpe', 'max_drawdown', 'turnover' (position traded per year), 'trades'
+                   (positions opened or reversed) and 'exposure' (share of bars with a position) columns.
+    """
+    returns = strategy_returns.to_numpy(dtype=float)
+    held = positions.to_numpy(dtype=float)
+    traded = np.abs(held - _previous(held, fill_value=0.0))
+    portfolio_returns = returns.mean(axis=1, keepdims=True)
+    returns = np.hstack([returns, portfolio_returns])
+    traded = np.hstack([traded, traded.mean(axis=1, keepdims=True)])
+    exposure = np.hstack([(held != 0).mean(axis=0), [(held != 0).mean()]])
+    trades = ((held != 0) & (_previous(held, fill_value=0.0) != held)).sum(axis=0)
+    trades = np.hstack([trades, [trades.sum()]])
+
+    years = len(returns) / periods_per_year
+    equity = np.cumprod(1 + returns, axis=0)
+    total_return = equity[-1] - 1
+    volatility = returns.std(axis=0) * np.sqrt(periods_per_year)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        annual_return = equity[-1] ** (1 / years) - 1
+        sharpe = np.where(volatility > 0, returns.mean(axis=0) * periods_per_year / volatility, np.nan)
+    max_drawdown = (equity / np.maximum.accumulate(equity, axis=0) - 1).min(axis=0)
+
+    return pd.DataFrame({
+        'total_return': total_return,
+        'annual_return': annual_return,
+        'annual_volatility': volatility,
+        'sharpe': sharpe,
+        'max_drawdown': max_drawdown,
+        'turnover': traded.sum(axis=0) / years,
+        'trades': trades,
+        'exposure': exposure,
+    }, index=list(strategy_returns.columns) + ['portfolio'])
+
+
+def backtest_macd_rsi_mfi(panels, allow_short=False, cost_per_trade=0.0005, indicators=None, **signal_kwargs):
+    """
+    Backtests the combined MACD, RSI and MFI strategy over a panel of daily bars.
+
+    Args:
+        panels (dict): 'high', 'low', 'close' and 'volume' panels ordered oldest first, such as the output of
+                       `load_bar_panels`.
+        allow_short (bool, optional): Whether to trade the short ("Buy Put") side as well. Defaults to False.
+        cost_per_trade (float, optional): The cost per unit of position traded. Defaults to 0.0005.
+        indicators (IndicatorCache, optional): The indicator cache of `panels`, so that repeated backtests with
+                                               different parameters reuse the indicator arrays. Defaults to None.
+        **signal_kwargs: Threshold and period overrides passed to `macd_rsi_mfi_signals`.
+
+    Returns:
+        tuple: The positions, the daily strategy returns and the performance table of `compute_performance`.
+    """
+    signals = macd_rsi_mfi_signals(panels, indicators=indicators, **signal_kwargs)
+    positions = signals_to_positions(signals['long_entries'], signals['long_exits'])
+    if allow_short:
+        positions = positions - signals_to_positions(signals['short_entries'], signals['short_exits'])
+    strategy_returns = backtest_positions(panels['close'], positions, cost_per_trade=cost_per_trade)
+    return positions, strategy_returns, compute_performance(strategy_returns, positions)
+
+
+def _recent(events, bars):
+    # True where an event happened within the last `bars` bars, the current one included
+    if bars <= 1:
+        return events
+    counts = np.cumsum(events, axis=0)
+    counts[bars:] -= counts[:-bars].copy()
+    return counts > 0
+
+
+def _previous(values, fill_value=np.nan):
+    # values of the previous bar, aligned with the current one
+    previous = np.empty_like(values, dtype=float)
+    previous[0] = fill_value
+    previous[1:] = values[:-1]
+    return previous
@@ -0,0 +1,154 @@
+import pandas as pd
+
+from tools.alpha_vantage_helper import get_daily_adjusted_processed
+from tools.storage_helper import read_parquet, write_parquet
+
+DEFAULT_BAR_STORE_DIR = '/tmp/bars'
+# Alpha Vantage returns the latest 100 bars when outputsize='compact'
+COMPACT_WINDOW_BARS = 100
+# leave a margin for market holidays when deciding whether the compact window still overlaps the cache
+COMPACT_WINDOW_MARGIN_BARS = 10
+
+
+def get_bar_store_key(symbol):
+    """
+    Builds the storage key of the daily adjusted bars for a symbol.
+
+    Args:
+        symbol (str): The ticker symbol.
+
+    Returns:
+        str: The storage key, e.g. 'bars/daily_adjusted/AAPL.parquet'.
+    """
+    return f"bars/daily_adjusted/{symbol.upper()}.parquet"
+
+
+def load_bars(symbol, cache_dir=DEFAULT_BAR_STORE_DIR, bucket_name=None, s3_client=None):
+    """
+    Loads the raw Alpha Vantage daily adjusted bars stored for a symbol.
+
+    Args:
+        symbol (str): The ticker symbol.
+        cache_dir (str, optional): The local directory of the bar store. Defaults to '/tmp/bars'.
+        bucket_name (str, optional): The S3 bucket backing the bar store. Defaults to None (local only).
+        s3_client (optional): A boto3 S3 client. Defaults to None.
+
+    Returns:
+        DataFrame or None: The raw bars ordered newest first, as returned by `TimeSeries.get_daily_adjusted`,
+                           or None if nothing is stored for the symbol.
+    """
+    return read_parquet(get_bar_store_key(symbol), cache_dir=cache_dir, bucket_name=bucket_name,
+                        s3_client=s3_client)
+
+
+def save_bars(data, symbol, cache_dir=DEFAULT_BAR_STORE_DIR, bucket_name=None, s3_client=None):
+    """
+    Stores the raw Alpha Vantage daily adjusted bars for a symbol.
+
+    Args:
+        data (DataFrame): The raw bars as returned by `TimeSeries.get_daily_adjusted`.
+        symbol (str): The ticker symbol.
+        cache_dir (str, optional): The local directory of the bar store. Defaults to '/tmp/bars'.
+        bucket_name (str, optional): The S3 bucket backing the bar store. Defaults to None (local only).
+        s3_client (optional): A boto3 S3 client. Defaults to None.
+
+    Returns:
+        None
+    """
+    write_parquet(data, get_bar_store_key(symbol), cache_dir=cache_dir, bucket_name=bucket_name,
+                  s3_client=s3_client)
+
+
+def merge_bars(cached, latest):
+    """
+    Merges freshly downloaded bars into the cached history.
+
+    Rows present in both frames are taken from `latest`, since the most recent bar may have been cached before the
+    session closed.
+
+    Args:
+        cached (DataFrame): The raw bars held in the bar store.
+        latest (DataFrame): The raw bars just downloaded from Alpha Vantage.
+
+    Returns:
+        DataFrame: The merged raw bars ordered newest first.
+    """
+    merged = pd.concat([cached[~cached.index.isin(latest.index)], latest])
+    return merged.sort_index(ascending=False)
+
+
+def is_cache_current(cached, now=None):
+    """
+    Checks whether the compact Alpha Vantage window can still overlap the cached history.
+
+    Args:
+        cached (DataFrame or None): The raw bars held in the bar store.
+        now (Timestamp, optional): The current time. Defaults to now.
+
+    Returns:
+        bool: True if fetching the compact window is enough to bring the cache up to date.
+    """
+    if cached is None or cached.empty:
+        return False
+    now = pd.Timestamp.now() if now is None else now
+    missing_bars = len(pd.bdate_range(cached.index.max(), now.normalize())) - 1
+    return missing_bars < COMPACT_WINDOW_BARS - COMPACT_WINDOW_MARGIN_BARS
+
+
+def requires_full_refresh(cached, latest):
+    """
+    Determines whether the full history must be downloaded instead of merging the compact window.
+
+    A full download is needed when the compact window does not overlap the cached history, or when it contains a
+    dividend or split the cache has not seen yet, because Alpha Vantage then re-adjusts every historical close.
+
+    Args:
+        cached (DataFrame or None): The raw bars held in the bar store.
+        latest (DataFrame): The raw bars of the compact window.
+
+    Returns:
+        bool: True if the full history must be downloaded.
+    """
+    if cached is None or cached.empty:
+        return True
+    if latest.index.min() > cached.index.max():
+        return True
+
+    corporate_actions = latest[(latest['7. dividend amount'] != 0) | (latest['8. split coefficient'] != 1)]
+    known_actions = cached.reindex(corporate_actions.index)
+    unseen = ((known_actions['7. dividend amount'] != corporate_actions['7. dividend amount']) |
+              (known_actions['8. split coefficient'] != corporate_actions['8. split coefficient']))
+    return bool(unseen.any())
+
+
+def get_daily_adjusted_cached(time_series, symbol, cache_dir=DEFAULT_BAR_STORE_DIR, bucket_name=None,
+                              s3_client=None):
+    """
+    Retrieves the processed daily adjusted bars for a symbol, downloading only what the bar store is missing.
+
+    When the stored history is current only the compact window is requested and appended; otherwise, or when a new
+    corporate action invalidates the stored adjustments, the full history is downloaded. The refreshed raw bars are
+    written back to the store and adjusted with `get_daily_adjusted_processed`.
+
+    Args:
+        time_series (TimeSeries): An Alpha Vantage `TimeSeries` client with output_format='pandas'.
+        symbol (str): The ticker symbol.
+        cache_dir (str, optional): The local directory of the bar store. Defaults to '/tmp/bars'.
+        bucket_name (str, optional): The S3 bucket backing the bar store. Defaults to None (local only).
+        s3_client (optional): A boto3 S3 client. Defaults to None.
+
+    Returns:
+        DataFrame: The processed bars ordered oldest first.
+    """
+    cached = load_bars(symbol, cache_dir=cache_dir, bucket_name=bucket_name, s3_client=s3_client)
+
+    data = None
+    if is_cache_current(cached):
+        latest, _ = time_series.get_daily_adjusted(symbol=symbol, outputsize='compact')
+        if not requires_full_refresh(cached, latest):
+            data = merge_bars(cached, latest)
+    if data is None:
+        data, _ = time_series.get_daily_adjusted(symbol=symbol, outputsize='full')
+
+    save_bars(data, symbol, cache_dir=cache_dir, bucket_name=bucket_name, s3_client=s3_client)
+    return get_daily_adjusted_processed(data)
@@ -0,0 +1,291 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from io import BytesIO
+from multiprocessing import Pipe, Process
+
+import matplotlib
+
+# render off-screen; Lambda containers and worker processes have no display
+matplotlib.use('Agg')
+
+import matplotlib.dates as mdates  # noqa: E402
+import matplotlib.pyplot as plt  # noqa: E402
+import mplfinance as mpf  # noqa: E402
+import seaborn as sns  # noqa: E402
+
+CHART_FORMATS = ('png', 'svg')
+ICHIMOKU_LINES = (
+    ('tenkan_sen', 'blue', 'Tenkan Sen'),
+    ('kijun_sen', 'red', 'Kijun Sen'),
+    ('senkou_span_a', 'green', None),
+    ('senkou_span_b', 'orange', None),
+    ('chikou_span', 'purple', 'Chikou Span'),
+)
+DEFAULT_ICHIMOKU_BARS = 100
+DEFAULT_RSI_PERIODS = 180
+
+# figures created once per process and redrawn for every chart, see get_figure_template
+_templates = {}
+
+
+def figure_to_bytes(fig, fmt='png', **kwargs):
+    """
+    Renders a matplotlib figure without closing it.
+
+    Args:
+        fig (Figure): The figure to render.
+        fmt (str, optional): One of `CHART_FORMATS`. Defaults to 'png'.
+        **kwargs: Additional keyword arguments passed to `Figure.savefig`, e.g. `dpi`.
+
+    Returns:
+        bytes: The rendered image.
+    """
+    if fmt not in CHART_FORMATS:
+        raise ValueError(f"fmt must be one of {CHART_FORMATS}, got {fmt!r}")
+    buffer = BytesIO()
+    fig.savefig(buffer, format=fmt, **kwargs)
+    return buffer.getvalue()
+
+
+@lru_cache(maxsize=None)
+def get_mpf_style(base_style='yahoo'):
+    """
+    Builds an mplfinance style once per process.
+
+    Args:
+        base_style (str, optional): The mplfinance base style. Defaults to 'yahoo'.
+
+    Returns:
+        dict: The style.
+    """
+    return mpf.make_mpf_style(base_mpf_style=base_style)
+
+
+def get_figure_template(name):
+    """
+    Retrieves the figure of a chart type, creating it on first use in this process.
+
+    The figure and its axes are reused by every chart of the type: the axes are cleared and redrawn instead of
+    building a new figure, its style and layout, for every symbol.
+
+    Args:
+        name (str): The chart type, a key of `CHARTS`.
+
+    Returns:
+        tuple: The figure and a tuple of its axes.
+    """
+    if name not in _templates:
+        if name == 'ichimoku':
+            fig = mpf.figure(style=get_mpf_style(), figsize=(14, 7))
+            ax_price = fig.add_axes([0.06, 0.30, 0.88, 0.62])
+            ax_volume = fig.add_axes([0.06, 0.08, 0.88, 0.20], sharex=ax_price)
+            _templates[name] = (fig, (ax_price, ax_volume))
+        elif name == 'rsi':
+            fig, ax = plt.subplots()
+            _templates[name] = (fig, (ax,))
+        elif name == 'sector_boxplot':
+            fig, ax = plt.subplots(figsize=(10, 6))
+            _templates[name] = (fig, (ax,))
+        else:
+            raise ValueError(f"Unknown chart template {name!r}")
+    fig, axes = _templates[name]
+    for ax in axes:
+        ax.clear()
+    return fig, axes
+
+
+def plot_ichimoku(ichimoku_df, fmt='png', bars=DEFAULT_ICHIMOKU_BARS):
+    """
+    Renders daily candles and volume with the Ichimoku Cloud overlay.
+
+    Args:
+        ichimoku_df (DataFrame): The bars with the columns added by `calculate_ichimoku`, oldest first.
+        fmt (str, optional): One of `CHART_FORMATS`. Defaults to 'png'.
+        bars (int, optional): The number of most recent bars to plot. Defaults to 100.
+
+    Returns:
+        bytes: The rendered chart.
+    """
+    ichimoku_df_reduced = ichimoku_df.iloc[-bars:]
+    fig, (ax1, ax_volume) = get_figure_template('ichimoku')
+    mpf.plot(ichimoku_df_reduced, type='candle', ax=ax1, volume=ax_volume)
+
+    # to align with mplfinance, dates are converted to their indices
+    dates = list(range(len(ichimoku_df_reduced.index)))
+    for line, color, label in ICHIMOKU_LINES:
+        ax1.plot(dates, ichimoku_df_reduced[line], color=color, label=label)
+    span_a = ichimoku_df_reduced['senkou_span_a']
+    span_b = ichimoku_df_reduced['senkou_span_b']
+    ax1.fill_between(dates, span_a, span_b, where=span_a >= span_b, color='lightgreen', zorder=0)
+    ax1.fill_between(dates, span_a, span_b, where=span_a < span_b, color='lightcoral', zorder=0)
+    ax1.legend(loc='best')
+    ax1.set_title('Daily Price Candles with Ichimoku Cloud Overlay')
+    # the dates are labelled under the volume panel
+    ax1.tick_params(axis='x', labelbottom=False)
+    return figure_to_bytes(fig, fmt)
+
+
+def plot_rsi(rsi, fmt='png', periods=DEFAULT_RSI_PERIODS):
+    """
+    Renders the RSI over time.
+
+    Args:
+        rsi (Series): The RSI values indexed by date, oldest first.
+        fmt (str, optional): One of `CHART_FORMATS`. Defaults to 'png'.
+        periods (int, optional): The number of most recent values to plot. Defaults to 180.
+
+    Returns:
+        bytes: The rendered chart.
+    """
+    rsi_reduced = rsi.iloc[-periods:].astype(float)
+    fig, (ax,) = get_figure_template('rsi')
+    ax.plot(rsi_reduced.index, rsi_reduced.values, marker='o')
+    ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m-%d'))
+    ax.xaxis.set_major_locator(mdates.DayLocator(interval=14))
+    ax.set_title('RSI Over Time')
+    ax.set_xlabel('Date')
+    ax.set_ylabel('RSI')
+    ax.tick_params(axis='x', labelrotation=30)
+    ax.grid()
+    return figure_to_bytes(fig, fmt, bbox_inches='tight')
+
+
+def plot_sector_boxplot(option_table_df, fmt='png'):
+    """
+    Renders the distribution of option market values by sector and contract type.
+
+    Args:
+        option_table_df (DataFrame): The option positions with 'Sector', 'Market' and 'Type' columns.
+        fmt (str, optional): One of `CHART_FORMATS`. Defaults to 'png'.
+
+    Returns:
+        bytes: The rendered chart.
+    """
+    fig, (ax,) = get_figure_template('sector_boxplot')
+    sns.boxplot(x='Sector', y='Market', data=option_table_df, hue='Type', ax=ax)
+    ax.set_title('Option Market Value by Sector')
+    ax.set_xlabel('Sector')
+    ax.tick_params(axis='x', labelrotation=45)
+    ax.set_ylabel('Market Value')
+    fig.tight_layout()
+    return figure_to_bytes(fig, fmt)
+
+
+CHARTS = {
+    'ichimoku': plot_ichimoku,
+    'rsi': plot_rsi,
+    'sector_boxplot': plot_sector_boxplot,
+}
+
+
+def render_chart(chart, data, fmt='png', **kwargs):
+    """
+    Renders one chart of a registered type.
+
+    Args:
+        chart (str): The chart type, a key of `CHARTS`.
+        data: The data of the chart, e.g. the Ichimoku DataFrame.
+        fmt (str, optional): One of `CHART_FORMATS`. Defaults to 'png'.
+        **kwargs: Additional keyword arguments passed to the plotting function.
+
+    Returns:
+        bytes: The rendered chart.
+    """
+    if chart not in CHARTS:
+        raise ValueError(f"chart must be one of {tuple(CHARTS)}, got {chart!r}")
+    return CHARTS[chart](data, fmt=fmt, **kwargs)
+
+
+def render_charts(jobs, fmt='png', max_workers=None):
+    """
+    Renders many charts, in parallel across processes.
+
+    Every worker process keeps its own figure templates, so each chart only costs its drawing and encoding. AWS
+    Lambda has no shared memory for the semaphores of a process pool; there the charts are split between plain
+    processes that return them through pipes. Where no process can be started, the charts are rendered one after
+    another in this process.
+
+    Args:
+        jobs (dict): {key: (chart, data)} or {key: (chart, data, kwargs)}, e.g. {'AAPL': ('ichimoku', df)}.
+        fmt (str, optional): One of `CHART_FORMATS`. Defaults to 'png'.
+        max_workers (int, optional): The number of processes; 1 renders in this process. Defaults to None (the number
+                                     of CPUs).
+
+    Returns:
+        dict: The rendered chart bytes for each key, in the order of `jobs`.
+    """
+    keys = list(jobs)
+    args = [_get_job_args(jobs[key], fmt) for key in keys]
+    workers = min(len(args), max_workers or os.cpu_count() or 1)
+    if workers > 1:
+        try:
+            executor = ProcessPoolExecutor(max_workers=workers)
+        except OSError:
+            # only the pool's own setup is caught; errors of the charts themselves are raised as they are
+            executor = None
+        if executor is not None:
+            with executor:
+                chunksize = max(1, len(args) // (4 * workers))
+                return dict(zip(keys, executor.map(_render_job, args, chunksize=chunksize)))
+        rendered = _render_in_processes(args, workers)
+        if rendered is not None:
+            return dict(zip(keys, rendered))
+    return dict(zip(keys, map(_render_job, args)))
+
+
+def _render_in_processes(args, workers):
+    # contiguous chunks, one per process, each sent back whole through the pipe of its process
+    size = -(-len(args) // workers)
+    processes, receivers = [], []
+    try:
+        for start in range(0, len(args), size):
+            receiver, sender = Pipe(duplex=False)
+            process = Process(target=_render_chunk, args=(sender, args[start:start + size]), daemon=True)
+            process.start()
+            sender.close()
+            processes.append(process)
+            receivers.append(receiver)
+    except OSError:
+        _stop(processes)
+        return None
+
+    rendered = []
+    try:
+        for receiver in receivers:
+            error, charts = receiver.recv()
+            if error is not None:
+                raise error
+            rendered.extend(charts)
+    except BaseException:
+        _stop(processes)
+        raise
+    for process in processes:
+        process.join()
+    return rendered
+
+
+def _render_chunk(sender, args):
+    try:
+        sender.send((None, [_render_job(job_args) for job_args in args]))
+    except Exception as e:
+        sender.send((e, None))
+    finally:
+        sender.close()
+
+
+def _stop(processes):
+    for process in processes:
+        process.terminate()
+        process.join()
+
+
+def _get_job_args(job, fmt):
+    chart, data = job[0], job[1]
+    kwargs = job[2] if len(job) > 2 else {}
+    return chart, data, fmt, kwargs
+
+
+def _render_job(args):
+    chart, data, fmt, kwargs = args
+    return render_chart(chart, data, fmt=fmt, **kwargs)
@@ -0,0 +1,97 @@
+from email import encoders
+from email.mime.base import MIMEBase
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+from botocore.exceptions import ClientError
+
+from tools.aws_helper import get_client
+from tools.rate_limit_helper import TokenBucket, fetch_concurrently
+
+# the SES sandbox allows one message per second; raise it to the account's sending rate in production
+DEFAULT_SENDS_PER_SECOND = 1
+MAX_SEND_WORKERS = 4
+
+
+def create_attachment(data, filename):
+    """
+    Creates a base64-encoded attachment that can be added to any number of messages.
+
+    Args:
+        data (bytes): The content of the file.
+        filename (str): The file name shown to the recipient.
+
+    Returns:
+        MIMEBase: The encoded attachment.
+    """
+    part = MIMEBase('application', 'octet-stream')
+    part.set_payload(data)
+    encoders.encode_base64(part)
+    part.add_header('Content-Disposition', f'attachment; filename="{filename}"')
+    return part
+
+
+def build_message(from_email, to_email, subject, body, attachments=()):
+    """
+    Builds a plain text email with optional attachments.
+
+    Args:
+        from_email (str): The sender.
+        to_email (str): The recipient.
+        subject (str): The subject line.
+        body (str): The plain text body.
+        attachments (iterable of MIMEBase, optional): Attachments created with `create_attachment`. Defaults to ().
+
+    Returns:
+        MIMEMultipart: The message.
+    """
+    msg = MIMEMultipart()
+    msg['From'] = from_email
+    msg['To'] = to_email
+    msg['Subject'] = subject
+    msg.attach(MIMEText(body, 'plain'))
+    for attachment in attachments:
+        msg.attach(attachment)
+    return msg
+
+
+def send_emails(from_email, to_emails, subject, body, attachments=(), ses_client=None,
+                sends_per_second=DEFAULT_SENDS_PER_SECOND, max_workers=MAX_SEND_WORKERS):
+    """
+    Sends the same email to every recipient through SES, concurrently and within a send rate.
+
+    The messages are serialized up front, so attachments are encoded once however many recipients there are, and
+    one SES client is shared by the sending threads. Each send takes a token from a `TokenBucket`, which replaces a
+    fixed pause between recipients. A failed send does not stop the others.
+
+    Args:
+        from_email (str): The sender.
+        to_emails (iterable of str): The recipients; blanks and duplicates are skipped.
+        subject (str): The subject line.
+        body (str): The plain text body.
+        attachments (iterable of MIMEBase, optional): Attachments created with `create_attachment`. Defaults to ().
+        ses_client (optional): A boto3 SES client. Defaults to None, in which case the shared client is used.
+        sends_per_second (float, optional): The maximum send rate. Defaults to 1.
+        max_workers (int, optional): The number of sending threads. Defaults to 4.
+
+    Returns:
+        list of dict: One {'recipient', 'message_id', 'error'} entry per recipient, in order; 'error' is None when
+                      the message was accepted.
+    """
+    ses_client = ses_client or get_client('ses')
+    bucket = TokenBucket(sends_per_second, per=1.0)
+    attachments = list(attachments)
+    recipients = [to_email.strip() for to_email in to_emails if to_email.strip()]
+    raw_messages = {to_email: build_message(from_email, to_email, subject, body, attachments).as_string()
+                    for to_email in recipients}
+
+    def send(to_email):
+        bucket.acquire()
+        try:
+            response = ses_client.send_raw_email(RawMessage={'Data': raw_messages[to_email]}, Source=from_email,
+                                                 Destinations=[to_email])
+        except ClientError as e:
+            return {'recipient': to_email, 'message_id': None, 'error': str(e)}
+        return {'recipient': to_email, 'message_id': response.get('MessageId'), 'error': None}
+
+    return list(fetch_concurrently(send, recipients, max_workers=max_workers).values())
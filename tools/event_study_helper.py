@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+
+
+def build_price_matrix(bars_by_symbol, column='close'):
+    """
+    Aligns the prices of many symbols into a single date x symbol matrix.
+
+    Args:
+        bars_by_symbol (dict): Daily bars per symbol, each ordered oldest first, such as the output of
+                               `get_daily_adjusted_processed`.
+        column (str, optional): The price column to use. Defaults to 'close'.
+
+    Returns:
+        DataFrame: Prices indexed by date (oldest first) with one column per symbol; NaN where a symbol has no bar.
+    """
+    return pd.DataFrame({symbol: bars[column] for symbol, bars in bars_by_symbol.items()}).sort_index()
+
+
+def macd_crossover_events(macd_hist):
+    """
+    Lists every MACD crossover of a panel as an event.
+
+    A crossover is a sign change (or touch of zero) of the histogram between consecutive bars, the same rule used by
+    `find_last_crossover`. Crossovers into positive territory are bullish (direction 1) and the others bearish
+    (direction -1).
+
+    Args:
+        macd_hist (DataFrame): MACD histogram values ordered oldest first with one column per symbol.
+
+    Returns:
+        DataFrame: One row per crossover with 'symbol', 'date' and 'direction' columns.
+    """
+    values = macd_hist.to_numpy(dtype=float)
+    crossed = values[1:] * values[:-1] <= 0
+    rows, columns = np.nonzero(crossed)
+    rows = rows + 1
+    return pd.DataFrame({
+        'symbol': macd_hist.columns[columns],
+        'date': macd_hist.index[rows],
+        'direction': np.where(values[rows, columns] > 0, 1, -1),
+    })
+
+
+def compute_event_returns(prices, events, horizons=(5, 10, 20)):
+    """
+    Computes forward returns and maximum favorable/adverse excursions of events.
+
+    The price path following every event is gathered from the matrix in one NumPy fancy-indexing step, so thousands
+    of events are evaluated without a Python loop. Returns are measured from the close on the event date and are
+    multiplied by the event direction, so a positive value is always a move in the anticipated direction.
+
+    Args:
+        prices (DataFrame): A date x symbol price matrix, such as the output of `build_price_matrix`.
+        events (DataFrame): Events with 'symbol' and 'date' columns and an optional 'direction' column (1 for an
+                            anticipated rise, -1 for a fall; defaults to 1).
+        horizons (tuple of int, optional): The horizons in bars. Defaults to (5, 10, 20).
+
+    Returns:
+        DataFrame: The events with 'return_{h}d', 'mfe_{h}d' and 'mae_{h}d' columns per horizon. Values are NaN
+                   when the event is missing from the matrix or the horizon runs past the end of the data.
+    """
+    events = events.reset_index(drop=True)
+    matrix = prices.to_numpy(dtype=float)
+    symbol_positions = prices.columns.get_indexer(events['symbol'])
+    date_positions = prices.index.get_indexer(pd.DatetimeIndex(events['date']))
+    located = (symbol_positions >= 0) & (date_positions >= 0)
+    direction = events['direction'].to_numpy(dtype=float) if 'direction' in events else np.ones(len(events))
+
+    max_horizon = max(horizons)
+    path_rows = date_positions[:, None] + np.arange(max_horizon + 1)
+    in_range = located[:, None] & (path_rows < len(matrix))
+    path = matrix[np.clip(path_rows, 0, len(matrix) - 1), symbol_positions[:, None]]
+    path[~in_range] = np.nan
+
+    # signed move relative to the event close along the path; column 0 is the event bar itself
+    moves = (path[:, 1:] / path[:, :1] - 1) * direction[:, None]
+    favorable = np.fmax.accumulate(moves, axis=1)
+    adverse = np.fmin.accumulate(moves, axis=1)
+
+    result = events.copy()
+    for horizon in horizons:
+        complete = in_range[:, horizon]
+        result[f"return_{horizon}d"] = np.where(complete, moves[:, horizon - 1], np.nan)
+        result[f"mfe_{horizon}d"] = np.where(complete, favorable[:, horizon - 1], np.nan)
+        result[f"mae_{horizon}d"] = np.where(complete, adverse[:, horizon - 1], np.nan)
+    return result
+
+
+def summarize_event_returns(event_returns, horizons=(5, 10, 20), by=None):
+    """
+    Summarizes event returns into counts, mean returns, hit rates and mean excursions.
+
+    Args:
+        event_returns (DataFrame): The output of `compute_event_returns`.
+        horizons (tuple of int, optional): The horizons in bars. Defaults to (5, 10, 20).
+        by (list of str, optional): Columns to group the events by. Defaults to None (a single summary row).
+
+    Returns:
+        DataFrame: One row per group with 'events' and, per horizon, 'mean_return_{h}d', 'hit_rate_{h}d',
+                   'mean_mfe_{h}d' and 'mean_mae_{h}d'.
+    """
+    summary = pd.DataFrame({'events': 1}, index=event_returns.index)
+    aggregations = {'events': 'sum'}
+    for horizon in horizons:
+        returns = event_returns[f"return_{horizon}d"]
+        summary[f"mean_return_{horizon}d"] = returns
+        summary[f"hit_rate_{horizon}d"] = (returns > 0).where(returns.notna()).astype(float)
+        summary[f"mean_mfe_{horizon}d"] = event_returns[f"mfe_{horizon}d"]
+        summary[f"mean_mae_{horizon}d"] = event_returns[f"mae_{horizon}d"]
+        aggregations.update({f"{stat}_{horizon}d": 'mean' for stat in ('mean_return', 'hit_rate', 'mean_mfe',
+                                                                        'mean_mae')})
+    if not by:
+        return summary.agg(aggregations).to_frame().T
+    for column in by:
+        summary[column] = event_returns[column]
+    return summary.groupby(by).agg(aggregations).reset_index()
@@ -1,7 +1,28 @@
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+
 import pandas as pd
 from pyfinviz.screener import Screener
-import requests
-from time import sleep
+from time import sleep, time
+
+from tools import http_helper
+from tools.storage_helper import read_parquet, write_parquet
+
+FINVIZ_CACHE_DIR = '/tmp/finviz'
+# sector and industry data barely changes intraday
+DEFAULT_EXPORT_TTL_SECS = 6 * 60 * 60
+
+# exports held by this process, keyed by storage key
+_export_cache = {}
+
+# index filter and number of 20-row screener pages covering each universe
+UNIVERSE_PAGES = {
+    'sp500': (Screener.IndexOption.S_AND_P_500, 26),
+    'nasdaq100': (Screener.IndexOption.NASDAQ_100, 6),
+    'djia': (Screener.IndexOption.DJIA, 2),
+}
+UNIVERSE_MAX_WORKERS = 4
+MARKET_CAP_MULTIPLIERS = {'K': 1e3, 'M': 1e6, 'B': 1e9, 'T': 1e12}
 
 
 def get_sp500_tickers_sectors():
@@ -11,11 +32,7 @@ def get_sp500_tickers_sectors():
     Returns:
         DataFrame: A pandas DataFrame containing the tickers and sector information of the S&P 500 components.
     """
-    options = [Screener.IndexOption.S_AND_P_500]
-    screener = Screener(filter_options=options, view_option=Screener.ViewOption.OVERVIEW,
-                        pages=[x for x in range(1, 27)])
-    df = pd.concat(screener.data_frames.values())
-    return df
+    return load_universe('sp500')
 
 
 def get_nasdaq100_tickers_sectors():
@@ -25,11 +42,7 @@ def get_nasdaq100_tickers_sectors():
     Returns:
         DataFrame: A pandas DataFrame containing the tickers and sector information of the NASDAQ 100 components.
     """
-    options = [Screener.IndexOption.NASDAQ_100]
-    screener = Screener(filter_options=options, view_option=Screener.ViewOption.OVERVIEW,
-                        pages=[x for x in range(1, 7)])
-    df = pd.concat(screener.data_frames.values())
-    return df
+    return load_universe('nasdaq100')
 
 
 def get_djia_tickers_sectors():
@@ -39,11 +52,127 @@ def get_djia_tickers_sectors():
     Returns:
         DataFrame: A pandas DataFrame containing the tickers and sector information of the DJIA components.
     """
-    options = [Screener.IndexOption.DJIA]
-    screener = Screener(filter_options=options, view_option=Screener.ViewOption.OVERVIEW,
-                        pages=[x for x in range(1, 3)])
-    df = pd.concat(screener.data_frames.values())
-    return df
+    return load_universe('djia')
+
+
+def fetch_screener_pages(filter_options, pages, view_option=Screener.ViewOption.OVERVIEW,
+                         max_workers=UNIVERSE_MAX_WORKERS):
+    """
+    Fetches the pages of a pyfinviz screener concurrently.
+
+    Args:
+        filter_options (list): The pyfinviz screener filter options.
+        pages (list of int): The page numbers to fetch.
+        view_option (optional): The pyfinviz view option. Defaults to `Screener.ViewOption.OVERVIEW`.
+        max_workers (int, optional): The number of pages fetched at once. Defaults to 4.
+
+    Returns:
+        list of DataFrame: The table of every page, in page order.
+    """
+    def fetch_page(page):
+        return Screener(filter_options=filter_options, view_option=view_option, pages=[page]).data_frames[page]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(fetch_page, pages))
+
+
+def load_universe(universe, max_workers=UNIVERSE_MAX_WORKERS):
+    """
+    Loads the components of an index from the Finviz screener.
+
+    Pages are fetched concurrently, and tickers repeated across pages (Finviz repeats the last page past the end)
+    are dropped.
+
+    Args:
+        universe (str): The universe name, any of 'sp500', 'nasdaq100' and 'djia'.
+        max_workers (int, optional): The number of pages fetched at once. Defaults to 4.
+
+    Returns:
+        DataFrame: The compact universe frame of `compact_universe_frame`.
+    """
+    index_option, page_count = UNIVERSE_PAGES[universe]
+    pages = fetch_screener_pages([index_option], list(range(1, page_count + 1)), max_workers=max_workers)
+    data = pd.concat(pages, ignore_index=True).drop_duplicates('Ticker')
+    return compact_universe_frame(data)
+
+
+def compact_universe_frame(data):
+    """
+    Converts the text columns of a Finviz overview table into compact typed columns.
+
+    Sector, industry and country become categoricals, and market cap ('2.85T', '512.34B', '950.2M'), price, P/E,
+    change and volume become numbers ('-' becomes NaN).
+
+    Args:
+        data (DataFrame): An overview table as scraped by pyfinviz, with 'Ticker', 'Company', 'Sector', 'Industry',
+                          'Country', 'MarketCap', 'PE', 'Price', 'Change' and 'Volume' columns.
+
+    Returns:
+        DataFrame: The typed table with a default index; columns missing from `data` are skipped.
+    """
+    data = data.drop(columns=['No'], errors='ignore').reset_index(drop=True)
+    for column in ['Sector', 'Industry', 'Country']:
+        if column in data:
+            data[column] = data[column].astype('category')
+    if 'MarketCap' in data:
+        text = data['MarketCap'].astype(str).str.strip()
+        multiplier = text.str[-1].map(MARKET_CAP_MULTIPLIERS)
+        data['MarketCap'] = pd.to_numeric(text.str[:-1], errors='coerce') * multiplier
+    if 'Change' in data:
+        data['Change'] = pd.to_numeric(data['Change'].astype(str).str.rstrip('%'), errors='coerce') / 100
+    for column in ['PE', 'Price']:
+        if column in data:
+            data[column] = pd.to_numeric(data[column], errors='coerce')
+    if 'Volume' in data:
+        data['Volume'] = pd.to_numeric(data['Volume'].astype(str).str.replace(',', ''), errors='coerce')
+    return data
+
+
+def get_universe_snapshot_key(universe, as_of):
+    """
+    Builds the storage key of a dated universe snapshot.
+
+    Args:
+        universe (str): The universe name.
+        as_of (Timestamp): The date of the snapshot.
+
+    Returns:
+        str: The storage key, e.g. 'universes/sp500/20240105.parquet'.
+    """
+    return f"universes/{universe}/{as_of.strftime('%Y%m%d')}.parquet"
+
+
+def get_universe(universe, max_age_days=7, as_of=None, cache_dir=FINVIZ_CACHE_DIR, bucket_name=None,
+                 s3_client=None, max_workers=UNIVERSE_MAX_WORKERS):
+    """
+    Retrieves the latest universe snapshot, loading and storing a new one when none is recent enough.
+
+    Snapshots are versioned by date, so every job within `max_age_days` reuses the same component list and older
+    versions stay available.
+
+    Args:
+        universe (str): The universe name, any of 'sp500', 'nasdaq100' and 'djia'.
+        max_age_days (int, optional): The age in days of the oldest acceptable snapshot. Defaults to 7.
+        as_of (Timestamp, optional): The reference date. Defaults to today.
+        cache_dir (str, optional): The local cache directory. Defaults to '/tmp/finviz'.
+        bucket_name (str, optional): The S3 bucket backing the cache. Defaults to None (local only).
+        s3_client (optional): A boto3 S3 client. Defaults to None.
+        max_workers (int, optional): The number of pages fetched at once. Defaults to 4.
+
+    Returns:
+        DataFrame: The compact universe frame of `compact_universe_frame`.
+    """
+    as_of = pd.Timestamp.now().normalize() if as_of is None else pd.Timestamp(as_of).normalize()
+    for age in range(max_age_days + 1):
+        snapshot = read_parquet(get_universe_snapshot_key(universe, as_of - pd.Timedelta(days=age)),
+                                cache_dir=cache_dir, bucket_name=bucket_name, s3_client=s3_client)
+        if snapshot is not None:
+            return snapshot
+
+    data = load_universe(universe, max_workers=max_workers)
+    write_parquet(data, get_universe_snapshot_key(universe, as_of), cache_dir=cache_dir, bucket_name=bucket_name,
+                  s3_client=s3_client)
+    return data
 
 
 def get_screener(api_token, layout='Overview', symbols=None, sleep_secs=0):
@@ -90,6 +219,161 @@ def get_groups(api_token, group_name='sector',
     return response
 
 
+def get_screener_cached(api_token, layout='Overview', symbols=None, ttl_secs=DEFAULT_EXPORT_TTL_SECS,
+                        cache_dir=FINVIZ_CACHE_DIR, bucket_name=None, s3_client=None):
+    """
+    Retrieves screener data from a cached export of the full Finviz universe.
+
+    The unfiltered export of a layout is downloaded once per `ttl_secs` and kept in memory and in the storage cache
+    (local directory and optional S3 bucket), so repeated calls and other processes sharing the cache make no Finviz
+    request. Symbol subsets are sliced from the export locally. Symbols missing from it are requested directly once
+    per `ttl_secs`, see `get_symbol_lookups`, so symbols Finviz does not cover, such as index underlyings, cost no
+    request on later calls either.
+
+    Args:
+        api_token (str): API token for authentication.
+        layout (str): The layout of the screener data to be retrieved. Defaults to 'Overview'.
+        symbols (list of str, optional): List of symbols to filter the screener data. Defaults to None (all).
+        ttl_secs (float, optional): The maximum age of the export in seconds. Defaults to 6 hours.
+        cache_dir (str, optional): The local cache directory. Defaults to '/tmp/finviz'.
+        bucket_name (str, optional): The S3 bucket backing the cache. Defaults to None (local only).
+        s3_client (optional): A boto3 S3 client. Defaults to None.
+
+    Returns:
+        DataFrame: The screener rows indexed by 'No.', as exported by Finviz.
+    """
+    data = get_cached_export(f"finviz/screener/{layout.lower()}.parquet",
+                             lambda: read_export(get_screener(api_token, layout=layout)),
+                             ttl_secs=ttl_secs, cache_dir=cache_dir, bucket_name=bucket_name, s3_client=s3_client)
+    if not symbols:
+        return data
+    subset = data[data['Ticker'].isin(symbols)]
+    missing = [symbol for symbol in dict.fromkeys(symbols) if symbol not in set(subset['Ticker'])]
+    if missing:
+        subset = pd.concat([subset, get_symbol_lookups(api_token, missing, layout=layout, ttl_secs=ttl_secs,
+                                                       cache_dir=cache_dir, bucket_name=bucket_name,
+                                                       s3_client=s3_client)])
+    return subset
+
+
+def get_symbol_lookups(api_token, symbols, layout='Overview', ttl_secs=DEFAULT_EXPORT_TTL_SECS,
+                       cache_dir=FINVIZ_CACHE_DIR, bucket_name=None, s3_client=None):
+    """
+    Retrieves screener rows of individual symbols, remembering the symbols Finviz has no row for.
+
+    Every requested symbol is recorded with the time it was looked up in a table per layout, kept in memory and in
+    the storage cache like the exports. Only symbols without a record younger than `ttl_secs` are requested, in one
+    request.
+
+    Args:
+        api_token (str): API token for authentication.
+        symbols (list of str): The symbols to look up.
+        layout (str): The layout of the screener data to be retrieved. Defaults to 'Overview'.
+        ttl_secs (float, optional): The maximum age of a lookup in seconds. Defaults to 6 hours.
+        cache_dir (str, optional): The local cache directory. Defaults to '/tmp/finviz'.
+        bucket_name (str, optional): The S3 bucket backing the cache. Defaults to None (local only).
+        s3_client (optional): A boto3 S3 client. Defaults to None.
+
+    Returns:
+        DataFrame: The screener rows found for `symbols`, as exported by Finviz.
+    """
+    key = f"finviz/screener/{layout.lower()}_lookups.parquet"
+    now = time()
+    if key in _export_cache:
+        lookups = _export_cache[key][1]
+    else:
+        lookups = read_parquet(key, cache_dir=cache_dir, bucket_name=bucket_name, s3_client=s3_client)
+    if lookups is not None:
+        lookups = lookups[now - lookups['fetched_at'] < ttl_secs]
+
+    looked_up = set() if lookups is None else set(lookups['lookup'])
+    pending = [symbol for symbol in dict.fromkeys(symbols) if symbol not in looked_up]
+    if pending:
+        found = read_export(get_screener(api_token, layout=layout, symbols=pending))
+        # symbols without a row are recorded with only their lookup, so they are not requested again
+        absent = [symbol for symbol in pending if symbol not in set(found['Ticker'])]
+        absent = pd.DataFrame({'lookup': absent}, index=pd.Index([0] * len(absent), name=found.index.name))
+        rows = pd.concat([frame for frame in (found.assign(lookup=found['Ticker']), absent) if not frame.empty])
+        rows = rows.assign(fetched_at=now)
+        lookups = rows if lookups is None or lookups.empty else pd.concat([lookups, rows])
+        write_parquet(lookups, key, cache_dir=cache_dir, bucket_name=bucket_name, s3_client=s3_client)
+    _export_cache[key] = (now, lookups)
+
+    rows = lookups[lookups['lookup'].isin(symbols) & lookups['Ticker'].notna()]
+    return rows.drop(columns=['lookup', 'fetched_at'])
+
+
+def get_groups_cached(api_token, group_name='sector', layout='Overview', subgroup_name=None,
+                      ttl_secs=DEFAULT_EXPORT_TTL_SECS, cache_dir=FINVIZ_CACHE_DIR, bucket_name=None, s3_client=None):
+    """
+    Retrieves group data from a cached Finviz export.
+
+    Exports are cached per group, subgroup and layout like `get_screener_cached`.
+
+    Args:
+        api_token (str): API token for authentication.
+        group_name (str): The name of the group for which data is to be retrieved. Defaults to 'sector'.
+        layout (str): The layout of the group data to be retrieved. Defaults to 'Overview'.
+        subgroup_name (str, optional): The name of the subgroup within the group. Defaults to None.
+        ttl_secs (float, optional): The maximum age of the export in seconds. Defaults to 6 hours.
+        cache_dir (str, optional): The local cache directory. Defaults to '/tmp/finviz'.
+        bucket_name (str, optional): The S3 bucket backing the cache. Defaults to None (local only).
+        s3_client (optional): A boto3 S3 client. Defaults to None.
+
+    Returns:
+        DataFrame: The group rows as exported by Finviz.
+    """
+    key = f"finviz/groups/{verify_group_name(group_name)}_{subgroup_name or 'all'}_{layout.lower()}.parquet"
+    return get_cached_export(key, lambda: read_export(get_groups(api_token, group_name=group_name, layout=layout,
+                                                                 subgroup_name=subgroup_name)),
+                             ttl_secs=ttl_secs, cache_dir=cache_dir, bucket_name=bucket_name, s3_client=s3_client)
+
+
+def get_cached_export(key, fetch, ttl_secs=DEFAULT_EXPORT_TTL_SECS, cache_dir=FINVIZ_CACHE_DIR, bucket_name=None,
+                      s3_client=None):
+    """
+    Returns an export from the memory or storage cache, calling `fetch` when neither holds a fresh copy.
+
+    Args:
+        key (str): The storage key of the export.
+        fetch (callable): A function without arguments returning the export as a DataFrame.
+        ttl_secs (float, optional): The maximum age of the export in seconds. Defaults to 6 hours.
+        cache_dir (str, optional): The local cache directory. Defaults to '/tmp/finviz'.
+        bucket_name (str, optional): The S3 bucket backing the cache. Defaults to None (local only).
+        s3_client (optional): A boto3 S3 client. Defaults to None.
+
+    Returns:
+        DataFrame: The export.
+    """
+    now = time()
+    if key in _export_cache and now - _export_cache[key][0] < ttl_secs:
+        return _export_cache[key][1]
+
+    stored = read_parquet(key, cache_dir=cache_dir, bucket_name=bucket_name, s3_client=s3_client)
+    if stored is not None and not stored.empty and now - stored['fetched_at'].iloc[0] < ttl_secs:
+        fetched_at, data = stored['fetched_at'].iloc[0], stored.drop(columns='fetched_at')
+    else:
+        fetched_at, data = now, fetch()
+        write_parquet(data.assign(fetched_at=fetched_at), key, cache_dir=cache_dir, bucket_name=bucket_name,
+                      s3_client=s3_client)
+    _export_cache[key] = (fetched_at, data)
+    return data
+
+
+def read_export(response):
+    """
+    Parses a Finviz CSV export.
+
+    Args:
+        response (Response): The response of a Finviz export request.
+
+    Returns:
+        DataFrame: The exported rows, indexed by 'No.' when the export numbers them.
+    """
+    data = pd.read_csv(StringIO(response.text), sep=',', header=0)
+    return data.set_index('No.') if 'No.' in data.columns else data
+
+
 def verify_group_name(group_name):
     """
     Verifies if the provided group name is valid.
@@ -150,6 +434,9 @@ def get_request(api_token, filters, sleep_secs=0):
     """
     Makes a GET request to the Finviz API with the given filters.
 
+    The request goes through the shared HTTP session, so connections are reused, the Finviz rate limit is respected
+    and transient errors are retried with backoff.
+
     Args:
         api_token (str): API token for authentication.
         filters (str): Filters to apply in the request.
@@ -159,8 +446,9 @@ def get_request(api_token, filters, sleep_secs=0):
         Response: The response object from the request.
     """
     URL = f"https://elite.finviz.com/export.ashx?{filters}&auth={api_token}"
-    response = requests.get(URL)
-    sleep(sleep_secs)
+    response = http_helper.get(URL)
+    if sleep_secs:
+        sleep(sleep_secs)
     return response
 
 
@@ -0,0 +1,134 @@
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from tools.rate_limit_helper import TokenBucket
+
+# transient statuses worth retrying with exponential backoff; Retry-After is honoured when present
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+MAX_RETRIES = 5
+BACKOFF_FACTOR = 0.5
+POOL_MAXSIZE = 16
+MAX_CONCURRENT_REQUESTS = 8
+DEFAULT_TIMEOUT = 30
+# calls per minute allowed per host; hosts without an entry are not rate limited
+HOST_CALLS_PER_MINUTE = {
+    'www.alphavantage.co': 75,
+    'elite.finviz.com': 60,
+}
+
+_session = None
+_session_lock = threading.Lock()
+_concurrency = threading.BoundedSemaphore(MAX_CONCURRENT_REQUESTS)
+_host_buckets = {}
+
+
+class RateLimitedRetry(Retry):
+    """
+    `Retry` whose every retry attempt takes a token from the rate limiter of its host.
+
+    urllib3 retries inside a single call of the transport adapter, so `get` only draws a token for the first attempt.
+    The host of a failed attempt is recorded by `increment`, and `sleep`, which runs after the backoff and right
+    before the next attempt, draws the token of that attempt; retries of a server pushing back stay within the
+    host's budget.
+    """
+
+    host = None
+
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        new_retry = super().increment(method=method, url=url, response=response, error=error, _pool=_pool,
+                                      _stacktrace=_stacktrace)
+        new_retry.host = _pool.host if _pool is not None else None
+        return new_retry
+
+    def sleep(self, response=None):
+        super().sleep(response)
+        bucket = get_host_bucket(self.host) if self.host else None
+        if bucket is not None:
+            bucket.acquire()
+
+
+def create_session(max_retries=MAX_RETRIES, backoff_factor=BACKOFF_FACTOR, pool_maxsize=POOL_MAXSIZE):
+    """
+    Creates a `requests.Session` with keep-alive connection pools and automatic retries.
+
+    Every retry takes a token from the rate limiter of its host, see `RateLimitedRetry`.
+
+    Args:
+        max_retries (int, optional): The number of retries of a failed request. Defaults to 5.
+        backoff_factor (float, optional): The base of the exponential backoff between retries in seconds.
+                                          Defaults to 0.5.
+        pool_maxsize (int, optional): The number of connections kept alive per host. Defaults to 16.
+
+    Returns:
+        Session: The configured session.
+    """
+    retry = RateLimitedRetry(total=max_retries, backoff_factor=backoff_factor, status_forcelist=RETRY_STATUSES,
+                             allowed_methods=frozenset(['GET', 'HEAD']), respect_retry_after_header=True,
+                             raise_on_status=False)
+    adapter = HTTPAdapter(pool_maxsize=pool_maxsize, max_retries=retry)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_session():
+    """
+    Retrieves the session shared by the tools package, creating it on first use.
+
+    Returns:
+        Session: The shared session.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_session()
+    return _session
+
+
+def get_host_bucket(host):
+    """
+    Retrieves the rate limiter of a host.
+
+    Args:
+        host (str): The host name, e.g. 'elite.finviz.com'.
+
+    Returns:
+        TokenBucket or None: The shared bucket of the host, or None if the host is not rate limited.
+    """
+    calls_per_minute = HOST_CALLS_PER_MINUTE.get(host)
+    if calls_per_minute is None:
+        return None
+    with _session_lock:
+        if host not in _host_buckets:
+            _host_buckets[host] = TokenBucket(calls_per_minute)
+        return _host_buckets[host]
+
+
+def get(url, params=None, timeout=DEFAULT_TIMEOUT, **kwargs):
+    """
+    Makes a GET request through the shared session.
+
+    The request waits for the rate limiter of its host and for a free slot among `MAX_CONCURRENT_REQUESTS`, and is
+    retried with exponential backoff on connection errors and transient statuses. Each retry waits for the rate
+    limiter again.
+
+    Args:
+        url (str): The URL to request.
+        params (dict, optional): The query parameters. Defaults to None.
+        timeout (float, optional): The connect and read timeout in seconds. Defaults to 30.
+        **kwargs: Other arguments passed to `Session.get`.
+
+    Returns:
+        Response: The response of the last attempt.
+    """
+    bucket = get_host_bucket(urlsplit(url).hostname)
+    if bucket is not None:
+        bucket.acquire()
+    with _concurrency:
+        return get_session().get(url, params=params, timeout=timeout, **kwargs)
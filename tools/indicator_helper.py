@@ -0,0 +1,174 @@
+import numpy as np
+import pandas as pd
+
+
+def calculate_macd(close, fast_period=12, slow_period=26, signal_period=9):
+    """
+    Calculates the Moving Average Convergence Divergence (MACD) indicator.
+
+    The input can be a single price series or a wide DataFrame with one column per symbol, in which case every
+    symbol is computed in the same vectorized pass.
+
+    Args:
+        close (Series or DataFrame): Closing prices ordered oldest first.
+        fast_period (int, optional): The span of the fast exponential moving average. Defaults to 12.
+        slow_period (int, optional): The span of the slow exponential moving average. Defaults to 26.
+        signal_period (int, optional): The span of the signal line. Defaults to 9.
+
+    Returns:
+        tuple: The MACD line, the signal line and the histogram, each shaped like `close`.
+    """
+    fast_ema = close.ewm(span=fast_period, adjust=False, min_periods=fast_period).mean()
+    slow_ema = close.ewm(span=slow_period, adjust=False, min_periods=slow_period).mean()
+    macd = fast_ema - slow_ema
+    signal = macd.ewm(span=signal_period, adjust=False, min_periods=signal_period).mean()
+    return macd, signal, macd - signal
+
+
+def calculate_rsi(close, time_period=14):
+    """
+    Calculates the Relative Strength Index (RSI) using Wilder's smoothing.
+
+    Args:
+        close (Series or DataFrame): Closing prices ordered oldest first, one column per symbol for a DataFrame.
+        time_period (int, optional): The number of periods used for smoothing. Defaults to 14.
+
+    Returns:
+        Series or DataFrame: The RSI values between 0 and 100, shaped like `close`.
+    """
+    delta = close.diff()
+    average_gain = delta.clip(lower=0).ewm(alpha=1 / time_period, adjust=False, min_periods=time_period).mean()
+    average_loss = (-delta.clip(upper=0)).ewm(alpha=1 / time_period, adjust=False, min_periods=time_period).mean()
+    rsi = 100 - 100 / (1 + average_gain / average_loss)
+    # no losses over the window means maximum strength
+    return rsi.mask((average_loss == 0) & average_gain.notna(), 100.0)
+
+
+def calculate_mfi(high, low, close, volume, time_period=14):
+    """
+    Calculates the Money Flow Index (MFI).
+
+    Args:
+        high (Series or DataFrame): High prices ordered oldest first.
+        low (Series or DataFrame): Low prices ordered oldest first.
+        close (Series or DataFrame): Closing prices ordered oldest first.
+        volume (Series or DataFrame): Traded volume ordered oldest first.
+        time_period (int, optional): The number of periods summed for the money flow ratio. Defaults to 14.
+
+    Returns:
+        Series or DataFrame: The MFI values between 0 and 100, shaped like `close`.
+    """
+    typical_price = (high + low + close) / 3
+    raw_money_flow = typical_price * volume
+    price_change = typical_price.diff()
+    positive_flow = raw_money_flow.where(price_change > 0, 0.0).where(price_change.notna())
+    negative_flow = raw_money_flow.where(price_change < 0, 0.0).where(price_change.notna())
+    positive_sum = positive_flow.rolling(window=time_period).sum()
+    negative_sum = negative_flow.rolling(window=time_period).sum()
+    mfi = 100 - 100 / (1 + positive_sum / negative_sum)
+    return mfi.mask((negative_sum == 0) & positive_sum.notna(), 100.0)
+
+
+def calculate_indicators(data, fast_period=12, slow_period=26, signal_period=9, rsi_period=14, mfi_period=14):
+    """
+    Calculates MACD, RSI and MFI for a DataFrame of daily bars.
+
+    The column names of the MACD and RSI outputs follow the Alpha Vantage `TechIndicators` frames so the results can
+    replace those remote calls directly.
+
+    Args:
+        data (DataFrame): Daily bars ordered oldest first with 'high', 'low', 'close' and 'volume' columns, such as
+                          the output of `get_daily_adjusted_processed`.
+        fast_period (int, optional): The MACD fast period. Defaults to 12.
+        slow_period (int, optional): The MACD slow period. Defaults to 26.
+        signal_period (int, optional): The MACD signal period. Defaults to 9.
+        rsi_period (int, optional): The RSI period. Defaults to 14.
+        mfi_period (int, optional): The MFI period. Defaults to 14.
+
+    Returns:
+        DataFrame: A DataFrame indexed like `data` with 'MACD', 'MACD_Signal', 'MACD_Hist', 'RSI' and 'MFI' columns.
+    """
+    macd, signal, hist = calculate_macd(data['close'], fast_period, slow_period, signal_period)
+    return pd.DataFrame({
+        'MACD': macd,
+        'MACD_Signal': signal,
+        'MACD_Hist': hist,
+        'RSI': calculate_rsi(data['close'], rsi_period),
+        'MFI': calculate_mfi(data['high'], data['low'], data['close'], data['volume'], mfi_period),
+    }, index=data.index)
+
+
+def find_last_crossovers(macd_hist):
+    """
+    Finds the date of the last MACD crossover for every symbol of a panel.
+
+    A crossover is a sign change (or touch of zero) of the MACD histogram between consecutive bars, the same rule
+    used by `find_last_crossover`. The sign changes of all symbols are detected in one NumPy pass.
+
+    Args:
+        macd_hist (Series or DataFrame): MACD histogram values ordered oldest first, one column per symbol for a
+                                         DataFrame.
+
+    Returns:
+        Series: The date of the most recent crossover for each symbol, NaT if a symbol never crossed.
+    """
+    values, symbols = _as_panel(macd_hist)
+    crossed = values[1:] * values[:-1] <= 0
+    last_crossed = _last_true_index(crossed)
+    dates = pd.Series(pd.NaT, index=symbols, dtype='datetime64[ns]')
+    has_crossed = last_crossed >= 0
+    dates[has_crossed] = macd_hist.index[last_crossed[has_crossed] + 1]
+    return dates
+
+
+def find_rsi_signals(rsi, oversold_threshold=30, overbought_threshold=70):
+    """
+    Finds the current RSI and the most recent overbought/oversold signal for every symbol of a panel.
+
+    When the current RSI is outside the thresholds the signal is the current condition. Otherwise the signal is the
+    most recent bar that breached either threshold, or None if the history never did.
+
+    Args:
+        rsi (Series or DataFrame): RSI values ordered oldest first, one column per symbol for a DataFrame.
+        oversold_threshold (float, optional): The oversold level. Defaults to 30.
+        overbought_threshold (float, optional): The overbought level. Defaults to 70.
+
+    Returns:
+        DataFrame: A DataFrame indexed by symbol with 'rsi' (the current value), 'signal' ('overbought', 'oversold' or
+                   None) and 'signal_date' (the date of the signal, the latest date when there is none) columns.
+    """
+    values, symbols = _as_panel(rsi)
+    overbought = values > overbought_threshold
+    oversold = values < oversold_threshold
+    last_breach = _last_true_index(overbought | oversold)
+    has_breached = last_breach >= 0
+    columns = np.arange(values.shape[1])
+    breach_rows = np.where(has_breached, last_breach, len(values) - 1)
+
+    current = values[-1]
+    in_range = (current >= oversold_threshold) & (current <= overbought_threshold)
+    breach_signal = np.where(overbought[breach_rows, columns], 'overbought', 'oversold')
+    signal = np.where(in_range, np.where(has_breached, breach_signal, None),
+                      np.where(current < oversold_threshold, 'oversold', 'overbought'))
+    signal_rows = np.where(in_range, breach_rows, len(values) - 1)
+
+    return pd.DataFrame({
+        'rsi': current,
+        'signal': signal,
+        'signal_date': rsi.index[signal_rows],
+    }, index=symbols)
+
+
+def _as_panel(data):
+    # view a Series as a single column panel so both shapes share one code path
+    if isinstance(data, pd.Series):
+        return data.to_numpy(dtype=float)[:, None], pd.Index([data.name])
+    return data.to_numpy(dtype=float), data.columns
+
+
+def _last_true_index(mask):
+    # row of the last True in every column, -1 for columns without any
+    if len(mask) == 0:
+        return np.full(mask.shape[1], -1)
+    last = len(mask) - 1 - np.argmax(mask[::-1], axis=0)
+    return np.where(mask.any(axis=0), last, -1)
@@ -22,11 +22,11 @@ from langchain.tools.playwright.utils import run_async
 """Util that calls AlphaVantage for Daily Adjusted Time Series."""
 from typing import Any, Dict, Optional
 
-import requests
-
 from langchain.pydantic_v1 import BaseModel, Extra, root_validator
 from langchain.utils import get_from_dict_or_env
 
+from tools import http_helper
+
 
 class AlphaVantageDailyAdjustedAPIWrapper(BaseModel):
     """Wrapper for AlphaVantage API for Daily Adjusted Time Series.
@@ -53,7 +53,7 @@ class AlphaVantageDailyAdjustedAPIWrapper(BaseModel):
             self, symbol: str, outputsize: Optional[str] = "compact", datatype: Optional[str] = "json"
     ) -> Dict[str, Any]:
         """Make a request to the AlphaVantage API to get the daily adjusted time series."""
-        response = requests.get(
+        response = http_helper.get(
             "https://www.alphavantage.co/query/",
             params={
                 "function": "TIME_SERIES_DAILY_ADJUSTED",
@@ -1,7 +1,15 @@
+import bisect
+from collections import deque
+
 import numpy as np
+import pandas as pd
+from scipy.ndimage import maximum_filter1d, minimum_filter1d
 from scipy.signal import argrelextrema
 
 
+ICHIMOKU_COLUMNS = ['tenkan_sen', 'kijun_sen', 'senkou_span_a', 'senkou_span_b', 'chikou_span']
+
+
 def calculate_ichimoku(df):
     """
     Calculates the Ichimoku Cloud indicator components for a given DataFrame.
@@ -16,23 +24,152 @@ def calculate_ichimoku(df):
         DataFrame: The input DataFrame with new columns added for each Ichimoku component:
                    'tenkan_sen', 'kijun_sen', 'senkou_span_a', 'senkou_span_b', and 'chikou_span'.
     """
-    high_prices = df['high']
-    close_prices = df['close']
-    low_prices = df['low']
-    nine_period_high = high_prices.rolling(window=9).max()
-    nine_period_low = low_prices.rolling(window=9).min()
-    df['tenkan_sen'] = (nine_period_high + nine_period_low) / 2
-    twenty_six_period_high = high_prices.rolling(window=26).max()
-    twenty_six_period_low = low_prices.rolling(window=26).min()
-    df['kijun_sen'] = (twenty_six_period_high + twenty_six_period_low) / 2
-    df['senkou_span_a'] = ((df['tenkan_sen'] + df['kijun_sen']) / 2).shift(26)
-    fifty_two_period_high = high_prices.rolling(window=52).max()
-    fifty_two_period_low = low_prices.rolling(window=52).min()
-    df['senkou_span_b'] = ((fifty_two_period_high + fifty_two_period_low) / 2).shift(26)
-    df['chikou_span'] = close_prices.shift(-26)
+    ichimoku = calculate_ichimoku_arrays(df['high'].to_numpy(dtype=float)[:, None],
+                                         df['low'].to_numpy(dtype=float)[:, None],
+                                         df['close'].to_numpy(dtype=float)[:, None])
+    for column in ICHIMOKU_COLUMNS:
+        df[column] = ichimoku[column][:, 0]
     return df
 
 
+def calculate_ichimoku_arrays(high, low, close):
+    """
+    Calculates the Ichimoku Cloud components for many symbols at once.
+
+    The inputs are 2-D arrays with one row per date (oldest first) and one column per symbol, so an OHLC cube of
+    shape (4, dates, symbols) can be passed as `ohlc[1], ohlc[2], ohlc[3]`. The rolling highs and lows use scipy's
+    running max/min filters, which keep a monotonic queue per column and cost O(1) per bar regardless of the window.
+    A window containing a missing value yields NaN, matching pandas rolling windows.
+
+    Args:
+        high (ndarray): High prices of shape (dates, symbols).
+        low (ndarray): Low prices of shape (dates, symbols).
+        close (ndarray): Closing prices of shape (dates, symbols).
+
+    Returns:
+        dict: Arrays of shape (dates, symbols) for 'tenkan_sen', 'kijun_sen', 'senkou_span_a', 'senkou_span_b' and
+              'chikou_span'.
+    """
+    period_high = _rolling_extremes(high, (9, 26, 52), maximum_filter1d, -np.inf)
+    period_low = _rolling_extremes(low, (9, 26, 52), minimum_filter1d, np.inf)
+    tenkan_sen = (period_high[9] + period_low[9]) / 2
+    kijun_sen = (period_high[26] + period_low[26]) / 2
+    return {
+        'tenkan_sen': tenkan_sen,
+        'kijun_sen': kijun_sen,
+        'senkou_span_a': _shift((tenkan_sen + kijun_sen) / 2, 26),
+        'senkou_span_b': _shift((period_high[52] + period_low[52]) / 2, 26),
+        'chikou_span': _shift(close, -26),
+    }
+
+
+def calculate_ichimoku_panel(panel):
+    """
+    Calculates the Ichimoku Cloud components for a panel of symbols in a single vectorized pass.
+
+    The panel is pivoted to a date x symbol grid, every symbol is computed together by `calculate_ichimoku_arrays`,
+    and the results are gathered back onto the rows of the panel. Symbols are aligned on the union of the panel's
+    dates, so a symbol missing a date inside its history gets NaN for the windows spanning that gap.
+
+    Args:
+        panel (DataFrame): A DataFrame with a (symbol, date) MultiIndex and 'high', 'low' and 'close' columns.
+
+    Returns:
+        DataFrame: A copy of the panel with the Ichimoku columns added.
+    """
+    symbols = panel.index.get_level_values(0)
+    dates = panel.index.get_level_values(1)
+    unique_symbols = symbols.unique()
+    unique_dates = dates.unique().sort_values()
+    symbol_positions = unique_symbols.get_indexer(symbols)
+    date_positions = unique_dates.get_indexer(dates)
+
+    grids = {}
+    for column in ['high', 'low', 'close']:
+        grid = np.full((len(unique_dates), len(unique_symbols)), np.nan)
+        grid[date_positions, symbol_positions] = panel[column].to_numpy(dtype=float)
+        grids[column] = grid
+
+    ichimoku = calculate_ichimoku_arrays(grids['high'], grids['low'], grids['close'])
+    result = panel.copy()
+    for column in ICHIMOKU_COLUMNS:
+        result[column] = ichimoku[column][date_positions, symbol_positions]
+    return result
+
+
+def identify_cloud_breakouts(ichimoku_panel):
+    """
+    Identifies the symbols whose latest close broke through the Ichimoku cloud.
+
+    A bullish breakout is a close above the top of the cloud after a close at or below it on the previous bar; a
+    bearish breakout is the same move through the bottom of the cloud.
+
+    Args:
+        ichimoku_panel (DataFrame): The output of `calculate_ichimoku_panel`.
+
+    Returns:
+        DataFrame: A DataFrame indexed by symbol with the latest 'date', 'close', 'cloud_top', 'cloud_bottom' and
+                   'breakout' ('bullish', 'bearish' or None).
+    """
+    panel = ichimoku_panel if ichimoku_panel.index.is_monotonic_increasing else ichimoku_panel.sort_index()
+    close = panel['close'].to_numpy(dtype=float)
+    span_a = panel['senkou_span_a'].to_numpy(dtype=float)
+    span_b = panel['senkou_span_b'].to_numpy(dtype=float)
+    cloud_top = np.maximum(span_a, span_b)
+    cloud_bottom = np.minimum(span_a, span_b)
+
+    # rows are sorted by symbol then date, so the last row of each symbol is where the symbol changes
+    symbol_codes = panel.index.codes[0]
+    same_symbol = symbol_codes[1:] == symbol_codes[:-1]
+    latest = np.flatnonzero(np.append(~same_symbol, True))
+    previous = latest - 1
+    has_previous = np.append(False, same_symbol)[latest]
+    previous[~has_previous] = latest[~has_previous]
+
+    bullish = has_previous & (close[latest] > cloud_top[latest]) & (close[previous] <= cloud_top[previous])
+    bearish = has_previous & (close[latest] < cloud_bottom[latest]) & (close[previous] >= cloud_bottom[previous])
+    return pd.DataFrame({
+        'date': panel.index.levels[1][panel.index.codes[1][latest]],
+        'close': close[latest],
+        'cloud_top': cloud_top[latest],
+        'cloud_bottom': cloud_bottom[latest],
+        'breakout': np.where(bullish, 'bullish', np.where(bearish, 'bearish', None)),
+    }, index=panel.index.levels[0][symbol_codes[latest]])
+
+
+def _rolling_extremes(values, windows, filter_func, fill_value):
+    # filter contiguous rows (one per symbol) and shift the centered scipy window so it ends on the current date
+    values = np.ascontiguousarray(values.T)
+    missing = np.isnan(values)
+    has_missing = missing.any()
+    if has_missing:
+        values = np.where(missing, fill_value, values)
+        missing_cumsum = np.cumsum(missing, axis=1)
+
+    extremes = {}
+    for window in windows:
+        result = filter_func(values, size=window, axis=1, origin=(window - 1) // 2, mode='nearest')
+        # windows that are incomplete or contain a missing value are undefined, as with pandas rolling
+        if has_missing:
+            missing_count = missing_cumsum.copy()
+            missing_count[:, window:] -= missing_cumsum[:, :-window]
+            result[missing_count > 0] = np.nan
+        result[:, :window - 1] = np.nan
+        extremes[window] = result.T
+    return extremes
+
+
+def _shift(values, periods):
+    shifted = np.full_like(values, np.nan)
+    if periods > 0:
+        shifted[periods:] = values[:-periods]
+    elif periods < 0:
+        shifted[:periods] = values[-periods:]
+    else:
+        shifted[:] = values
+    return shifted
+
+
 def identify_multi_tops(data, tolerance=0.005, order=1):
     """
     Identifies potential multi-top formations in a given dataset.
@@ -110,3 +247,223 @@ def identify_multi_bottoms(data, tolerance=0.005, order=1):
         return None, None
 
     return touches, support_value
+
+
+class IchimokuState:
+    """
+    Incrementally maintained Ichimoku Cloud for a single symbol.
+
+    Each call to `update` appends one bar and returns the Ichimoku components of that bar, equal to the last row
+    `calculate_ichimoku` would produce over the whole history. The rolling highs and lows are kept in monotonic
+    deques, so an update costs amortized O(1) instead of recomputing the history.
+
+    The Chikou Span of a bar is the close 26 bars later, so it is NaN for the bar just appended; the close passed to
+    `update` is the Chikou Span of the bar 26 periods earlier.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self._period_high = {window: _RollingExtreme(window, is_max=True) for window in (9, 26, 52)}
+        self._period_low = {window: _RollingExtreme(window, is_max=False) for window in (9, 26, 52)}
+        # midpoints are plotted 26 periods ahead, so keep the current one and the 26 before it
+        self._span_a_midpoints = deque(maxlen=27)
+        self._span_b_midpoints = deque(maxlen=27)
+
+    @classmethod
+    def from_frame(cls, df):
+        """
+        Builds the state from a history of bars.
+
+        Args:
+            df (DataFrame): A pandas DataFrame with columns 'high', 'close', and 'low', ordered oldest first.
+
+        Returns:
+            IchimokuState: The state after the last bar of the history.
+        """
+        state = cls()
+        for high, low, close in zip(df['high'].to_numpy(dtype=float), df['low'].to_numpy(dtype=float),
+                                    df['close'].to_numpy(dtype=float)):
+            state.update(high, low, close)
+        return state
+
+    def update(self, high, low, close):
+        """
+        Appends a bar.
+
+        Args:
+            high (float): The high price of the bar.
+            low (float): The low price of the bar.
+            close (float): The closing price of the bar.
+
+        Returns:
+            dict: The 'tenkan_sen', 'kijun_sen', 'senkou_span_a', 'senkou_span_b' and 'chikou_span' of the bar.
+        """
+        for window in (9, 26, 52):
+            self._period_high[window].push(self.count, high)
+            self._period_low[window].push(self.count, low)
+        self.count += 1
+
+        tenkan_sen = (self._period_high[9].value() + self._period_low[9].value()) / 2
+        kijun_sen = (self._period_high[26].value() + self._period_low[26].value()) / 2
+        self._span_a_midpoints.append((tenkan_sen + kijun_sen) / 2)
+        self._span_b_midpoints.append((self._period_high[52].value() + self._period_low[52].value()) / 2)
+        return {
+            'tenkan_sen': tenkan_sen,
+            'kijun_sen': kijun_sen,
+            'senkou_span_a': self._lagged(self._span_a_midpoints),
+            'senkou_span_b': self._lagged(self._span_b_midpoints),
+            'chikou_span': np.nan,
+        }
+
+    @staticmethod
+    def _lagged(midpoints):
+        return midpoints[0] if len(midpoints) == midpoints.maxlen else np.nan
+
+
+class MultiExtremaState:
+    """
+    Incrementally maintained multi-top and multi-bottom candidates for a single symbol.
+
+    Each call to `update` appends one bar. Local extrema are confirmed once `order` bars have followed them and are
+    kept sorted by value, so `multi_tops` and `multi_bottoms` answer with the same result as `identify_multi_tops`
+    and `identify_multi_bottoms` over the whole history, in O(order + log n) plus the number of touches.
+
+    Args:
+        tolerance (float, optional): The tolerance level used to identify additional touches. Defaults to 0.005.
+        order (int, optional): How many bars on each side a local extremum must exceed. Defaults to 1.
+    """
+
+    def __init__(self, tolerance=0.005, order=1):
+        self.tolerance = tolerance
+        self.order = order
+        self.count = 0
+        self._recent = deque(maxlen=2 * order + 1)
+        # confirmed extrema as sorted (value, index) pairs; bottoms are stored negated so both sort the same way
+        self._tops = []
+        self._bottoms = []
+
+    @classmethod
+    def from_frame(cls, data, tolerance=0.005, order=1):
+        """
+        Builds the state from a history of bars.
+
+        Args:
+            data (DataFrame): A pandas DataFrame with at least 'close' and 'open' columns, ordered oldest first.
+            tolerance (float, optional): The tolerance level used to identify additional touches. Defaults to 0.005.
+            order (int, optional): How many bars on each side a local extremum must exceed. Defaults to 1.
+
+        Returns:
+            MultiExtremaState: The state after the last bar of the history.
+        """
+        state = cls(tolerance=tolerance, order=order)
+        for open_, close in zip(data['open'].to_numpy(dtype=float), data['close'].to_numpy(dtype=float)):
+            state.update(open_, close)
+        return state
+
+    def update(self, open_, close):
+        """
+        Appends a bar.
+
+        Args:
+            open_ (float): The opening price of the bar.
+            close (float): The closing price of the bar.
+
+        Returns:
+            None
+        """
+        self._recent.append((self.count, max(close, open_), -min(close, open_)))
+        self.count += 1
+
+        # the bar `order` positions back now has its full window on both sides
+        center = self.count - 1 - self.order
+        if center >= 1:
+            for position, extrema in ((1, self._tops), (2, self._bottoms)):
+                if self._is_extremum(center, position):
+                    bisect.insort(extrema, (self._recent[center - self._recent[0][0]][position], center))
+
+    def multi_tops(self):
+        """
+        Evaluates the multi-top formation over all bars seen so far.
+
+        Returns:
+            tuple: A tuple containing the indices of touches and the average resistance value if a multi-top is
+                   identified, otherwise (None, None).
+        """
+        return self._evaluate(self._tops, 1, sign=1)
+
+    def multi_bottoms(self):
+        """
+        Evaluates the multi-bottom formation over all bars seen so far.
+
+        Returns:
+            tuple: A tuple containing the indices of touches and the average support value if a multi-bottom is
+                   identified, otherwise (None, None).
+        """
+        return self._evaluate(self._bottoms, 2, sign=-1)
+
+    def _is_extremum(self, index, position, last=None):
+        # strictly beyond every other bar within `order` on each side, clipped to the bars available
+        last = self.count - 1 if last is None else last
+        offset = self._recent[0][0]
+        value = self._recent[index - offset][position]
+        return all(value > self._recent[other - offset][position]
+                   for other in range(max(0, index - self.order, offset), min(last, index + self.order) + 1)
+                   if other != index)
+
+    def _evaluate(self, confirmed, position, sign):
+        # bars near the end are extrema of the full history when they beat every bar that follows them
+        offset = self._recent[0][0] if self._recent else 0
+        provisional = [(self._recent[index - offset][position], index)
+                       for index in range(max(1, self.count - self.order), self.count - 1)
+                       if self._is_extremum(index, position)]
+        if len(confirmed) + len(provisional) < 2:
+            return None, None
+
+        best_two = sorted([value for value, _ in confirmed[-2:]] + [value for value, _ in provisional])[-2:]
+        level = sign * (best_two[0] + best_two[1]) / 2
+
+        def is_touch(value):
+            return abs(sign * value - level) / level <= self.tolerance
+
+        if level > 0:
+            # widen the bisect bounds slightly and confirm every candidate with the exact test
+            margin = abs(level) * self.tolerance * (1 + 1e-9) + 1e-12
+            low = bisect.bisect_left(confirmed, (sign * level - margin, -1))
+            high = bisect.bisect_right(confirmed, (sign * level + margin, self.count))
+            candidates = confirmed[low:high]
+        else:
+            candidates = confirmed
+        touches = sorted([index for value, index in candidates if is_touch(value)] +
+                         [index for value, index in provisional if is_touch(value)])
+        if len(touches) < 2:
+            return None, None
+
+        return touches, level
+
+
+class _RollingExtreme:
+    # trailing rolling max/min kept in a monotonic deque; a window holding a NaN is undefined, as with pandas
+
+    def __init__(self, window, is_max):
+        self.window = window
+        self.is_max = is_max
+        self._deque = deque()
+        self._count = 0
+        self._last_missing = -window
+
+    def push(self, index, value):
+        self._count += 1
+        if np.isnan(value):
+            self._last_missing = index
+        else:
+            while self._deque and (self._deque[-1][1] <= value if self.is_max else self._deque[-1][1] >= value):
+                self._deque.pop()
+            self._deque.append((index, value))
+        while self._deque and self._deque[0][0] <= index - self.window:
+            self._deque.popleft()
+        self._index = index
+
+    def value(self):
+        if self._count < self.window or self._index - self._last_missing < self.window or not self._deque:
+            return np.nan
+        return self._deque[0][1]
@@ -0,0 +1,203 @@
+import json
+import threading
+
+import pandas as pd
+from boto3.dynamodb.types import TypeDeserializer
+
+from tools.aws_helper import get_client
+from tools.rate_limit_helper import fetch_concurrently
+
+POSITIONS_TABLE = 'Positions'
+CURRENT_BALANCES_TABLE = 'CurrentBalances'
+DEFAULT_HISTORY_DAYS = 30
+# sorts after every time of day in an ISO timestamp, so a range ending on '<date>T~' covers the whole date
+END_OF_DAY = 'T~'
+
+_deserializer = TypeDeserializer()
+# completed days already fetched, per table and partition key: {(table, key): {'YYYY-MM-DD': [records]}}
+_day_cache = {}
+_day_cache_lock = threading.Lock()
+
+
+def query_range(table_name, key_name, key_value, start, end, dynamodb_client=None):
+    """
+    Queries the items of one partition whose storedTimestamp lies in a range.
+
+    The range is a key condition on the sort key, so only the matching items are read. Every page of the result is
+    fetched.
+
+    Args:
+        table_name (str): The DynamoDB table, e.g. 'Positions'.
+        key_name (str): The partition key of the table, e.g. 'symbol'.
+        key_value (str): The partition to query, e.g. 'AAPL'.
+        start (str): The first storedTimestamp of the range.
+        end (str): The last storedTimestamp of the range.
+        dynamodb_client (optional): A boto3 DynamoDB client. Defaults to None, in which case the shared client is
+                                    used.
+
+    Returns:
+        list of dict: The items ordered by storedTimestamp, with numbers as floats.
+    """
+    dynamodb_client = dynamodb_client or get_client('dynamodb')
+    kwargs = {
+        'TableName': table_name,
+        'KeyConditionExpression': '#key = :key AND storedTimestamp BETWEEN :start AND :end',
+        'ExpressionAttributeNames': {'#key': key_name},
+        'ExpressionAttributeValues': {':key': {'S': str(key_value)}, ':start': {'S': start}, ':end': {'S': end}},
+    }
+    records = []
+    while True:
+        response = dynamodb_client.query(**kwargs)
+        records.extend(_to_record(item) for item in response.get('Items', []))
+        if 'LastEvaluatedKey' not in response:
+            return records
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def query_days(table_name, key_name, key_value, start_date, end_date, today=None, dynamodb_client=None):
+    """
+    Retrieves the items of one partition stored between two dates, querying only the days not fetched before.
+
+    Days before `today` cannot change any more and are kept in a module-level cache, so a warm container or a
+    long-running dashboard only queries the days it has not seen, plus today.
+
+    Args:
+        table_name (str): The DynamoDB table, e.g. 'Positions'.
+        key_name (str): The partition key of the table, e.g. 'symbol'.
+        key_value (str): The partition to query, e.g. 'AAPL'.
+        start_date (str or Timestamp): The first date.
+        end_date (str or Timestamp): The last date.
+        today (str or Timestamp, optional): The current date (UTC). Defaults to today.
+        dynamodb_client (optional): A boto3 DynamoDB client. Defaults to None.
+
+    Returns:
+        list of dict: The items ordered by storedTimestamp, with numbers as floats.
+    """
+    dates = pd.date_range(pd.Timestamp(start_date).normalize(), pd.Timestamp(end_date).normalize())
+    dates = list(dates.strftime('%Y-%m-%d'))
+    today = (pd.Timestamp.utcnow() if today is None else pd.Timestamp(today)).strftime('%Y-%m-%d')
+    cache_key = (table_name, str(key_value))
+    with _day_cache_lock:
+        cached = dict(_day_cache.get(cache_key, {}))
+
+    missing = [date for date in dates if date not in cached]
+    fetched = {}
+    if missing:
+        for record in query_range(table_name, key_name, key_value, missing[0], missing[-1] + END_OF_DAY,
+                                  dynamodb_client=dynamodb_client):
+            fetched.setdefault(record['storedTimestamp'][:10], []).append(record)
+        completed = {date: fetched.get(date, []) for date in dates
+                     if missing[0] <= date <= missing[-1] and date < today}
+        with _day_cache_lock:
+            _day_cache.setdefault(cache_key, {}).update(completed)
+
+    records = []
+    for date in dates:
+        records.extend(cached[date] if date in cached else fetched.get(date, []))
+    return records
+
+
+def clear_history_cache():
+    """
+    Forgets every day fetched by `query_days`.
+
+    Returns:
+        None
+    """
+    with _day_cache_lock:
+        _day_cache.clear()
+
+
+def get_liquidation_value_history(account_id, days=DEFAULT_HISTORY_DAYS, as_of=None, dynamodb_client=None):
+    """
+    Builds the daily liquidation value of an account from the CurrentBalances snapshots.
+
+    Args:
+        account_id (str): The account.
+        days (int, optional): The number of calendar days ending on `as_of`. Defaults to 30.
+        as_of (str or Timestamp, optional): The last date (UTC). Defaults to today.
+        dynamodb_client (optional): A boto3 DynamoDB client. Defaults to None.
+
+    Returns:
+        Series: The liquidation value of the last snapshot of each day, indexed by date.
+    """
+    start_date, end_date = _get_date_range(days, as_of)
+    records = query_days(CURRENT_BALANCES_TABLE, 'accountId', account_id, start_date, end_date,
+                         dynamodb_client=dynamodb_client)
+    if not records:
+        return pd.Series(dtype='float64', name='liquidationValue')
+    df = _last_snapshot_per_day(pd.DataFrame.from_records(records), ['accountId'])
+    return df.set_index('date')['liquidationValue']
+
+
+def get_position_history(symbols, days=DEFAULT_HISTORY_DAYS, account_id=None, as_of=None, max_workers=8,
+                         dynamodb_client=None):
+    """
+    Retrieves the Positions snapshots of several symbols, querying the symbols in parallel.
+
+    Args:
+        symbols (list of str): The position symbols, e.g. the option contract symbols.
+        days (int, optional): The number of calendar days ending on `as_of`. Defaults to 30.
+        account_id (str, optional): The account to keep. Defaults to None (all accounts).
+        as_of (str or Timestamp, optional): The last date (UTC). Defaults to today.
+        max_workers (int, optional): The number of concurrent queries. Defaults to 8.
+        dynamodb_client (optional): A boto3 DynamoDB client. Defaults to None.
+
+    Returns:
+        DataFrame: One row per stored position with a 'date' column, ordered by symbol then storedTimestamp.
+    """
+    start_date, end_date = _get_date_range(days, as_of)
+    results = fetch_concurrently(
+        lambda symbol: query_days(POSITIONS_TABLE, 'symbol', symbol, start_date, end_date,
+                                  dynamodb_client=dynamodb_client),
+        symbols, max_workers=max_workers)
+    records = [record for symbol_records in results.values() for record in symbol_records]
+    if account_id is not None:
+        records = [record for record in records if record.get('accountId') == str(account_id)]
+    df = pd.DataFrame.from_records(records)
+    if df.empty:
+        return df
+    df['date'] = pd.to_datetime(df['storedTimestamp'].str[:10])
+    return df
+
+
+def get_position_pnl_history(symbols, value='currentDayProfitLoss', days=DEFAULT_HISTORY_DAYS, account_id=None,
+                             as_of=None, max_workers=8, dynamodb_client=None):
+    """
+    Builds a daily series per position from the Positions snapshots, e.g. its day P&L or market value.
+
+    Args:
+        symbols (list of str): The position symbols.
+        value (str, optional): The position field to chart. Defaults to 'currentDayProfitLoss'.
+        days (int, optional): The number of calendar days ending on `as_of`. Defaults to 30.
+        account_id (str, optional): The account to keep. Defaults to None (all accounts, summed).
+        as_of (str or Timestamp, optional): The last date (UTC). Defaults to today.
+        max_workers (int, optional): The number of concurrent queries. Defaults to 8.
+        dynamodb_client (optional): A boto3 DynamoDB client. Defaults to None.
+
+    Returns:
+        DataFrame: The field of the last snapshot of each day, indexed by date with one column per symbol.
+    """
+    df = get_position_history(symbols, days=days, account_id=account_id, as_of=as_of, max_workers=max_workers,
+                              dynamodb_client=dynamodb_client)
+    if df.empty:
+        return pd.DataFrame(dtype='float64')
+    df = _last_snapshot_per_day(df, ['symbol', 'accountId'])
+    return df.pivot_table(index='date', columns='symbol', values=value, aggfunc='sum')
+
+
+def _get_date_range(days, as_of):
+    end_date = (pd.Timestamp.utcnow() if as_of is None else pd.Timestamp(as_of)).normalize()
+    return end_date - pd.Timedelta(days=days - 1), end_date
+
+
+def _last_snapshot_per_day(df, keys):
+    df = df.sort_values('storedTimestamp')
+    df['date'] = pd.to_datetime(df['storedTimestamp'].str[:10])
+    return df.drop_duplicates(['date'] + [key for key in keys if key in df.columns], keep='last')
+
+
+def _to_record(item):
+    # DynamoDB numbers deserialize as Decimal, which pandas would keep as objects
+    return json.loads(json.dumps({key: _deserializer.deserialize(value) for key, value in item.items()},
+                                 default=float))
@@ -0,0 +1,90 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket limiting how often a quota-bound API is called.
+
+    Tokens are added continuously at `rate` per `per` seconds up to `capacity`, and every call takes one. With the
+    default capacity of one token the calls are spaced evenly, so no window of `per` seconds ever sees more than
+    `rate` calls; a larger capacity allows bursts at the cost of that guarantee.
+    """
+
+    def __init__(self, rate, per=60.0, capacity=1, clock=time.monotonic, sleep=time.sleep):
+        if rate <= 0:
+            raise ValueError('rate must be positive')
+        self.interval = per / rate
+        self.capacity = capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = float(capacity)
+        self._updated = clock()
+
+    def acquire(self):
+        """
+        Takes a token, blocking until one is available.
+
+        Waiting callers reserve their token before sleeping, so concurrent callers are served in turn without
+        polling.
+
+        Returns:
+            float: The number of seconds waited.
+        """
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) / self.interval)
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens * self.interval if self._tokens < 0 else 0.0
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+
+class RateLimitedClient:
+    """
+    Proxy of an API client whose method calls each take a token from a `TokenBucket` first.
+
+    Attributes that are not methods are passed through untouched.
+    """
+
+    def __init__(self, client, bucket):
+        self._client = client
+        self._bucket = bucket
+
+    def __getattr__(self, name):
+        attribute = getattr(self._client, name)
+        if not callable(attribute):
+            return attribute
+
+        def call(*args, **kwargs):
+            self._bucket.acquire()
+            return attribute(*args, **kwargs)
+
+        return call
+
+
+def fetch_concurrently(fetch, keys, max_workers=8):
+    """
+    Calls `fetch` for every unique key on a thread pool.
+
+    Combined with a `RateLimitedClient`, requests are issued as fast as the quota allows while their latencies
+    overlap, instead of adding up one request after another.
+
+    Args:
+        fetch (callable): A function of one key.
+        keys (iterable): The keys to fetch; duplicates are fetched once.
+        max_workers (int, optional): The number of threads. Defaults to 8.
+
+    Returns:
+        dict: The result of `fetch` for each key, in the order the keys were first seen. The first exception raised
+              by `fetch` is re-raised.
+    """
+    unique_keys = list(dict.fromkeys(keys))
+    if not unique_keys:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(unique_keys))) as executor:
+        return dict(zip(unique_keys, executor.map(fetch, unique_keys)))
@@ -0,0 +1,126 @@
+import pandas as pd
+
+from tools.storage_helper import get_local_path, write_parquet
+
+SNAPSHOT_PREFIX = 'snapshots'
+SNAPSHOT_COMPRESSION = 'zstd'
+# hive partitions of every snapshot dataset, kept as strings so ISO dates compare in order
+SNAPSHOT_PARTITIONS = ('date', 'account_id')
+
+
+def get_snapshot_key(dataset, account_id, stored_timestamp):
+    """
+    Builds the storage key of an account snapshot, partitioned by date and account.
+
+    Args:
+        dataset (str): The name of the snapshot dataset, e.g. 'positions' or 'current_balances'.
+        account_id (str): The account the snapshot belongs to.
+        stored_timestamp (str): The ISO timestamp shared by every record of the snapshot.
+
+    Returns:
+        str: The storage key, e.g. 'snapshots/positions/date=2023-11-20/account_id=123/20231120T211500.parquet'.
+    """
+    timestamp = pd.Timestamp(stored_timestamp)
+    return (f"{SNAPSHOT_PREFIX}/{dataset}/date={timestamp.strftime('%Y-%m-%d')}/account_id={account_id}/"
+            f"{timestamp.strftime('%Y%m%dT%H%M%S')}.parquet")
+
+
+def snapshot_frame(records):
+    """
+    Builds the DataFrame archived for a list of snapshot records.
+
+    Integer columns are stored as floats, since TD Ameritrade returns whole quantities and prices without a decimal
+    point, so that the same field has one type in every file of the dataset.
+
+    Args:
+        records (list of dict): The flattened records, e.g. the positions stored in DynamoDB.
+
+    Returns:
+        DataFrame: One row per record.
+    """
+    df = pd.DataFrame.from_records(records)
+    integer_columns = df.select_dtypes(include='integer').columns
+    df[integer_columns] = df[integer_columns].astype('float64')
+    return df
+
+
+def write_snapshot(records, dataset, account_id, stored_timestamp, bucket_name=None, cache_dir=None,
+                   s3_client=None):
+    """
+    Archives a snapshot as a compressed Parquet file in its date and account partition.
+
+    Args:
+        records (list of dict): The flattened records of the snapshot.
+        dataset (str): The name of the snapshot dataset, e.g. 'positions'.
+        account_id (str): The account the snapshot belongs to.
+        stored_timestamp (str): The ISO timestamp shared by every record of the snapshot.
+        bucket_name (str, optional): The S3 bucket of the archive. Defaults to None (local only).
+        cache_dir (str, optional): A local directory of the archive. Defaults to None.
+        s3_client (optional): A boto3 S3 client. Defaults to None, in which case the shared client is used.
+
+    Returns:
+        str: The storage key of the snapshot.
+    """
+    key = get_snapshot_key(dataset, account_id, stored_timestamp)
+    write_parquet(snapshot_frame(records), key, cache_dir=cache_dir, bucket_name=bucket_name, s3_client=s3_client,
+                  compression=SNAPSHOT_COMPRESSION)
+    return key
+
+
+def load_snapshots(dataset, days=30, account_id=None, columns=None, as_of=None, bucket_name=None, cache_dir=None,
+                   region_name=None):
+    """
+    Loads the snapshots of the last `days` days into a DataFrame.
+
+    The date and account filters are pushed down to the partition layout, so only the matching files are opened, and
+    only the requested columns are read from them. Files written with different fields are read with their unified
+    schema, missing fields being null.
+
+    Args:
+        dataset (str): The name of the snapshot dataset, e.g. 'positions'.
+        days (int, optional): The number of calendar days to load, ending on `as_of`. Defaults to 30.
+        account_id (str, optional): The account to load. Defaults to None (all accounts).
+        columns (list of str, optional): The fields to load. Defaults to None (all fields).
+        as_of (Timestamp, optional): The last date to load. Defaults to today (UTC).
+        bucket_name (str, optional): The S3 bucket of the archive. Defaults to None.
+        cache_dir (str, optional): A local directory of the archive, used when no bucket is given. Defaults to None.
+        region_name (str, optional): The region of the bucket. Defaults to None (the default region).
+
+    Returns:
+        DataFrame: The snapshot records with 'date' and 'account_id' columns, or an empty DataFrame if none match.
+    """
+    # pyarrow's dataset and filesystem modules are only loaded to read, keeping the alert that writes snapshots small
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    from pyarrow import fs
+
+    partitioning = ds.partitioning(pa.schema([(name, pa.string()) for name in SNAPSHOT_PARTITIONS]), flavor='hive')
+    if bucket_name:
+        filesystem = fs.S3FileSystem(region=region_name)
+        path = f"{bucket_name}/{SNAPSHOT_PREFIX}/{dataset}"
+    elif cache_dir:
+        filesystem = fs.LocalFileSystem()
+        path = get_local_path(f"{SNAPSHOT_PREFIX}/{dataset}", cache_dir)
+    else:
+        raise ValueError('Either bucket_name or cache_dir is required')
+
+    as_of = pd.Timestamp.utcnow() if as_of is None else pd.Timestamp(as_of)
+    start = (as_of - pd.Timedelta(days=days - 1)).strftime('%Y-%m-%d')
+    expression = (ds.field('date') >= start) & (ds.field('date') <= as_of.strftime('%Y-%m-%d'))
+    if account_id is not None:
+        expression = expression & (ds.field('account_id') == str(account_id))
+
+    try:
+        dataset_ = ds.dataset(path, filesystem=filesystem, format='parquet', partitioning=partitioning)
+    except FileNotFoundError:
+        return pd.DataFrame()
+    fragments = list(dataset_.get_fragments(filter=expression))
+    if not fragments:
+        return pd.DataFrame()
+
+    schema = pa.unify_schemas([fragment.physical_schema for fragment in fragments] +
+                              [partitioning.schema])
+    dataset_ = ds.FileSystemDataset(fragments, schema, dataset_.format, filesystem=filesystem)
+    if columns is not None:
+        columns = list(dict.fromkeys(list(columns) + list(SNAPSHOT_PARTITIONS)))
+    return dataset_.to_table(columns=columns).to_pandas()
@@ -0,0 +1,95 @@
+import os
+from io import BytesIO
+
+import pandas as pd
+from botocore.exceptions import ClientError
+
+from tools.aws_helper import get_client
+
+
+def get_local_path(key, cache_dir):
+    """
+    Builds the local file path for a storage key.
+
+    Args:
+        key (str): The storage key, e.g. 'bars/daily_adjusted/AAPL.parquet'.
+        cache_dir (str): The local directory holding cached files.
+
+    Returns:
+        str: The path of the file for the key inside the cache directory.
+    """
+    return os.path.join(cache_dir, *key.split('/'))
+
+
+def read_parquet(key, cache_dir=None, bucket_name=None, s3_client=None, **kwargs):
+    """
+    Reads a Parquet file from the local cache directory, falling back to S3.
+
+    The local copy is preferred so a warm Lambda container never goes to S3 for a file it already has. When the file
+    is only available in S3 it is downloaded and written to the local cache for the next call.
+
+    Args:
+        key (str): The storage key of the file.
+        cache_dir (str, optional): The local directory holding cached files. Defaults to None (no local cache).
+        bucket_name (str, optional): The S3 bucket holding the files. Defaults to None (local only).
+        s3_client (optional): A boto3 S3 client. Defaults to None, in which case the shared client is used.
+        **kwargs: Additional keyword arguments passed to `pd.read_parquet`, e.g. `columns`.
+
+    Returns:
+        DataFrame or None: The stored DataFrame, or None if the key does not exist in either location.
+    """
+    if cache_dir:
+        local_path = get_local_path(key, cache_dir)
+        if os.path.exists(local_path):
+            return pd.read_parquet(local_path, **kwargs)
+
+    if bucket_name:
+        s3_client = s3_client or get_client('s3')
+        try:
+            response = s3_client.get_object(Bucket=bucket_name, Key=key)
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('NoSuchKey', '404'):
+                return None
+            raise e
+        payload = response['Body'].read()
+        if cache_dir:
+            _write_local(payload, get_local_path(key, cache_dir))
+        return pd.read_parquet(BytesIO(payload), **kwargs)
+
+    return None
+
+
+def write_parquet(df, key, cache_dir=None, bucket_name=None, s3_client=None, compression='snappy'):
+    """
+    Writes a DataFrame as a Parquet file to the local cache directory and, optionally, to S3.
+
+    Args:
+        df (DataFrame): The DataFrame to store.
+        key (str): The storage key of the file.
+        cache_dir (str, optional): The local directory holding cached files. Defaults to None (no local copy).
+        bucket_name (str, optional): The S3 bucket holding the files. Defaults to None (local only).
+        s3_client (optional): A boto3 S3 client. Defaults to None, in which case the shared client is used.
+        compression (str, optional): The Parquet compression codec. Defaults to 'snappy'.
+
+    Returns:
+        None
+    """
+    buffer = BytesIO()
+    df.to_parquet(buffer, compression=compression)
+    payload = buffer.getvalue()
+
+    if cache_dir:
+        _write_local(payload, get_local_path(key, cache_dir))
+
+    if bucket_name:
+        s3_client = s3_client or get_client('s3')
+        s3_client.put_object(Bucket=bucket_name, Key=key, Body=payload)
+
+
+def _write_local(payload, path):
+    # write to a temporary file first so a concurrent reader never sees a partial file
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(payload)
+    os.replace(tmp_path, path)
@@ -0,0 +1,128 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+
+import pandas as pd
+
+from tools.backtest_helper import IndicatorCache, backtest_macd_rsi_mfi
+
+# the indicator periods each parameter set is computed with; everything else is a threshold
+PERIOD_PARAMETERS = {
+    'fast_period': 12,
+    'slow_period': 26,
+    'signal_period': 9,
+    'rsi_period': 14,
+    'mfi_period': 14,
+}
+THRESHOLD_PARAMETERS = {
+    'rsi_oversold': 30,
+    'rsi_overbought': 70,
+    'mfi_oversold': 20,
+    'mfi_overbought': 80,
+    'crossover_bars': 1,
+}
+
+# the indicator cache of a worker process, set by _init_worker
+_worker_cache = None
+
+
+def expand_grid(grid):
+    """
+    Expands a parameter grid into every parameter combination.
+
+    Parameters missing from the grid take the defaults of the combined strategy.
+
+    Args:
+        grid (dict): Lists of values keyed by parameter name, any of `PERIOD_PARAMETERS` and `THRESHOLD_PARAMETERS`.
+
+    Returns:
+        list of dict: One complete parameter set per combination, grouped by indicator periods.
+    """
+    unknown = set(grid) - set(PERIOD_PARAMETERS) - set(THRESHOLD_PARAMETERS)
+    if unknown:
+        raise ValueError(f"Unknown sweep parameters: {sorted(unknown)}")
+    defaults = {**PERIOD_PARAMETERS, **THRESHOLD_PARAMETERS}
+    names = list(defaults)
+    values = [list(grid.get(name, [defaults[name]])) for name in names]
+    # periods vary slowest, so consecutive parameter sets share their indicator arrays
+    return [dict(zip(names, combination)) for combination in product(*values)]
+
+
+def evaluate_parameters(cache, parameters, allow_short=False, cost_per_trade=0.0005):
+    """
+    Backtests the combined MACD, RSI and MFI strategy for one parameter set.
+
+    Args:
+        cache (IndicatorCache): The indicator cache of the bar panel.
+        parameters (dict): A complete parameter set, such as an item of `expand_grid`.
+        allow_short (bool, optional): Whether to trade the short side as well. Defaults to False.
+        cost_per_trade (float, optional): The cost per unit of position traded. Defaults to 0.0005.
+
+    Returns:
+        dict: The parameters followed by the portfolio row of `compute_performance`.
+    """
+    _, _, performance = backtest_macd_rsi_mfi(cache.panels, allow_short=allow_short, cost_per_trade=cost_per_trade,
+                                              indicators=cache, **parameters)
+    return {**parameters, **performance.loc['portfolio'].to_dict()}
+
+
+def rank_results(results, objective, ascending=False):
+    """
+    Orders sweep results by an objective and numbers them.
+
+    Args:
+        results (DataFrame): One row per parameter set.
+        objective (str): The column to rank by.
+        ascending (bool, optional): Whether lower values are better. Defaults to False.
+
+    Returns:
+        DataFrame: The results sorted best first with a 1-based 'rank' column in front; rows without a value rank
+                   last.
+    """
+    ranked = results.sort_values(objective, ascending=ascending, na_position='last', kind='stable')
+    ranked = ranked.reset_index(drop=True)
+    ranked.insert(0, 'rank', range(1, len(ranked) + 1))
+    return ranked
+
+
+def sweep_strategy_parameters(panels, grid, objective='sharpe', allow_short=False, cost_per_trade=0.0005,
+                              max_workers=None):
+    """
+    Backtests every combination of a parameter grid and ranks them.
+
+    Parameter sets are spread over a process pool in contiguous chunks. Every worker keeps an `IndicatorCache`, so
+    the MACD, RSI and MFI arrays are computed once per distinct set of periods instead of once per combination.
+
+    Args:
+        panels (dict): 'high', 'low', 'close' and 'volume' panels ordered oldest first, such as the output of
+                       `load_bar_panels`.
+        grid (dict): Lists of values keyed by parameter name, see `expand_grid`.
+        objective (str, optional): The performance column to rank by. Defaults to 'sharpe'.
+        allow_short (bool, optional): Whether to trade the short side as well. Defaults to False.
+        cost_per_trade (float, optional): The cost per unit of position traded. Defaults to 0.0005.
+        max_workers (int, optional): The number of worker processes, 1 to run in this process. Defaults to the number
+                                     of CPUs.
+
+    Returns:
+        DataFrame: One row per parameter set with its portfolio performance, ranked best first.
+    """
+    parameter_sets = expand_grid(grid)
+    if max_workers == 1:
+        cache = IndicatorCache(panels)
+        rows = [evaluate_parameters(cache, parameters, allow_short, cost_per_trade) for parameters in parameter_sets]
+    else:
+        # contiguous chunks keep parameter sets sharing their periods on the same worker
+        chunksize = max(1, len(parameter_sets) // (4 * (max_workers or os.cpu_count() or 1)))
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(panels,)) as executor:
+            rows = list(executor.map(_evaluate_in_worker, parameter_sets, [allow_short] * len(parameter_sets),
+                                     [cost_per_trade] * len(parameter_sets), chunksize=chunksize))
+    return rank_results(pd.DataFrame(rows), objective)
+
+
+def _init_worker(panels):
+    global _worker_cache
+    _worker_cache = IndicatorCache(panels)
+
+
+def _evaluate_in_worker(parameters, allow_short, cost_per_trade):
+    return evaluate_parameters(_worker_cache, parameters, allow_short, cost_per_trade)
@@ -1,17 +1,269 @@
-from telegram import Bot
-from telegram.error import NetworkError
+import asyncio
+import threading
+
+from telegram import Bot, InputMediaPhoto
+from telegram.constants import MediaGroupLimit, MessageLimit
+from telegram.error import NetworkError, RetryAfter
+from telegram.request import HTTPXRequest
+
+from tools.rate_limit_helper import TokenBucket
+
+CONNECTION_POOL_SIZE = 8
+# Telegram allows about one message per second in a chat, with short bursts, and 30 per second overall
+CHAT_MESSAGES_PER_SECOND = 1
+CHAT_BURST = 3
+GLOBAL_MESSAGES_PER_SECOND = 30
+MAX_RETRIES = 3
+
+_loop = None
+_senders = {}
+_senders_lock = threading.Lock()
+
+
+def get_event_loop():
+    """
+    Retrieves the event loop shared by every Telegram call in this container.
+
+    `asyncio.run` closes its loop, and with it the connections of the bot, after every call; running on one
+    long-lived loop lets a warm container reuse them.
+
+    Returns:
+        AbstractEventLoop: The shared event loop.
+    """
+    global _loop
+    with _senders_lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+        return _loop
+
+
+def run_async(coroutine):
+    """
+    Runs a coroutine to completion on the shared event loop.
+
+    Args:
+        coroutine: The coroutine, e.g. `send_alert(bot_token, chat_id, message)`.
+
+    Returns:
+        The result of the coroutine.
+    """
+    return get_event_loop().run_until_complete(coroutine)
+
+
+def get_sender(bot_token):
+    """
+    Retrieves the `TelegramSender` of a bot shared by every call in this container.
+
+    Args:
+        bot_token (str): The bot token.
+
+    Returns:
+        TelegramSender: The shared sender.
+    """
+    with _senders_lock:
+        if bot_token not in _senders:
+            _senders[bot_token] = TelegramSender(bot_token)
+        return _senders[bot_token]
+
+
+def split_message(text, max_length=MessageLimit.MAX_TEXT_LENGTH):
+    """
+    Splits a text into messages short enough for Telegram, preferably at line breaks.
+
+    Args:
+        text (str): The text.
+        max_length (int, optional): The maximum message length. Defaults to 4096.
+
+    Returns:
+        list of str: The messages, in order.
+    """
+    messages = []
+    while len(text) > max_length:
+        cut = text.rfind('\n', 0, max_length + 1)
+        if cut <= 0:
+            cut = max_length
+        messages.append(text[:cut])
+        text = text[cut:].lstrip('\n')
+    if text or not messages:
+        messages.append(text)
+    return messages
+
+
+class TelegramSender:
+    """
+    Long-lived Telegram sender with pooled connections and per-chat rate limiting.
+
+    Every request first takes a token from the bucket of its chat and from a global bucket, and waits without
+    blocking the event loop. Requests rejected with RetryAfter are retried after the delay Telegram asks for.
+    Messages and photos can be queued and sent with `flush`, which groups consecutive photos of a chat into media
+    groups so that a multi-chart reply costs one request per ten charts.
+    """
+
+    def __init__(self, bot_token, bot=None, connection_pool_size=CONNECTION_POOL_SIZE, sleep=asyncio.sleep):
+        self.bot = bot or Bot(token=bot_token, request=HTTPXRequest(connection_pool_size=connection_pool_size))
+        self._sleep = sleep
+        self._initialized = False
+        self._chat_buckets = {}
+        # the buckets only compute the waits, which are awaited so other chats keep sending
+        self._global_bucket = TokenBucket(GLOBAL_MESSAGES_PER_SECOND, per=1.0, sleep=lambda seconds: None)
+        self._queue = []
+
+    async def send_message(self, chat_id, text):
+        """
+        Sends a text message, split into several messages if it is too long for one.
+
+        Args:
+            chat_id (int or str): The chat.
+            text (str): The text.
+
+        Returns:
+            list of Message: The messages sent.
+        """
+        return [await self._request(self.bot.send_message, chat_id=chat_id, text=part)
+                for part in split_message(text)]
+
+    async def send_photo(self, chat_id, photo, caption=None):
+        """
+        Sends one photo.
+
+        Args:
+            chat_id (int or str): The chat.
+            photo (bytes or str): The image bytes or a file path.
+            caption (str, optional): The caption. Defaults to None.
+
+        Returns:
+            Message: The message sent.
+        """
+        return await self._request(self.bot.send_photo, chat_id=chat_id, photo=_read_photo(photo),
+                                   caption=caption)
+
+    async def send_media_group(self, chat_id, photos, caption=None):
+        """
+        Sends photos as media groups of up to ten photos each.
+
+        Args:
+            chat_id (int or str): The chat.
+            photos (list of bytes or str): The image bytes or file paths.
+            caption (str, optional): The caption, shown under the first group. Defaults to None.
+
+        Returns:
+            list of Message: The messages sent.
+        """
+        messages = []
+        for start in range(0, len(photos), MediaGroupLimit.MAX_MEDIA_LENGTH):
+            group = photos[start:start + MediaGroupLimit.MAX_MEDIA_LENGTH]
+            group_caption = caption if start == 0 else None
+            if len(group) == 1:
+                messages.append(await self.send_photo(chat_id, group[0], caption=group_caption))
+                continue
+            media = [InputMediaPhoto(_read_photo(photo), caption=group_caption if i == 0 else None)
+                     for i, photo in enumerate(group)]
+            messages.extend(await self._request(self.bot.send_media_group, chat_id=chat_id, media=media))
+        return messages
+
+    def queue_message(self, chat_id, text):
+        """
+        Queues a text message to be sent by `flush`.
+
+        Args:
+            chat_id (int or str): The chat.
+            text (str): The text.
+
+        Returns:
+            None
+        """
+        self._queue.append((chat_id, 'message', text))
+
+    def queue_photo(self, chat_id, photo):
+        """
+        Queues a photo to be sent by `flush`, grouped with the photos queued next to it for the same chat.
+
+        Args:
+            chat_id (int or str): The chat.
+            photo (bytes or str): The image bytes or a file path.
+
+        Returns:
+            None
+        """
+        self._queue.append((chat_id, 'photo', photo))
+
+    async def flush(self):
+        """
+        Sends the queued messages and photos, each chat in the order they were queued.
+
+        Consecutive photos of a chat are sent as media groups. Chats are served concurrently.
+
+        Returns:
+            list of Message: The messages sent.
+        """
+        queue, self._queue = self._queue, []
+        batches = {}
+        for chat_id, kind, content in queue:
+            chat_batches = batches.setdefault(chat_id, [])
+            if kind == 'photo' and chat_batches and chat_batches[-1][0] == 'photo':
+                chat_batches[-1][1].append(content)
+            else:
+                chat_batches.append((kind, [content]))
+
+        async def send_chat(chat_id, chat_batches):
+            messages = []
+            for kind, contents in chat_batches:
+                if kind == 'photo':
+                    messages.extend(await self.send_media_group(chat_id, contents))
+                else:
+                    messages.extend(await self.send_message(chat_id, contents[0]))
+            return messages
+
+        results = await asyncio.gather(*(send_chat(chat_id, chat_batches)
+                                         for chat_id, chat_batches in batches.items()))
+        return [message for messages in results for message in messages]
+
+    async def shutdown(self):
+        """
+        Closes the connections of the bot.
+
+        Returns:
+            None
+        """
+        if self._initialized:
+            await self.bot.shutdown()
+            self._initialized = False
+
+    async def _request(self, method, **kwargs):
+        chat_id = kwargs['chat_id']
+        if not self._initialized:
+            await self.bot.initialize()
+            self._initialized = True
+        if chat_id not in self._chat_buckets:
+            self._chat_buckets[chat_id] = TokenBucket(CHAT_MESSAGES_PER_SECOND, per=1.0, capacity=CHAT_BURST,
+                                                      sleep=lambda seconds: None)
+        for attempt in range(MAX_RETRIES + 1):
+            wait = max(self._chat_buckets[chat_id].acquire(), self._global_bucket.acquire())
+            if wait > 0:
+                await self._sleep(wait)
+            try:
+                return await method(**kwargs)
+            except RetryAfter as e:
+                if attempt == MAX_RETRIES:
+                    raise
+                await self._sleep(e.retry_after)
+
+
+def _read_photo(photo):
+    if isinstance(photo, str):
+        with open(photo, 'rb') as f:
+            return f.read()
+    return photo
 
 
 async def send_alert(bot_token, chat_id, message):
-    bot = Bot(token=bot_token)
-    await bot.send_message(chat_id=chat_id, text=message)
+    await get_sender(bot_token).send_message(chat_id, message)
 
 
-async def send_png(bot_token, chat_id, image_path):
+async def send_png(bot_token, chat_id, image):
+    # image is a file path or the PNG bytes
     try:
-        bot = Bot(token=bot_token)
-        with open(image_path, 'rb') as image_file:
-            await bot.send_photo(chat_id=chat_id, photo=image_file)
+        await get_sender(bot_token).send_photo(chat_id, image)
         return None
     except NetworkError as e:
         return f"An error occurred: {e}"